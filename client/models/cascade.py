@@ -0,0 +1,166 @@
+"""
+Two-stage cascade inference for disease detection.
+
+A small plant-type router picks the crop (or the caller supplies a crop
+hint), then a per-crop disease head that only knows that crop's classes
+runs on the image. Heads are loaded lazily from
+`<model_dir>/heads/<Crop>.h5` and kept in an LRU cache, so each crop's model
+can be retrained and deployed on its own.
+"""
+
+import logging
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+try:
+    from tensorflow import keras
+except ImportError:
+    keras = None
+
+
+def group_classes(classes: Sequence[str]) -> Dict[str, List[int]]:
+    """Map crop name -> indices of its classes in the global class list"""
+    groups: Dict[str, List[int]] = {}
+    for i, name in enumerate(classes):
+        if '___' in name:
+            groups.setdefault(name.split('___')[0], []).append(i)
+    return groups
+
+
+def create_router_model(num_crops: int):
+    """Tiny plant-type classifier on a 96x96 view of the input"""
+    model = keras.Sequential([
+        keras.layers.Resizing(96, 96, input_shape=(224, 224, 3)),
+        keras.layers.Rescaling(1./255),
+        keras.layers.Conv2D(16, (3, 3), strides=2, activation='relu'),
+        keras.layers.Conv2D(32, (3, 3), strides=2, activation='relu'),
+        keras.layers.Conv2D(64, (3, 3), strides=2, activation='relu'),
+        keras.layers.GlobalAveragePooling2D(),
+        keras.layers.Dense(num_crops, activation='softmax')
+    ])
+    model.compile(optimizer='adam', loss='sparse_categorical_crossentropy', metrics=['accuracy'])
+    return model
+
+
+def create_head_model(num_classes: int):
+    """Small per-crop disease head"""
+    model = keras.Sequential([
+        keras.layers.Resizing(128, 128, input_shape=(224, 224, 3)),
+        keras.layers.Rescaling(1./255),
+        keras.layers.Conv2D(32, (3, 3), strides=2, activation='relu'),
+        keras.layers.BatchNormalization(),
+        keras.layers.Conv2D(64, (3, 3), strides=2, activation='relu'),
+        keras.layers.BatchNormalization(),
+        keras.layers.Conv2D(128, (3, 3), strides=2, activation='relu'),
+        keras.layers.GlobalAveragePooling2D(),
+        keras.layers.Dense(num_classes, activation='softmax')
+    ])
+    model.compile(optimizer='adam', loss='sparse_categorical_crossentropy', metrics=['accuracy'])
+    return model
+
+
+class LRUModelCache:
+    """Thread-safe LRU of lazily loaded models.
+
+    Loading runs outside the lock, so requests for cached models never wait on
+    a slow load; concurrent misses for the same key share one load.
+    """
+
+    def __init__(self, loader: Callable[[str], Any], capacity: int):
+        self.loader = loader
+        self.capacity = max(1, capacity)
+        self._models: 'OrderedDict[str, Any]' = OrderedDict()
+        self._loading: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            if key in self._models:
+                self._models.move_to_end(key)
+                return self._models[key]
+            pending = self._loading.get(key)
+            if pending is None:
+                pending = self._loading[key] = Future()
+                owner = True
+            else:
+                owner = False
+        if not owner:
+            return pending.result()
+        try:
+            model = self.loader(key)
+        except BaseException as e:
+            with self._lock:
+                del self._loading[key]
+            pending.set_exception(e)
+            raise
+        with self._lock:
+            del self._loading[key]
+            self._models[key] = model
+            while len(self._models) > self.capacity:
+                evicted, _ = self._models.popitem(last=False)
+                logging.info(f"Evicted disease head for {evicted}")
+        pending.set_result(model)
+        return model
+
+    def keys(self) -> List[str]:
+        with self._lock:
+            return list(self._models)
+
+
+class CascadeClassifier:
+    """Router + per-crop heads over the global class list"""
+
+    def __init__(self, classes: Sequence[str], model_dir: str, cache_size: int = 4):
+        self.classes = list(classes)
+        self.groups = group_classes(self.classes)
+        self.crops = sorted(self.groups)
+        self.model_dir = model_dir
+        self.router = self._load('router.h5', lambda: create_router_model(len(self.crops)))
+        self.heads = LRUModelCache(self._load_head, cache_size)
+
+    def _load(self, name: str, build: Callable[[], Any]):
+        path = os.path.join(self.model_dir, name)
+        if os.path.exists(path):
+            logging.info(f"Loaded cascade model {path}")
+            return keras.models.load_model(path)
+        logging.info(f"Cascade model {path} missing; created untrained")
+        return build()
+
+    def _load_head(self, crop: str):
+        return self._load(os.path.join('heads', f'{crop}.h5'), lambda: create_head_model(len(self.groups[crop])))
+
+    def resolve_hint(self, hint: Optional[str]) -> Optional[str]:
+        if not hint:
+            return None
+        lookup = {c.lower(): c for c in self.crops}
+        return lookup.get(str(hint).strip().lower())
+
+    def route(self, batch: np.ndarray, crop_hint: Optional[str] = None) -> List[Tuple[str, float]]:
+        """Return (crop, router confidence) per image; a valid hint skips the router"""
+        crop = self.resolve_hint(crop_hint)
+        if crop is not None:
+            return [(crop, 1.0)] * len(batch)
+        probs = np.asarray(self.router.predict(batch, verbose=0))
+        return [(self.crops[i], float(probs[row, i])) for row, i in enumerate(probs.argmax(axis=1))]
+
+    def predict(self, batch: np.ndarray, crop_hint: Optional[str] = None) -> List[Tuple[str, float]]:
+        """Classify a (N, 224, 224, 3) batch; each crop's head runs once on its images"""
+        routes = self.route(batch, crop_hint)
+        results: List[Optional[Tuple[str, float]]] = [None] * len(batch)
+        for crop in set(c for c, _ in routes):
+            rows = [i for i, (c, _) in enumerate(routes) if c == crop]
+            if len(self.groups[crop]) == 1:
+                # Nothing for a head to decide; the router's confidence stands
+                for row in rows:
+                    results[row] = (self.classes[self.groups[crop][0]], routes[row][1])
+                continue
+            probs = np.asarray(self.heads.get(crop).predict(batch[rows], verbose=0))
+            for row, p in zip(rows, probs):
+                j = int(p.argmax())
+                results[row] = (self.classes[self.groups[crop][j]], float(p[j]))
+        return results
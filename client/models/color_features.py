@@ -0,0 +1,134 @@
+"""
+Vectorized colour/texture features and a nearest-centroid classifier used as
+the disease detection fallback when TensorFlow is unavailable.
+
+Everything here is plain NumPy and operates on whole (N, H, W, 3) uint8
+batches, so a 224x224 image costs well under a millisecond.
+"""
+
+import os
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+HUE_BINS = 12
+SAT_BINS = 4
+VAL_BINS = 4
+# Colour statistics sample every COLOR_STRIDE-th pixel of the 224x224 input,
+# texture every TEXTURE_STRIDE-th; histograms need far fewer samples than edges
+COLOR_STRIDE = 4
+TEXTURE_STRIDE = 2
+
+
+def rgb_to_hsv(batch: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Convert uint8 RGB arrays of any leading shape to H, S, V in [0, 1)"""
+    rgb = batch.astype(np.float32) / 255.0
+    r, g, b = rgb[..., 0], rgb[..., 1], rgb[..., 2]
+    maxc = rgb.max(axis=-1)
+    minc = rgb.min(axis=-1)
+    delta = maxc - minc
+    safe = np.where(delta > 0, delta, 1.0)
+    sat = np.where(maxc > 0, delta / np.where(maxc > 0, maxc, 1.0), 0.0)
+    hue = np.select(
+        [maxc == r, maxc == g],
+        [(g - b) / safe, 2.0 + (b - r) / safe],
+        default=4.0 + (r - g) / safe,
+    )
+    hue = np.where(delta > 0, (hue / 6.0) % 1.0, 0.0)
+    return hue, sat, maxc
+
+
+def _histograms(values: np.ndarray, bins: int, weights: Optional[np.ndarray] = None) -> np.ndarray:
+    """Per-image normalized histograms of (N, P) values in [0, 1]"""
+    n, p = values.shape
+    idx = np.minimum((values * bins).astype(np.int64), bins - 1)
+    idx += (np.arange(n) * bins)[:, None]
+    counts = np.bincount(idx.ravel(), weights=None if weights is None else weights.ravel(), minlength=n * bins)
+    return counts.reshape(n, bins) / p
+
+
+def extract_features(batch: np.ndarray) -> np.ndarray:
+    """Return an (N, F) float32 feature matrix for a (N, H, W, 3) uint8 batch"""
+    if batch.ndim == 3:
+        batch = batch[None]
+    small = batch[:, ::COLOR_STRIDE, ::COLOR_STRIDE, :]
+    n = small.shape[0]
+    hue, sat, val = rgb_to_hsv(small)
+    hue, sat, val = hue.reshape(n, -1), sat.reshape(n, -1), val.reshape(n, -1)
+
+    # Hue only means something for reasonably saturated, lit pixels
+    chromatic = ((sat > 0.15) & (val > 0.15)).astype(np.float32)
+    hue_hist = _histograms(hue, HUE_BINS, chromatic)
+    achromatic = 1.0 - chromatic.mean(axis=1, keepdims=True)
+    sat_hist = _histograms(sat, SAT_BINS)
+    val_hist = _histograms(val, VAL_BINS)
+    mean_rgb = small.reshape(n, -1, 3).mean(axis=1) / 255.0
+
+    # Texture: mean gradient magnitude and mean absolute Laplacian of luminance
+    texture = batch[:, ::TEXTURE_STRIDE, ::TEXTURE_STRIDE, :].astype(np.float32)
+    gray = texture @ np.array([0.299 / 255.0, 0.587 / 255.0, 0.114 / 255.0], dtype=np.float32)
+    grad = np.abs(np.diff(gray, axis=1)).mean(axis=(1, 2)) + np.abs(np.diff(gray, axis=2)).mean(axis=(1, 2))
+    lap = np.abs(
+        4 * gray[:, 1:-1, 1:-1] - gray[:, :-2, 1:-1] - gray[:, 2:, 1:-1] - gray[:, 1:-1, :-2] - gray[:, 1:-1, 2:]
+    ).mean(axis=(1, 2))
+
+    return np.hstack([hue_hist, achromatic, sat_hist, val_hist, mean_rgb, grad[:, None], lap[:, None]]).astype(np.float32)
+
+
+class ColorClassifier:
+    """Nearest-centroid classifier over standardized colour features"""
+
+    def __init__(self, classes: List[str], mean: np.ndarray, scale: np.ndarray,
+                 centroids: np.ndarray, temperature: float = 1.0):
+        self.classes = list(classes)
+        self.mean = mean.astype(np.float32)
+        self.scale = scale.astype(np.float32)
+        self.centroids = centroids.astype(np.float32)
+        self.temperature = float(temperature)
+
+    @classmethod
+    def load(cls, path: str) -> 'ColorClassifier':
+        data = np.load(path, allow_pickle=False)
+        return cls([str(c) for c in data['classes']], data['mean'], data['scale'],
+                   data['centroids'], float(data['temperature']))
+
+    def save(self, path: str) -> None:
+        np.savez(path, classes=np.array(self.classes), mean=self.mean, scale=self.scale,
+                 centroids=self.centroids, temperature=np.float32(self.temperature))
+
+    def predict_proba(self, features: np.ndarray) -> np.ndarray:
+        z = (features - self.mean) / self.scale
+        d2 = ((z[:, None, :] - self.centroids[None, :, :]) ** 2).sum(axis=-1)
+        logits = -d2 / self.temperature
+        logits -= logits.max(axis=1, keepdims=True)
+        probs = np.exp(logits)
+        return probs / probs.sum(axis=1, keepdims=True)
+
+    def predict(self, batch: np.ndarray) -> List[Tuple[str, float]]:
+        """Classify a (N, H, W, 3) uint8 batch; returns (class, confidence) per image"""
+        probs = self.predict_proba(extract_features(batch))
+        top = probs.argmax(axis=1)
+        return [(self.classes[i], float(probs[row, i])) for row, i in enumerate(top)]
+
+
+def fit_classifier(features: np.ndarray, labels: np.ndarray, classes: List[str]) -> ColorClassifier:
+    """Fit centroids for integer `labels` indexing into `classes`"""
+    mean = features.mean(axis=0)
+    scale = features.std(axis=0)
+    scale[scale < 1e-6] = 1.0
+    z = (features - mean) / scale
+    centroids = np.stack([z[labels == i].mean(axis=0) for i in range(len(classes))])
+    # Scale distances so a typical sample sits at distance ~1 from its centroid
+    own = ((z - centroids[labels]) ** 2).sum(axis=1)
+    temperature = float(np.median(own)) or 1.0
+    return ColorClassifier(classes, mean, scale, centroids, temperature)
+
+
+def load_classifier(path: str) -> Optional[ColorClassifier]:
+    """Load a saved classifier, or None if the file is missing or unreadable"""
+    if not path or not os.path.exists(path):
+        return None
+    try:
+        return ColorClassifier.load(path)
+    except Exception:
+        return None
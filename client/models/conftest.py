@@ -0,0 +1,4 @@
+# crop_advisory/test_soilgrids.py is a manual script that calls the live SoilGrids API.
+# Collecting it would also put crop_advisory/ on sys.path, where crop_advisory.py
+# shadows the crop_advisory package the fertilizer modules import.
+collect_ignore = ['crop_advisory/test_soilgrids.py']
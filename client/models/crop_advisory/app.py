@@ -417,11 +417,14 @@ def get_fallback_soil(lat, lon):
 
     # Import our new crop advisory module
 from crop_advisory import load_impact_data, calculate_soil_health_score, calculate_rainfall_impact
+import fertilizer_cost
 
 # ---------------- FIXED recommend_crop_full -----------------
-def recommend_crop_full(soil_data, past_crop=None, weather=None, show_all=False):
+def recommend_crop_full(soil_data, past_crop=None, weather=None, show_all=False, soil_test=None, region=None):
     recommendations = []
     past_counters = []
+    fertilizer = {}
+    fertilizer_error = None
     
     # Load crop impacts data
     try:
@@ -452,6 +455,15 @@ def recommend_crop_full(soil_data, past_crop=None, weather=None, show_all=False)
         print("⚠️ Soil type missing, skipping crop filtering")
         soil_type = ""
 
+    # Fertilizer needs of every candidate crop on this soil, in one matrix operation
+    if soil_test:
+        try:
+            fertilizer = fertilizer_cost.crop_requirements(
+                [c.get('Crop', '') for c in crop_data if isinstance(c, dict)], soil_test, region)
+        except Exception as e:
+            print(f"❌ Fertilizer cost failed: {e}")
+            fertilizer_error = "Fertilizer cost unavailable"
+
     for crop in crop_data:
         if not crop or not isinstance(crop, dict):
             continue
@@ -592,10 +604,22 @@ def recommend_crop_full(soil_data, past_crop=None, weather=None, show_all=False)
                 "irrigation_efficiency": crop_impact_data.get('irrigation_efficiency', 0.75)
             } if crop_impact_data else {}
         })
+        if crop.get('Crop') in fertilizer:
+            recommendations[-1]["fertilizer"] = fertilizer[crop.get('Crop')]
+        elif fertilizer_error:
+            # Tell the client why the cost is missing instead of dropping it silently
+            recommendations[-1]["fertilizer"] = {"error": fertilizer_error}
+
+    if fertilizer:
+        adjusted = fertilizer_cost.cost_adjusted_scores(
+            [r['score'] for r in recommendations],
+            [r.get('fertilizer', {}).get('cost_per_ha') for r in recommendations])
+        for rec, value in zip(recommendations, adjusted):
+            rec["cost_adjusted_score"] = value
 
     # Sort recommendations by score and soil health impact
     recommendations.sort(key=lambda x: (
-        -x['score'],  # Sort by score (descending)
+        -x.get('cost_adjusted_score', x['score']),  # Sort by score (descending), net of fertilizer cost if known
         2 if x['soil_health_impact'] == "Excellent Match" else
         1 if x['soil_health_impact'] == "Good Match" else
         0  # Priority: Excellent > Good > Fair
@@ -677,6 +701,12 @@ def crop_advisory():
         # Extract additional info
         additional_info = data.get('additionalInfo', {})
         past_crop = additional_info.get('previousCrop', 'rice')
+        raw_soil_test = data.get('soil_test') or additional_info.get('soilTest')
+        region = data.get('region') or additional_info.get('region')
+        try:
+            soil_test = fertilizer_cost.parse_soil_test(raw_soil_test) if raw_soil_test else None
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
         
         # Use current date
         date = datetime.now().strftime('%Y-%m-%d')
@@ -737,7 +767,7 @@ def crop_advisory():
         
         # Get recommendations
         try:
-            recommendations = recommend_crop_full(soil_data, past_crop, weather_data, show_all=True)
+            recommendations = recommend_crop_full(soil_data, past_crop, weather_data, show_all=True, soil_test=soil_test, region=region)
             # Ensure recommendations is always a valid list
             if not recommendations or not isinstance(recommendations, list):
                 recommendations = []
@@ -858,6 +888,11 @@ def recommend():
         lon = float(data.get('lon'))
         past_crop = data.get('past_crop')
         date = data.get('date')
+        region = data.get('region')
+        try:
+            soil_test = fertilizer_cost.parse_soil_test(data['soil_test']) if data.get('soil_test') else None
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
 
         print(f"🌍 Processing request for lat={lat}, lon={lon}, past_crop={past_crop}")
 
@@ -893,7 +928,7 @@ def recommend():
 
         # Get recommendations with comprehensive error handling
         try:
-            recommendations = recommend_crop_full(soil_data, past_crop, weather_data, show_all=True)
+            recommendations = recommend_crop_full(soil_data, past_crop, weather_data, show_all=True, soil_test=soil_test, region=region)
             
             # Validate recommendations array
             if not recommendations or not isinstance(recommendations, list):
@@ -986,7 +1021,8 @@ def recommend():
                 "lat": lat,
                 "lon": lon,
                 "past_crop": past_crop,
-                "date": date
+                "date": date,
+                "soil_test": soil_test
             }
         }
         
@@ -0,0 +1,92 @@
+"""
+This module prices fertilizer for every candidate crop in one batch.
+
+Thresholds (with crop aliases and regional overrides) come from the shared
+FertilizerTables. The (crops x nutrients) deficit matrix of a soil test is
+handed to the least-cost mix optimizer, which covers it from the full
+(products x nutrients) composition matrix at table prices - the same mixes
+and costs the fertilizer service returns in optimize mode.
+"""
+
+import math
+import os
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+try:
+    from .fertilizer_optimizer import MIX_NUTRIENTS, get_optimizer
+    from .fertilizer_tables import NUTRIENTS, get_tables
+except ImportError:
+    from fertilizer_optimizer import MIX_NUTRIENTS, get_optimizer
+    from fertilizer_tables import NUTRIENTS, get_tables
+
+# Points taken off the 0-100 crop score for the most expensive crop to fertilize
+COST_WEIGHT = float(os.environ.get('FERTILIZER_COST_WEIGHT', '20'))
+
+_COLUMNS = [NUTRIENTS.index(n) for n in MIX_NUTRIENTS]
+
+
+def parse_soil_test(raw: Any) -> Dict[str, float]:
+    """
+    Validate a soil test ({"N": 210, "P": 12, ...}, same units as the fertilizer service).
+    Nutrients that are absent are treated as adequate.
+    """
+    if not isinstance(raw, dict):
+        raise ValueError("soil_test must be an object")
+    soil = {}
+    for n in MIX_NUTRIENTS:
+        v = raw.get(n)
+        if v is None:
+            continue
+        if isinstance(v, bool) or not isinstance(v, (int, float)) or not math.isfinite(v):
+            raise ValueError(f"soil_test.{n} must be a number")
+        soil[n] = float(v)
+    if not soil:
+        raise ValueError(f"soil_test needs at least one of {', '.join(MIX_NUTRIENTS)}")
+    return soil
+
+
+def crop_requirements(crop_names: Sequence[str], soil: Dict[str, float],
+                      region: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    Fertilizer doses and cost per hectare for each crop the tables know.
+
+    Parameters:
+    - crop_names: candidate crop names (as in crops.json; aliases resolve too)
+    - soil: parsed soil test
+    - region: optional state/region whose threshold overrides apply
+
+    Returns:
+    - Dictionary of crop name -> {"doses", "cost_per_ha", "currency", "unmet"}
+    """
+    tables = get_tables()
+    rows = tables.rows(crop_names, [region] * len(crop_names) if region else None)
+    known = np.flatnonzero(rows != tables.unsupported)
+    if not len(known):
+        return {}
+    thresholds = tables.matrix[rows[known]][:, _COLUMNS]                 # (crops, nutrients)
+    s = np.array([soil.get(n, np.nan) for n in MIX_NUTRIENTS])
+    with np.errstate(invalid='ignore'):
+        deficit = np.where(s < thresholds, thresholds - s, 0.0)
+    optimizer = get_optimizer(tables)
+    doses, unmet = optimizer.solve(deficit)                               # (crops, products)
+    costs = doses @ optimizer.prices
+
+    result = {}
+    for row, i in enumerate(known):
+        result[crop_names[i]] = {
+            'doses': {tables.dose_keys[name]: int(kg)
+                      for name, kg in zip(optimizer.products, doses[row]) if kg > 0},
+            'cost_per_ha': round(float(costs[row]), 2),
+            'currency': tables.currency,
+            'unmet': [n for n, flag in zip(MIX_NUTRIENTS, unmet[row]) if flag],
+        }
+    return result
+
+
+def cost_adjusted_scores(scores: List[float], costs: List[Optional[float]]) -> List[float]:
+    """Subtract up to COST_WEIGHT points in proportion to each crop's share of the highest cost"""
+    highest = max((c for c in costs if c), default=0.0)
+    return [round(max(0.0, s - (COST_WEIGHT * c / highest if highest and c else 0.0)), 1)
+            for s, c in zip(scores, costs)]
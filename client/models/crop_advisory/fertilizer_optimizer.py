@@ -0,0 +1,159 @@
+"""
+Least-cost fertilizer mixes.
+
+For a farm's deficit vector d the cheapest mix of products solves the LP
+
+    min c.x   subject to   A x >= d,  x >= 0
+
+with A the nutrient composition of each product and c its price. Whether a
+basis of this LP is optimal splits into two tests: dual feasibility
+(y = c_B B^-1 has y >= 0 and A^T y <= c) depends only on the price table, and
+primal feasibility (B^-1 d >= 0) depends on the farm. `MixOptimizer`
+enumerates the dual-feasible bases once per price table; solving any number
+of farms is then B^-1 d for each of those bases and picking the cheapest
+non-negative one, a couple of einsums over the whole batch.
+
+Solutions are cached per optimizer keyed by the deficit rounded up to
+QUANTUM, so a cached mix always covers the exact deficit.
+"""
+
+import itertools
+import math
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+try:
+    from .fertilizer_tables import FertilizerTables
+except ImportError:
+    from fertilizer_tables import FertilizerTables
+
+# Nutrients supplied by fertilizer products; Fe, Cu and Mn stay foliar-spray advice
+MIX_NUTRIENTS = ('N', 'P', 'K', 'S', 'Zn', 'B')
+# Cache key resolution per nutrient (same units as the deficits)
+QUANTUM = np.array([0.5, 0.5, 0.5, 0.1, 0.01, 0.01])
+CACHE_SIZE = 50000
+_TOL = 1e-9
+_CHUNK = 512
+
+
+class MixOptimizer:
+    """Least-cost covering LP over a fixed product set and price table"""
+
+    def __init__(self, products: Sequence[str], content: np.ndarray, prices: np.ndarray,
+                 cache_size: int = CACHE_SIZE):
+        self.products = list(products)
+        self.prices = np.asarray(prices, dtype=np.float64)
+        content = np.asarray(content, dtype=np.float64)           # (products, MIX_NUTRIENTS)
+        self.covered = content.sum(axis=0) > 0
+        A = content[:, self.covered].T                            # (m, p)
+        m, p = A.shape
+        # Standard form A x - s = d: surplus columns -I cost nothing
+        cols = np.hstack([A, -np.eye(m)])
+        costs = np.concatenate([self.prices, np.zeros(m)])
+        bases = np.array(list(itertools.combinations(range(p + m), m)), dtype=np.intp)
+        mats = cols[:, bases].transpose(1, 0, 2)
+        invertible = np.abs(np.linalg.det(mats)) > 1e-12
+        bases, mats = bases[invertible], mats[invertible]
+        inv = np.linalg.inv(mats)
+        y = np.einsum('kj,kji->ki', costs[bases], inv)
+        dual_ok = (y >= -_TOL).all(axis=1) & ((y @ A) <= self.prices + _TOL).all(axis=1)
+        self.bases = bases[dual_ok]
+        self.inv = inv[dual_ok]
+        self.basis_cost = costs[self.bases]
+        self._cache: 'OrderedDict[bytes, np.ndarray]' = OrderedDict()
+        self._cache_size = cache_size
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _solve(self, d: np.ndarray) -> np.ndarray:
+        """Exact kg/ha per product for (n, covered nutrients) deficits"""
+        n, p = d.shape[0], len(self.products)
+        doses = np.zeros((n, p + d.shape[1]))
+        for start in range(0, n, _CHUNK):
+            chunk = d[start:start + _CHUNK]
+            x = np.einsum('kij,nj->nki', self.inv, chunk)
+            cost = np.einsum('nki,ki->nk', x, self.basis_cost)
+            cost[(x < -_TOL).any(axis=2)] = np.inf
+            best = cost.argmin(axis=1)
+            rows = np.arange(len(chunk))
+            doses[start + rows[:, None], self.bases[best]] = x[rows, best]
+        return np.clip(doses[:, :p], 0.0, None)
+
+    def solve(self, deficits: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        deficits: (n, len(MIX_NUTRIENTS)) non-negative shortfalls
+        Returns (kg/ha per product rounded up to whole kg, bool mask of
+        deficits no available product can supply).
+        """
+        deficits = np.atleast_2d(np.asarray(deficits, dtype=np.float64))
+        unmet = (deficits > 0) & ~self.covered
+        steps = np.ceil(np.maximum(deficits, 0.0) / QUANTUM - _TOL)[:, self.covered]
+        keys = [row.tobytes() for row in steps.astype(np.int64)]
+        out = np.empty((len(keys), len(self.products)))
+        missing: Dict[bytes, List[int]] = {}
+        with self._lock:
+            for i, key in enumerate(keys):
+                hit = self._cache.get(key)
+                if hit is None:
+                    missing.setdefault(key, []).append(i)
+                else:
+                    self._cache.move_to_end(key)
+                    out[i] = hit
+            self.hits += len(keys) - sum(len(v) for v in missing.values())
+            self.misses += len(missing)
+        if missing:
+            first = [rows[0] for rows in missing.values()]
+            solved = np.ceil(self._solve(steps[first] * QUANTUM[self.covered]) - 1e-6)
+            with self._lock:
+                for (key, rows), doses in zip(missing.items(), solved):
+                    out[rows] = doses
+                    self._cache[key] = doses
+                while len(self._cache) > self._cache_size:
+                    self._cache.popitem(last=False)
+        return out, unmet
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {'bases': len(self.bases), 'cached': len(self._cache), 'hits': self.hits, 'misses': self.misses}
+
+
+_optimizers: 'OrderedDict[Tuple, MixOptimizer]' = OrderedDict()
+_optimizers_lock = threading.Lock()
+
+
+def get_optimizer(tables: FertilizerTables, prices: Optional[Mapping[str, float]] = None,
+                  available: Optional[Sequence[str]] = None) -> MixOptimizer:
+    """Optimizer for the table's priced products, optionally repriced or restricted"""
+    if prices is not None and not isinstance(prices, Mapping):
+        raise ValueError('prices must map product names to prices per kg')
+    if available is not None and not (isinstance(available, (list, tuple)) and all(isinstance(a, str) for a in available)):
+        raise ValueError('products must be a list of product names')
+    merged = dict(tables.prices)
+    for name, price in (prices or {}).items():
+        if name not in tables.products:
+            raise ValueError(f"Unknown fertilizer product '{name}'")
+        if isinstance(price, bool) or not isinstance(price, (int, float)) or not 0 <= price < math.inf:
+            raise ValueError(f"Price of '{name}' must be a non-negative number")
+        merged[name] = float(price)
+    names = sorted(merged if available is None else set(available) & set(merged))
+    unknown = set(available or ()) - set(tables.products)
+    if unknown:
+        raise ValueError(f"Unknown fertilizer product '{sorted(unknown)[0]}'")
+    key = (tables.digest, tuple((n, merged[n]) for n in names))
+    with _optimizers_lock:
+        optimizer = _optimizers.get(key)
+        if optimizer is not None:
+            _optimizers.move_to_end(key)
+            return optimizer
+    content = np.array([[tables.products[n].get(k, 0.0) for k in MIX_NUTRIENTS] for n in names],
+                       dtype=np.float64).reshape(-1, len(MIX_NUTRIENTS))
+    optimizer = MixOptimizer(names, content, np.array([merged[n] for n in names]))
+    with _optimizers_lock:
+        _optimizers[key] = optimizer
+        while len(_optimizers) > 8:
+            _optimizers.popitem(last=False)
+    return optimizer
@@ -0,0 +1,171 @@
+"""
+Data-driven fertilizer thresholds and product compositions.
+
+`fertilizer_tables.json` is parsed once into an immutable `FertilizerTables`:
+a (rows, nutrients) threshold matrix, one row per crop plus one per regional
+override, and a dict index from (region, crop name or alias) to row.
+`get_tables()` checks the file's mtime at most every RELOAD_SECONDS and
+swaps in a freshly built table when it changes, so new crops and revised
+thresholds go live without a redeploy. A file that fails to load leaves the
+previous table in service.
+
+Module and data file live with the crop advisory service so it deploys on its
+own; the fertilizer service in client/models imports them from here.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from types import MappingProxyType
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+NUTRIENTS = ('N', 'P', 'K', 'S', 'Zn', 'Fe', 'Cu', 'Mn', 'B')
+
+TABLES_PATH = os.environ.get(
+    'FERTILIZER_TABLES', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fertilizer_tables.json'))
+RELOAD_SECONDS = float(os.environ.get('FERTILIZER_TABLES_RELOAD_SECONDS', '5'))
+
+
+def _key(name: Optional[str]) -> str:
+    return ' '.join(str(name or '').lower().split())
+
+
+def _names(crop: str, aliases: Sequence[str]) -> List[str]:
+    """Lookup keys for a crop: full name, its parts ('Jowar (Sorghum)' -> jowar, sorghum) and aliases"""
+    names = [_key(crop)]
+    match = re.match(r'^(.*?)\s*\((.*)\)\s*$', crop)
+    if match:
+        names += [_key(match.group(1)), _key(match.group(2))]
+    return names + [_key(a) for a in aliases]
+
+
+class FertilizerTables:
+    """Immutable, indexed view of one version of the tables file"""
+
+    def __init__(self, data: Mapping[str, Any]):
+        self.version = str(data.get('version', ''))
+        # Identifies the exact content, e.g. for cache keys that must change on any edit
+        self.digest = hashlib.sha1(json.dumps(data, sort_keys=True).encode()).hexdigest()[:16]
+        self.products = MappingProxyType({
+            name: MappingProxyType({k: float(v) for k, v in p['content'].items()})
+            for name, p in data['products'].items()})
+        self.dose_keys = MappingProxyType({name: p['dose_key'] for name, p in data['products'].items()})
+        self.labels = MappingProxyType({name: p.get('label', name) for name, p in data['products'].items()})
+        # Products without a price are never chosen by the least-cost optimizer
+        self.prices = MappingProxyType({name: float(p['price_per_kg']) for name, p in data['products'].items()
+                                        if p.get('price_per_kg') is not None})
+        self.currency = data.get('currency', '')
+        limits = data.get('soil_limits', {})
+        self.oc_min = float(limits.get('OC_min', 0.5))
+        self.compost_tons = limits.get('compost_tons_per_ha', 5)
+        self.ph_max = float(limits.get('pH_max', 8.5))
+        self.ec_max = float(limits.get('EC_max', 4.0))
+
+        self.crops: List[str] = list(data['crops'])
+        rows: List[List[float]] = []
+        self._index: Dict[Tuple[str, str], int] = {}
+        for crop, entry in data['crops'].items():
+            row = len(rows)
+            rows.append([float(entry['thresholds'][n]) for n in NUTRIENTS])
+            for name in _names(crop, entry.get('aliases', ())):
+                self._index.setdefault(('', name), row)
+        for region, overrides in (data.get('regions') or {}).items():
+            for crop, values in overrides.items():
+                base = self._index.get(('', _key(crop)))
+                if base is None:
+                    raise ValueError(f"Region '{region}' overrides unknown crop '{crop}'")
+                row = len(rows)
+                rows.append([float(values.get(n, rows[base][i])) for i, n in enumerate(NUTRIENTS)])
+                for name, base_row in list(self._index.items()):
+                    if base_row == base and name[0] == '':
+                        self._index[(_key(region), name[1])] = row
+        self.regions: List[str] = list(data.get('regions') or {})
+        # Last row is all-NaN: every comparison against it is False ("unsupported")
+        rows.append([np.nan] * len(NUTRIENTS))
+        self.matrix = np.array(rows, dtype=np.float64)
+        self.matrix.setflags(write=False)
+        self.unsupported = len(rows) - 1
+        self._dicts = tuple(MappingProxyType(dict(zip(NUTRIENTS, r))) for r in rows[:-1])
+
+    def row(self, crop: Optional[str], region: Optional[str] = None) -> int:
+        name = _key(crop)
+        if region:
+            row = self._index.get((_key(region), name))
+            if row is not None:
+                return row
+        return self._index.get(('', name), self.unsupported)
+
+    def thresholds(self, crop: Optional[str], region: Optional[str] = None) -> Optional[Mapping[str, float]]:
+        """Read-only nutrient -> threshold mapping, or None if the crop is unknown"""
+        row = self.row(crop, region)
+        return None if row == self.unsupported else self._dicts[row]
+
+    def rows(self, crops: Sequence[str], regions: Optional[Sequence[Optional[str]]] = None) -> np.ndarray:
+        """Vectorized row lookup; each distinct (region, crop) pair is resolved once"""
+        keys = np.asarray(crops, dtype=str)
+        if regions is not None:
+            regions = np.asarray(regions, dtype=object)
+            regions = np.where(regions == None, '', regions).astype(str)  # noqa: E711
+            keys = np.char.add(np.char.add(regions, '\t'), keys)
+        unique, inverse = np.unique(keys, return_inverse=True)
+        lookup = np.array([self.row(*str(u).split('\t', 1)[::-1]) for u in unique], dtype=np.intp)
+        return lookup[inverse.reshape(-1)]
+
+
+def load_tables(path: str = TABLES_PATH) -> FertilizerTables:
+    with open(path, encoding='utf-8') as f:
+        return FertilizerTables(json.load(f))
+
+
+class TableStore:
+    """Holds the current tables and reloads them when the file changes"""
+
+    def __init__(self, path: str = TABLES_PATH, interval: float = RELOAD_SECONDS):
+        self.path = path
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._mtime = os.stat(path).st_mtime
+        self._tables = load_tables(path)
+        self._checked = time.monotonic()
+
+    def get(self) -> FertilizerTables:
+        if time.monotonic() - self._checked >= self.interval:
+            self._maybe_reload()
+        return self._tables
+
+    def _maybe_reload(self) -> None:
+        if not self._lock.acquire(blocking=False):
+            return  # another thread is already checking
+        try:
+            self._checked = time.monotonic()
+            mtime = os.stat(self.path).st_mtime
+            if mtime == self._mtime:
+                return
+            # Recorded before parsing so a broken file is reported once, not every interval
+            self._mtime = mtime
+            tables = load_tables(self.path)
+            logging.info(f"Reloaded fertilizer tables {self._tables.version} -> {tables.version}")
+            self._tables = tables
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logging.error(f"Keeping fertilizer tables {self._tables.version}; reload failed: {e}")
+        finally:
+            self._lock.release()
+
+
+_store: Optional[TableStore] = None
+_store_lock = threading.Lock()
+
+
+def get_tables() -> FertilizerTables:
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = TableStore()
+    return _store.get()
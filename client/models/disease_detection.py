@@ -1,10 +1,18 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, stream_with_context
 from flask_cors import CORS
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
+import multiprocessing
+import json
 import logging
 import os
-from typing import Dict, List, Tuple, Any
+import threading
+import time
+from typing import Dict, List, Tuple, Any, Optional
 import base64
 import io
+import zlib
 
 # Try to import ML libraries, fallback to basic image processing if not available
 try:
@@ -23,42 +31,14 @@ except ImportError as e:
     except ImportError:
         PIL_AVAILABLE = False
 
-# Disease classes - common plant diseases
-DISEASE_CLASSES = [
-    'Healthy',
-    'Apple___Apple_scab',
-    'Apple___Black_rot',
-    'Apple___Cedar_apple_rust',
-    'Cherry___Powdery_mildew',
-    'Cherry___healthy',
-    'Corn___Cercospora_leaf_spot',
-    'Corn___Common_rust',
-    'Corn___Northern_Leaf_Blight',
-    'Corn___healthy',
-    'Grape___Black_rot',
-    'Grape___Esca_(Black_Measles)',
-    'Grape___Leaf_blight_(Isariopsis_Leaf_Spot)',
-    'Grape___healthy',
-    'Orange___Haunglongbing_(Citrus_greening)',
-    'Peach___Bacterial_spot',
-    'Pepper___Bacterial_spot',
-    'Pepper___healthy',
-    'Potato___Early_blight',
-    'Potato___Late_blight',
-    'Potato___healthy',
-    'Strawberry___Leaf_scorch',
-    'Strawberry___healthy',
-    'Tomato___Bacterial_spot',
-    'Tomato___Early_blight',
-    'Tomato___Late_blight',
-    'Tomato___Leaf_Mold',
-    'Tomato___Septoria_leaf_spot',
-    'Tomato___Spider_mites_Two-spotted_spider_mite',
-    'Tomato___Target_Spot',
-    'Tomato___Tomato_Yellow_Leaf_Curl_Virus',
-    'Tomato___Tomato_mosaic_virus',
-    'Tomato___healthy'
-]
+try:
+    from . import (cascade, color_features, image_decode, image_quality, job_queue,  # imported as models.disease_detection
+                   model_registry, outbreaks, severity)
+    from .disease_classes import DISEASE_CLASSES
+except ImportError:
+    import cascade, color_features, image_decode, image_quality, job_queue  # run from client/models
+    import model_registry, outbreaks, severity
+    from disease_classes import DISEASE_CLASSES
 
 # Treatment recommendations for each disease
 TREATMENTS = {
@@ -225,6 +205,186 @@ def create_disease_model():
     
     return model
 
+# Model location and startup behaviour
+MODEL_PATH = os.environ.get('DISEASE_MODEL_PATH', 'disease_model.h5')
+WARMUP_RUNS = int(os.environ.get('DISEASE_WARMUP_RUNS', '2'))
+# NumPy nearest-centroid fallback written by train_color_classifier.py
+COLOR_MODEL_PATH = os.environ.get(
+    'DISEASE_COLOR_MODEL', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'color_model.npz'))
+
+# 'mock' keeps the colour heuristic; 'model' runs the CNN forward pass;
+# 'cascade' runs the plant-type router and then that crop's disease head
+INFERENCE_MODE = os.environ.get('DISEASE_INFERENCE', 'mock')
+CASCADE_DIR = os.environ.get('DISEASE_CASCADE_DIR', 'cascade_models')
+CASCADE_CACHE_SIZE = int(os.environ.get('DISEASE_CASCADE_CACHE', '4'))
+# Versioned models (see model_registry.py); the ACTIVE version wins over MODEL_PATH
+MODEL_REGISTRY_DIR = os.environ.get('DISEASE_MODEL_REGISTRY', 'model_registry')
+REGISTRY_POLL_SECONDS = float(os.environ.get('DISEASE_REGISTRY_POLL', '5'))
+SHADOW_VERSION = os.environ.get('DISEASE_SHADOW_VERSION')
+SHADOW_RATE = float(os.environ.get('DISEASE_SHADOW_RATE', '0.05'))
+ADMIN_KEY = os.environ.get('DISEASE_ADMIN_KEY')
+# Batch uploads are decoded in a process pool; 0 decodes in the request thread
+DECODE_WORKERS = int(os.environ.get('DISEASE_DECODE_WORKERS', str(min(4, os.cpu_count() or 1))))
+MAX_BATCH_IMAGES = int(os.environ.get('DISEASE_MAX_BATCH', '64'))
+# Uncompressed size caps for zip uploads, checked before members are inflated
+MAX_IMAGE_BYTES = int(os.environ.get('DISEASE_MAX_IMAGE_BYTES', str(10 * 1024 * 1024)))
+MAX_BATCH_BYTES = int(os.environ.get('DISEASE_MAX_BATCH_BYTES', str(128 * 1024 * 1024)))
+# Reject blurry, badly exposed and non-leaf uploads before inference
+QUALITY_GATE = os.environ.get('DISEASE_QUALITY_GATE', '1') != '0'
+# Async /detect/jobs mode: SQLite job store, worker threads and queue bound
+JOB_DB_PATH = os.environ.get('DISEASE_JOB_DB', 'disease_jobs.db')
+JOB_WORKERS = int(os.environ.get('DISEASE_JOB_WORKERS', '2'))
+JOB_QUEUE_SIZE = int(os.environ.get('DISEASE_JOB_QUEUE', '32'))
+JOB_TTL_SECONDS = float(os.environ.get('DISEASE_JOB_TTL', '3600'))
+# Detections that carry lat/lon are kept (as a coarse geohash) for /outbreaks
+RECORD_DETECTIONS = os.environ.get('DISEASE_RECORD_DETECTIONS', '1') != '0'
+OUTBREAK_DB_PATH = os.environ.get('DISEASE_OUTBREAK_DB', 'disease_outbreaks.db')
+GEOHASH_PRECISION = int(os.environ.get('DISEASE_GEOHASH_PRECISION', '5'))
+
+disease_model = None
+active_model = None
+shadow_model = None
+color_classifier = None
+cascade_model = None
+registry = model_registry.ModelRegistry(MODEL_REGISTRY_DIR)
+shadow_runner = model_registry.ShadowRunner(SHADOW_RATE)
+model_state: Dict[str, Any] = {
+    'loaded': False,
+    'ready': False,
+    'source': None,
+    'warmup_ms': None,
+}
+_model_lock = threading.Lock()
+
+
+def load_disease_model() -> Tuple[Any, Optional[str]]:
+    """Load the disease model from the .h5 file, or build an untrained network"""
+    if not ML_AVAILABLE:
+        return None, None
+    try:
+        return keras.models.load_model(MODEL_PATH), MODEL_PATH
+    except Exception:
+        # Create new model (would need training in production)
+        return create_disease_model(), 'untrained'
+
+
+def warmup_model(model, runs: int = WARMUP_RUNS) -> float:
+    """Run dummy forward passes so graph tracing happens before the first request.
+    Returns the elapsed time in milliseconds."""
+    if model is None or runs <= 0:
+        return 0.0
+    start = time.perf_counter()
+    dummy = np.zeros((1, 224, 224, 3), dtype=np.float32)
+    for _ in range(runs):
+        model(dummy, training=False)
+    return (time.perf_counter() - start) * 1000.0
+
+
+def ensure_model() -> Any:
+    """Load and warm up the model exactly once per process.
+
+    Under gunicorn (see gunicorn_disease.conf.py) this runs in each worker as it
+    imports the app; the master never initialises TensorFlow, which cannot be
+    used safely across fork().
+    """
+    global disease_model, active_model, shadow_model, color_classifier, cascade_model
+    with _model_lock:
+        if model_state['loaded']:
+            return disease_model
+        if INFERENCE_MODE == 'cascade' and ML_AVAILABLE:
+            # The router stays resident; per-crop heads load on first use and
+            # the monolithic model is never loaded
+            cascade_model = cascade.CascadeClassifier(DISEASE_CLASSES, CASCADE_DIR, CASCADE_CACHE_SIZE)
+            source = f'cascade:{CASCADE_DIR}'
+            model_state['warmup_ms'] = round(warmup_model(cascade_model.router), 1)
+        else:
+            version = registry.active_version() if ML_AVAILABLE else None
+            if version:
+                try:
+                    active_model = registry.load(version)
+                except Exception as e:
+                    logging.error(f"Failed to load registry model {version}: {e}")
+            if active_model is not None:
+                disease_model, source = active_model.model, f'registry:{active_model.version}'
+            else:
+                disease_model, source = load_disease_model()
+                if disease_model is not None:
+                    active_model = model_registry.LoadedModel(source, disease_model, list(DISEASE_CLASSES))
+        if SHADOW_VERSION and ML_AVAILABLE and cascade_model is None:
+            try:
+                shadow_model = registry.load(SHADOW_VERSION)
+                warmup_loaded(shadow_model)
+                logging.info(f"Shadowing model {SHADOW_VERSION} on {SHADOW_RATE:.0%} of traffic")
+            except Exception as e:
+                logging.error(f"Failed to load shadow model {SHADOW_VERSION}: {e}")
+        color_classifier = color_features.load_classifier(COLOR_MODEL_PATH)
+        if color_classifier is not None:
+            logging.info(f"Loaded colour fallback classifier from {COLOR_MODEL_PATH}")
+        model_state['loaded'] = True
+        model_state['source'] = source
+        if active_model is not None:
+            logging.info(f"Loaded disease detection model from {source}")
+            # prepare() adapts the dummy batch to registry versions with other input sizes
+            start = time.perf_counter()
+            warmup_loaded(active_model)
+            model_state['warmup_ms'] = round((time.perf_counter() - start) * 1000.0, 1)
+            logging.info(f"Disease model warmed up in {model_state['warmup_ms']} ms")
+        model_state['ready'] = True
+        return disease_model
+
+
+_decode_pool = None
+_decode_pool_lock = threading.Lock()
+
+
+def get_decode_pool() -> Optional[ProcessPoolExecutor]:
+    """Lazily start the image decode pool (None when disabled or unavailable)"""
+    global _decode_pool
+    if DECODE_WORKERS <= 0:
+        return None
+    with _decode_pool_lock:
+        if _decode_pool is None:
+            try:
+                # forkserver/spawn children start clean instead of inheriting
+                # TensorFlow state from a forked worker
+                methods = multiprocessing.get_all_start_methods()
+                ctx = multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+                if ctx.get_start_method() == 'forkserver':
+                    ctx.set_forkserver_preload([image_decode.__name__])
+                _decode_pool = ProcessPoolExecutor(max_workers=DECODE_WORKERS, mp_context=ctx)
+            except Exception as e:
+                logging.warning(f"Decode pool unavailable, decoding inline: {e}")
+                return None
+        return _decode_pool
+
+
+def reset_decode_pool() -> None:
+    """Drop a broken decode pool so the next batch starts a fresh one"""
+    global _decode_pool
+    with _decode_pool_lock:
+        pool, _decode_pool = _decode_pool, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def swap_active_model(loaded: 'model_registry.LoadedModel') -> None:
+    """Replace the serving model; requests already running keep their reference"""
+    global disease_model, active_model
+    active_model = loaded
+    disease_model = loaded.model
+    model_state['source'] = f'registry:{loaded.version}'
+
+
+def warmup_loaded(loaded: 'model_registry.LoadedModel') -> None:
+    # Goes through prepare() so models with other input sizes warm up correctly
+    for _ in range(max(1, WARMUP_RUNS)):
+        loaded.predict(np.zeros((1, 224, 224, 3), dtype=np.uint8))
+
+
+registry_watcher = model_registry.RegistryWatcher(
+    registry, swap_active_model, warmup_loaded, interval=REGISTRY_POLL_SECONDS)
+
+
 def create_app() -> Flask:
     app = Flask(__name__)
     
@@ -238,24 +398,59 @@ def create_app() -> Flask:
     # Set up logging
     logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
     
-    # Load or create model
-    global disease_model
-    try:
-        # Try to load pre-trained model if available
-        disease_model = keras.models.load_model('disease_model.h5')
-        logging.info("Loaded existing disease detection model")
-    except:
-        # Create new model (would need training in production)
-        disease_model = create_disease_model()
-        logging.info("Created new disease detection model (untrained)")
+    # Load or create model. By default this blocks the import, so a gunicorn
+    # worker only starts accepting once it is done; with DISEASE_WARMUP=background
+    # it serves immediately and /api/health stays 503 until warmup finishes
+    if os.environ.get('DISEASE_WARMUP', 'sync') == 'background':
+        threading.Thread(target=ensure_model, name='model_warmup', daemon=True).start()
+    else:
+        ensure_model()
     
     @app.route("/")
     def home():
         return "Plant Disease Detection API is running!", 200
     
+    
+    @app.route("/api/models", methods=["GET"])
+    def list_models():
+        return jsonify({
+            "versions": registry.versions(),
+            "active": registry.active_version(),
+            "serving": active_model.version if active_model is not None else None,
+            "shadow": {
+                "version": shadow_model.version if shadow_model is not None else None,
+                "rate": shadow_runner.rate,
+                **shadow_runner.snapshot(),
+            },
+        })
+    
+    @app.route("/api/models/activate", methods=["POST"])
+    def activate_model():
+        if not ADMIN_KEY or request.headers.get('X-Admin-Key') != ADMIN_KEY:
+            return jsonify({"error": "unauthorized"}), 401
+        version = (request.get_json(silent=True) or {}).get('version')
+        try:
+            # Loads and warms the version in this worker before ACTIVE changes;
+            # the others pick it up on their next poll
+            registry_watcher.activate(version)
+        except ValueError as ve:
+            return jsonify({"error": str(ve)}), 400
+        except Exception as e:
+            logging.error(f"Failed to activate model {version}: {e}")
+            return jsonify({"error": f"Model version '{version}' failed to load", "active": registry.active_version()}), 500
+        return jsonify({"ok": True, "active": version, "serving": active_model.version if active_model is not None else None})
+    
     @app.route("/api/health")
     def health():
-        return jsonify({"ok": True, "model_loaded": disease_model is not None}), 200
+        # Only report ready once warmup finished so load balancers hold traffic back
+        ready = model_state['ready']
+        return jsonify({
+            "ok": ready,
+            "ready": ready,
+            "model_loaded": disease_model is not None or cascade_model is not None,
+            "model_source": model_state['source'],
+            "warmup_ms": model_state['warmup_ms'],
+        }), 200 if ready else 503
     
     @app.errorhandler(Exception)
     def handle_exception(e):
@@ -272,18 +467,8 @@ def create_app() -> Flask:
             # Decode base64
             image_bytes = base64.b64decode(image_data)
             
-            # Open with PIL
-            image = Image.open(io.BytesIO(image_bytes))
-            
-            # Convert to RGB if needed
-            if image.mode != 'RGB':
-                image = image.convert('RGB')
-            
-            # Resize to model input size
-            image = image.resize((224, 224))
-            
-            # Convert to numpy array
-            image_array = np.array(image)
+            # Decode, convert to RGB and resize to model input size
+            image_array = image_decode.decode_image_bytes(image_bytes)
             
             # Add batch dimension
             image_array = np.expand_dims(image_array, axis=0)
@@ -294,9 +479,15 @@ def create_app() -> Flask:
             raise ValueError(f"Failed to preprocess image: {str(e)}")
     
     def get_mock_prediction(image_array: np.ndarray) -> Tuple[str, float, List[str]]:
-        """Generate mock prediction for demonstration"""
+        """Fallback prediction: the trained colour classifier if present, else a colour heuristic"""
+        if color_classifier is not None:
+            disease_name, confidence = color_classifier.predict(image_array[:1])[0]
+            return disease_name, confidence, get_treatments(disease_name)
+        
         # Simple heuristic based on color analysis (similar to original)
         image = image_array[0]  # Remove batch dimension
+        # Seed from the pixels so the same image always gets the same answer
+        rng = np.random.default_rng(zlib.crc32(np.ascontiguousarray(image).tobytes()))
         
         # Calculate color statistics
         mean_colors = np.mean(image, axis=(0, 1))
@@ -305,26 +496,117 @@ def create_app() -> Flask:
         # Simple disease detection heuristic
         if g < 100 and (r > g * 1.2 or b > g * 1.2):
             # Brownish/yellowish colors might indicate disease
-            disease_idx = np.random.choice([1, 7, 18, 19, 24, 25])  # Some disease classes
-            confidence = 0.7 + np.random.random() * 0.2
+            disease_idx = rng.choice([1, 7, 18, 19, 24, 25])  # Some disease classes
+            confidence = 0.7 + rng.random() * 0.2
         elif g > 120 and r < g * 0.8 and b < g * 0.8:
             # Very green - likely healthy
             healthy_idx = [0, 5, 9, 13, 17, 20, 22, 32]  # Healthy classes
-            disease_idx = np.random.choice(healthy_idx)
-            confidence = 0.8 + np.random.random() * 0.15
+            disease_idx = rng.choice(healthy_idx)
+            confidence = 0.8 + rng.random() * 0.15
         else:
             # Mixed colors - random disease
-            disease_idx = np.random.randint(0, len(DISEASE_CLASSES))
-            confidence = 0.6 + np.random.random() * 0.25
+            disease_idx = rng.integers(0, len(DISEASE_CLASSES))
+            confidence = 0.6 + rng.random() * 0.25
         
         disease_name = DISEASE_CLASSES[disease_idx]
-        treatments = TREATMENTS.get(disease_name, [
+        return disease_name, confidence, get_treatments(disease_name)
+    
+    def get_treatments(disease_name: str) -> List[str]:
+        return TREATMENTS.get(disease_name, [
             'Monitor plant closely',
             'Consult local agricultural extension',
             'Maintain proper plant care'
         ])
+    
+    def predict_batch(batch: np.ndarray, crop_hint: Optional[str] = None) -> List[Tuple[str, float, List[str]]]:
+        """Classify a (N, 224, 224, 3) batch with a single forward pass per model"""
+        if INFERENCE_MODE == 'cascade' and cascade_model is not None:
+            return [(name, conf, get_treatments(name)) for name, conf in cascade_model.predict(batch, crop_hint)]
+        if INFERENCE_MODE == 'model' and active_model is not None:
+            current = active_model  # one reference per call, so a hot swap mid-request is harmless
+            start = time.perf_counter()
+            probs = current.predict(batch)
+            primary_ms = (time.perf_counter() - start) * 1000
+            labels = [current.classes[i] for i in probs.argmax(axis=1)]
+            if shadow_model is not None:
+                shadow_runner.maybe_run(shadow_model, batch, labels, primary_ms)
+            return [
+                (label, float(probs[row].max()), get_treatments(label))
+                for row, label in enumerate(labels)
+            ]
+        if color_classifier is not None:
+            return [(name, conf, get_treatments(name)) for name, conf in color_classifier.predict(batch)]
+        return [get_mock_prediction(batch[i:i + 1]) for i in range(len(batch))]
+    
+    def format_result(disease_name: str, confidence: float, treatments: List[str],
+                      lesions: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        result = {
+            "disease": disease_name,
+            "confidence": float(confidence),
+            "treatments": treatments,
+            "plant_type": disease_name.split('___')[0] if '___' in disease_name else 'Unknown',
+            "severity": "High" if confidence > 0.8 else "Medium" if confidence > 0.6 else "Low"
+        }
+        if lesions is not None:
+            # Measured lesion area replaces the confidence-based guess
+            result["severity"] = lesions["severity"]
+            result["lesion_area"] = lesions["lesion_fraction"]
+            result["leaf_coverage"] = lesions["leaf_coverage"]
+        return result
+    
+    outbreak_store = outbreaks.OutbreakStore(OUTBREAK_DB_PATH, GEOHASH_PRECISION) if RECORD_DETECTIONS else None
+    
+    def parse_location(source) -> Optional[Tuple[float, float]]:
+        try:
+            lat, lon = float(source.get('lat')), float(source.get('lon'))
+        except (TypeError, ValueError):
+            return None
+        if -90 <= lat <= 90 and -180 <= lon <= 180:
+            return lat, lon
+        return None
+    
+    def record_detection(location: Optional[Tuple[float, float]], disease_name: str, confidence: float) -> None:
+        if outbreak_store is None or location is None:
+            return
+        try:
+            outbreak_store.record(location[0], location[1], disease_name, confidence)
+        except Exception as e:
+            # Never fail a detection because the outbreak store is unavailable
+            logging.warning(f"Failed to record detection: {e}")
+    
+    def run_detection(data: Dict[str, Any]) -> Dict[str, Any]:
+        """Full single-image pipeline shared by /detect and the job workers"""
+        # Preprocess image
+        image_array = preprocess_image(data['image'])
+        
+        if QUALITY_GATE:
+            report = image_quality.assess(image_array)[0]
+            if not report['ok']:
+                raise image_quality.ImageQualityError(report)
         
-        return disease_name, confidence, treatments
+        # Mock heuristic unless DISEASE_INFERENCE selects a model
+        disease_name, confidence, treatments = predict_batch(image_array, data.get('crop'))[0]
+        
+        lesions = severity.estimate(image_array)[0]
+        logging.info(f"Disease detection: {disease_name} ({confidence:.2f}), lesion area {lesions['lesion_fraction']:.1%}")
+        record_detection(parse_location(data), disease_name, confidence)
+        return format_result(disease_name, confidence, treatments, lesions)
+    
+    jobs = job_queue.JobQueue(
+        job_queue.JobStore(JOB_DB_PATH),
+        lambda payload: run_detection(json.loads(payload)),
+        workers=JOB_WORKERS,
+        capacity=JOB_QUEUE_SIZE,
+        ttl=JOB_TTL_SECONDS,
+    )
+    
+    @app.before_request
+    def start_worker_threads():
+        # Threads do not survive fork, so each worker starts its own watcher and
+        # job threads; jobs persisted before a restart are requeued here
+        if ML_AVAILABLE and cascade_model is None and os.path.isdir(MODEL_REGISTRY_DIR):
+            registry_watcher.start(active_model.version if active_model is not None else None)
+        jobs.start()
     
     @app.route("/detect", methods=["POST"])
     def detect_disease():
@@ -334,25 +616,11 @@ def create_app() -> Flask:
             if not data or 'image' not in data:
                 return jsonify({"error": "No image data provided"}), 400
             
-            # Preprocess image
-            image_array = preprocess_image(data['image'])
-            
-            # For demo purposes, use mock prediction
-            # In production, you would use: predictions = disease_model.predict(image_array)
-            disease_name, confidence, treatments = get_mock_prediction(image_array)
-            
-            # Format response
-            response = {
-                "disease": disease_name,
-                "confidence": float(confidence),
-                "treatments": treatments,
-                "plant_type": disease_name.split('___')[0] if '___' in disease_name else 'Unknown',
-                "severity": "High" if confidence > 0.8 else "Medium" if confidence > 0.6 else "Low"
-            }
-            
-            logging.info(f"Disease detection: {disease_name} ({confidence:.2f})")
-            return jsonify(response)
+            return jsonify(run_detection(data))
             
+        except image_quality.ImageQualityError as qe:
+            logging.info(f"Rejected by quality gate: {[r['code'] for r in qe.report['reasons']]}")
+            return jsonify({"error": str(qe), "reasons": qe.report['reasons'], "quality": qe.report['metrics']}), 422
         except ValueError as ve:
             logging.warning(f"Validation error: {ve}")
             return jsonify({"error": str(ve)}), 400
@@ -360,6 +628,167 @@ def create_app() -> Flask:
             logging.error(f"Error in detect_disease: {e}")
             return jsonify({"error": "Prediction failed"}), 500
 
+    def collect_batch_uploads() -> List[Tuple[str, bytes]]:
+        """Gather (name, bytes) pairs from multipart `images` fields and/or a zip archive"""
+        items = [(f.filename or f'image_{i}', f.read()) for i, f in enumerate(request.files.getlist('images'))]
+        archive = request.files.get('archive')
+        if archive is not None:
+            items.extend(image_decode.read_zip_images(
+                archive.read(), MAX_BATCH_IMAGES + 1, MAX_IMAGE_BYTES, MAX_BATCH_BYTES))
+        elif request.mimetype in ('application/zip', 'application/x-zip-compressed'):
+            items.extend(image_decode.read_zip_images(
+                request.get_data(), MAX_BATCH_IMAGES + 1, MAX_IMAGE_BYTES, MAX_BATCH_BYTES))
+        return items
+    
+    def decode_batch(shm_name: str, items: List[Tuple[str, bytes]]):
+        """Yield (index, error) as each image lands in the shared buffer"""
+        pool = get_decode_pool()
+        if pool is None:
+            for index, (_, data) in enumerate(items):
+                yield image_decode.decode_into_shm(shm_name, index, data)
+            return
+        futures = {pool.submit(image_decode.decode_into_shm, shm_name, index, data): index
+                   for index, (_, data) in enumerate(items)}
+        for future in as_completed(futures):
+            try:
+                yield future.result()
+            except BrokenProcessPool as e:
+                reset_decode_pool()
+                yield futures[future], str(e)
+            except Exception as e:
+                yield futures[future], str(e)
+    
+    @app.route("/detect/batch", methods=["POST"])
+    def detect_batch():
+        """Detect diseases for many images; streams one NDJSON line per image"""
+        try:
+            items = collect_batch_uploads()
+        except image_decode.UploadTooLarge as e:
+            return jsonify({"error": str(e)}), 413
+        except Exception as e:
+            return jsonify({"error": f"Invalid upload: {e}"}), 400
+        if not items:
+            return jsonify({"error": "No images provided"}), 400
+        if len(items) > MAX_BATCH_IMAGES:
+            return jsonify({"error": f"Too many images (max {MAX_BATCH_IMAGES})"}), 413
+        
+        crop_hint = request.form.get('crop') or request.args.get('crop')
+        location = parse_location(request.form) or parse_location(request.args)
+        count = len(items)
+        width, height = image_decode.INPUT_SIZE
+        shm = shared_memory.SharedMemory(create=True, size=count * height * width * 3)
+        
+        def line(obj: Dict[str, Any]) -> str:
+            return json.dumps(obj) + "\n"
+        
+        def generate():
+            decoded = []
+            for index, error in decode_batch(shm.name, items):
+                if error:
+                    yield line({"index": index, "name": items[index][0], "error": f"Failed to preprocess image: {error}"})
+                else:
+                    decoded.append(index)
+            if decoded:
+                decoded.sort()
+                view = np.ndarray((count, height, width, 3), dtype=np.uint8, buffer=shm.buf)
+                batch = view[decoded]  # fancy indexing copies out of shared memory
+                del view
+                if QUALITY_GATE:
+                    reports = image_quality.assess(batch)
+                    for index, report in zip(decoded, reports):
+                        if not report['ok']:
+                            yield line({"index": index, "name": items[index][0], "error": "Image failed quality checks",
+                                        "reasons": report['reasons'], "quality": report['metrics']})
+                    keep = [i for i, report in enumerate(reports) if report['ok']]
+                    decoded = [decoded[i] for i in keep]
+                    batch = batch[keep]
+            if decoded:
+                predictions = predict_batch(batch, crop_hint)
+                for index, prediction, lesions in zip(decoded, predictions, severity.estimate(batch)):
+                    record_detection(location, prediction[0], prediction[1])
+                    yield line({"index": index, "name": items[index][0], **format_result(*prediction, lesions)})
+            logging.info(f"Batch detection: {len(decoded)}/{count} images classified")
+            yield line({"done": True, "count": count, "failed": count - len(decoded)})
+        
+        def release():
+            shm.close()
+            shm.unlink()
+        
+        response = Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+        # Runs when the server closes the response, even if the client went away early
+        response.call_on_close(release)
+        return response
+    
+    @app.route("/detect/jobs", methods=["POST"])
+    def submit_detection_job():
+        """Queue a detection and return its job id immediately"""
+        data = request.get_json(silent=True)
+        if not data or 'image' not in data:
+            return jsonify({"error": "No image data provided"}), 400
+        try:
+            job_id = jobs.submit(json.dumps(data))
+        except job_queue.QueueFull as full:
+            response = jsonify({"error": "Detection queue is full, retry later", "retry_after": full.retry_after})
+            response.headers['Retry-After'] = str(full.retry_after)
+            return response, 503
+        response = jsonify({
+            "job_id": job_id,
+            "status": "queued",
+            "status_url": f"/detect/jobs/{job_id}",
+            "events_url": f"/detect/jobs/{job_id}/events",
+        })
+        response.headers['Location'] = f"/detect/jobs/{job_id}"
+        return response, 202
+    
+    @app.route("/detect/jobs/<job_id>", methods=["GET"])
+    def get_detection_job(job_id: str):
+        job = jobs.store.get(job_id)
+        if job is None:
+            return jsonify({"error": "Job not found"}), 404
+        return jsonify(job)
+    
+    @app.route("/detect/jobs/<job_id>/events", methods=["GET"])
+    def detection_job_events(job_id: str):
+        """Server-sent events: one `status` event per change, ending with done/failed"""
+        if jobs.store.get(job_id) is None:
+            return jsonify({"error": "Job not found"}), 404
+        
+        def stream():
+            last = None
+            deadline = time.monotonic() + JOB_TTL_SECONDS
+            while time.monotonic() < deadline:
+                job = jobs.store.get(job_id)
+                if job is None:
+                    break
+                if job['status'] != last:
+                    last = job['status']
+                    yield f"event: status\ndata: {json.dumps(job)}\n\n"
+                if last in job_queue.FINISHED:
+                    break
+                time.sleep(0.25)
+        
+        response = Response(stream_with_context(stream()), mimetype='text/event-stream')
+        response.headers['Cache-Control'] = 'no-cache'
+        response.headers['X-Accel-Buffering'] = 'no'
+        return response
+    
+    @app.route("/outbreaks", methods=["GET"])
+    def outbreak_summary():
+        """Top diseases within radius_km of lat/lon over the last `days` days"""
+        if outbreak_store is None:
+            return jsonify({"error": "Detection recording is disabled"}), 404
+        location = parse_location(request.args)
+        if location is None:
+            return jsonify({"error": "Valid lat and lon required"}), 400
+        try:
+            radius_km = min(200.0, max(1.0, float(request.args.get('radius_km', 25))))
+            days = min(365, max(1, int(request.args.get('days', 14))))
+            top = min(50, max(1, int(request.args.get('top', 5))))
+        except ValueError:
+            return jsonify({"error": "radius_km, days and top must be numbers"}), 400
+        summary = outbreak_store.top_diseases(location[0], location[1], radius_km, days, top)
+        return jsonify({"radius_km": radius_km, "days": days, **summary})
+    
     @app.route("/detect", methods=["OPTIONS"])
     def detect_options():
         """Handle preflight OPTIONS requests"""
@@ -1,6 +1,13 @@
-from flask import Flask, request, jsonify
+import os
+
+from flask import Flask, Response, request, jsonify
 from flask_cors import CORS
-from fertilizer_rec import fertilizer_recommendation
+from fertilizer_rec import fertilizer_recommendation, recommend_mixes
+from crop_advisory.fertilizer_tables import get_tables
+from fertilizer_cache import RequestError, ResponseCache, cache_key, compile_request_schema, etag_for, soil_dict
+
+MAX_BATCH_FARMS = 5000
+CACHE_SIZE = int(os.environ.get('FERTILIZER_CACHE_SIZE', '20000'))
 
 app = Flask(__name__)
 
@@ -13,38 +20,95 @@ CORS(
     ],
     supports_credentials=True,
     methods=["GET", "POST", "OPTIONS"],
-    allow_headers=["Content-Type"]
+    allow_headers=["Content-Type", "If-None-Match"],
+    expose_headers=["ETag", "X-Cache"]
 )
 
+# Parse the threshold tables at startup so a broken file fails the deploy, not the first request
+get_tables()
+validate_request = compile_request_schema()
+response_cache = ResponseCache(CACHE_SIZE)
+
+@app.route('/crops', methods=['GET'])
+def crops():
+    tables = get_tables()
+    return jsonify({
+        'status': 'success',
+        'data': {'version': tables.version, 'crops': tables.crops, 'regions': tables.regions}
+    })
+
 @app.route('/recommend', methods=['POST', 'OPTIONS'])
 def recommend():
     if request.method == 'OPTIONS':
         return '', 200
 
-    data = request.get_json()
-    if not data:
-        return jsonify({'status': 'error', 'message': 'Invalid JSON body'}), 400
-
-    crop = data.get('crop')
-    soil = data.get('soil')
+    # Validate input (soil values are rounded to lab precision here)
+    data = request.get_json(silent=True)
+    try:
+        req = validate_request(data)
+    except RequestError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
 
-    # Validate input
-    if not crop or not soil:
-        return jsonify({'status': 'error', 'message': 'Missing crop or soil data'}), 400
-    if not isinstance(crop, str) or not isinstance(soil, dict):
-        return jsonify({'status': 'error', 'message': 'Invalid input format'}), 400
+    key = cache_key(get_tables().digest, req)
+    etag = etag_for(key)
+    if etag in request.if_none_match:
+        response = Response(status=304)
+        response.set_etag(etag)
+        return response
 
-    try:
-        recs, doses = fertilizer_recommendation(crop, soil)
-        return jsonify({
-            'status': 'success',
-            'data': {
+    body = response_cache.get(key)
+    cache_status = 'HIT'
+    if body is None:
+        cache_status = 'MISS'
+        crop, soil, region = req['crop'], soil_dict(req), req['region']
+        if req['mode'] == 'optimize':
+            # Least-cost mix of all priced products instead of one product per nutrient
+            try:
+                result = recommend_mixes([{'crop': crop, 'soil': soil, 'region': region}],
+                                         data.get('prices'), data.get('products'))[0]
+            except (ValueError, TypeError) as e:
+                return jsonify({'status': 'error', 'message': str(e)}), 400
+            if 'error' in result:
+                return jsonify({'status': 'error', 'message': result['error']}), 400
+        else:
+            try:
+                recs, doses = fertilizer_recommendation(crop, soil, region)
+            except Exception as e:
+                return jsonify({'status': 'error', 'message': str(e)}), 500
+            result = {
                 'recommendations': recs,
                 'doses': doses
             }
-        })
-    except Exception as e:
-        return jsonify({'status': 'error', 'message': str(e)}), 500
+        body = app.json.dumps({'status': 'success', 'data': result}).encode()
+        response_cache.put(key, body)
+
+    response = Response(body, mimetype='application/json')
+    response.set_etag(etag)
+    response.headers['X-Cache'] = cache_status
+    return response
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    return jsonify({'status': 'success', 'data': {'response_cache': response_cache.stats()}})
+
+@app.route('/recommend/batch', methods=['POST', 'OPTIONS'])
+def recommend_batch():
+    """Least-cost mixes for many farms (e.g. a cooperative's members) in one solve"""
+    if request.method == 'OPTIONS':
+        return '', 200
+
+    data = request.get_json(silent=True)
+    farms = data.get('farms') if isinstance(data, dict) else None
+    if not isinstance(farms, list) or not farms or not all(isinstance(f, dict) for f in farms):
+        return jsonify({'status': 'error', 'message': 'Body must contain a non-empty farms list'}), 400
+    if len(farms) > MAX_BATCH_FARMS:
+        return jsonify({'status': 'error', 'message': f'At most {MAX_BATCH_FARMS} farms per request'}), 400
+
+    try:
+        results = recommend_mixes(farms, data.get('prices'), data.get('products'))
+    except (ValueError, TypeError) as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+    return jsonify({'status': 'success', 'data': {'results': results}})
 
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=8080, debug=True)
@@ -0,0 +1,217 @@
+"""
+Vectorized fertilizer recommendations for soil-health-card datasets.
+
+`recommend_batch` evaluates the same rules as
+`fertilizer_rec.fertilizer_recommendation` on whole columns at once: every
+dose and advisory flag is a NumPy expression over all rows, so a chunk of a
+few hundred thousand cards costs a handful of array operations instead of a
+Python if-chain per farm. Doses the scalar function would not emit are NaN.
+
+CLI (from client/models), streams the input in chunks and appends results:
+    python fertilizer_batch.py cards.csv results.csv [--chunk-size 200000]
+    python fertilizer_batch.py cards.parquet results.csv   # needs pyarrow
+
+An optional `region` column applies that region's threshold overrides.
+"""
+
+import argparse
+import csv
+import math
+import sys
+import time
+from typing import Dict, Iterator, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+try:
+    from .crop_advisory.fertilizer_tables import NUTRIENTS, FertilizerTables, get_tables
+except ImportError:
+    from crop_advisory.fertilizer_tables import NUTRIENTS, FertilizerTables, get_tables
+
+try:
+    import pyarrow.parquet as pq
+except ImportError:
+    pq = None
+
+SOIL_FIELDS = NUTRIENTS + ('OC', 'pH', 'EC')
+DOSE_COLUMNS = ('DAP_kg/ha', 'Urea_kg/ha', 'MOP_kg/ha', 'Gypsum_kg/ha',
+                'ZnSO4_kg/ha', 'Borax_kg/ha', 'Compost_tons/ha')
+FLAG_COLUMNS = ('iron_low', 'copper_low', 'manganese_low', 'alkaline', 'saline')
+
+_COL = {n: i for i, n in enumerate(NUTRIENTS)}
+
+
+def _dose(apply: np.ndarray, deficit: np.ndarray, content: float) -> np.ndarray:
+    # np.round rounds half to even, the same as Python's round()
+    with np.errstate(invalid='ignore'):
+        return np.where(apply, np.round(deficit / content), np.nan)
+
+
+def recommend_batch(crops: Sequence[str], soil: Mapping[str, Sequence[float]],
+                    regions: Optional[Sequence[Optional[str]]] = None,
+                    tables: Optional[FertilizerTables] = None) -> Dict[str, np.ndarray]:
+    """
+    crops: N crop names
+    soil: column name -> N values (same units as fertilizer_recommendation);
+          missing values (NaN) never trigger a recommendation
+    regions: optional N region names for regional threshold overrides
+    Returns a dict of N-length arrays: 'supported' (bool), one float column per
+    DOSE_COLUMNS entry (NaN where the scalar function omits the dose) and one
+    bool column per FLAG_COLUMNS entry.
+    """
+    tables = tables or get_tables()
+    content = tables.products
+    idx = tables.rows(crops, regions)
+    supported = idx != tables.unsupported
+    thr = tables.matrix[idx]
+    s = {k: np.asarray(soil[k], dtype=np.float64) for k in SOIL_FIELDS}
+
+    def low(nutrient: str) -> np.ndarray:
+        with np.errstate(invalid='ignore'):
+            return s[nutrient] < thr[:, _COL[nutrient]]
+
+    def deficit(nutrient: str) -> np.ndarray:
+        return thr[:, _COL[nutrient]] - s[nutrient]
+
+    out: Dict[str, np.ndarray] = {'supported': supported}
+
+    p_low = low('P')
+    dap = _dose(p_low, deficit('P'), content['dap']['P'])
+    out['DAP_kg/ha'] = dap
+    n_from_dap = np.where(p_low, dap * content['dap']['N'], 0.0)
+
+    deficit_n = deficit('N') - n_from_dap
+    with np.errstate(invalid='ignore'):
+        apply_n = low('N') & (deficit_n > 0)
+    out['Urea_kg/ha'] = _dose(apply_n, deficit_n, content['urea']['N'])
+
+    out['MOP_kg/ha'] = _dose(low('K'), deficit('K'), content['mop']['K'])
+    out['Gypsum_kg/ha'] = _dose(low('S'), deficit('S'), content['gypsum']['S'])
+    out['ZnSO4_kg/ha'] = _dose(low('Zn'), deficit('Zn'), content['znso4']['Zn'])
+    out['Borax_kg/ha'] = _dose(low('B'), deficit('B'), content['borax']['B'])
+
+    out['iron_low'] = low('Fe')
+    out['copper_low'] = low('Cu')
+    out['manganese_low'] = low('Mn')
+
+    # Amendments and warnings only apply to crops the scalar function accepts
+    with np.errstate(invalid='ignore'):
+        out['Compost_tons/ha'] = np.where(supported & (s['OC'] < tables.oc_min), float(tables.compost_tons), np.nan)
+        out['alkaline'] = supported & (s['pH'] > tables.ph_max)
+        out['saline'] = supported & (s['EC'] > tables.ec_max)
+    return out
+
+
+def row_doses(result: Mapping[str, np.ndarray], i: int) -> Dict[str, int]:
+    """The fertilizer_doses dict the scalar function returns for row i"""
+    return {c: int(result[c][i]) for c in DOSE_COLUMNS if not math.isnan(result[c][i])}
+
+
+# ============================
+# Chunked dataset I/O
+# ============================
+def _to_float(value: str) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return math.nan
+
+
+def _resolve_columns(header: Sequence[str], crop_column: str) -> Dict[str, str]:
+    """Map crop/soil field -> dataset column name, matching case-insensitively"""
+    by_lower = {h.strip().lower(): h for h in header}
+    mapping = {}
+    for field in (crop_column,) + SOIL_FIELDS:
+        name = by_lower.get(field.lower())
+        if name is None:
+            raise ValueError(f"Input is missing column '{field}'")
+        mapping[field] = name
+    return mapping
+
+
+def iter_csv_chunks(path: str, chunk_size: int, crop_column: str = 'crop') -> Iterator[Tuple[List[str], Dict[str, List]]]:
+    """Yield (header, column name -> list of raw values) per chunk of rows"""
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        _resolve_columns(header, crop_column)
+        rows = []
+        for row in reader:
+            rows.append(row)
+            if len(rows) >= chunk_size:
+                yield header, dict(zip(header, map(list, zip(*rows))))
+                rows = []
+        if rows:
+            yield header, dict(zip(header, map(list, zip(*rows))))
+
+
+def iter_parquet_chunks(path: str, chunk_size: int, crop_column: str = 'crop') -> Iterator[Tuple[List[str], Dict[str, List]]]:
+    if pq is None:
+        raise RuntimeError('Reading Parquet needs pyarrow (pip install pyarrow)')
+    parquet = pq.ParquetFile(path)
+    header = list(parquet.schema_arrow.names)
+    _resolve_columns(header, crop_column)
+    for batch in parquet.iter_batches(batch_size=chunk_size):
+        yield header, batch.to_pydict()
+
+
+def recommend_chunk(header: Sequence[str], columns: Mapping[str, List], crop_column: str = 'crop') -> Dict[str, np.ndarray]:
+    mapping = _resolve_columns(header, crop_column)
+    crops = ['' if c is None else str(c) for c in columns[mapping[crop_column]]]
+    soil = {k: np.array([_to_float(v) for v in columns[mapping[k]]], dtype=np.float64) for k in SOIL_FIELDS}
+    # An optional 'region' column selects regional threshold overrides
+    region = {h.strip().lower(): h for h in header}.get('region')
+    return recommend_batch(crops, soil, columns[region] if region else None)
+
+
+def _format(value) -> str:
+    return '' if value is None else str(value)
+
+
+def run(input_path: str, output_path: str, chunk_size: int = 200000, crop_column: str = 'crop',
+        keep_columns: Optional[Sequence[str]] = None) -> int:
+    """Stream `input_path` through recommend_batch, appending each chunk to `output_path`"""
+    chunks = (iter_parquet_chunks if input_path.lower().endswith(('.parquet', '.pq')) else iter_csv_chunks)
+    total = 0
+    with open(output_path, 'w', newline='') as out:
+        writer = None
+        for header, columns in chunks(input_path, chunk_size, crop_column):
+            passthrough = list(keep_columns) if keep_columns is not None else list(header)
+            result = recommend_chunk(header, columns, crop_column)
+            n = len(result['supported'])
+            if writer is None:
+                writer = csv.writer(out)
+                writer.writerow(passthrough + ['supported'] + list(DOSE_COLUMNS) + list(FLAG_COLUMNS))
+            doses = [np.where(np.isnan(result[c]), -1, result[c]).astype(np.int64) for c in DOSE_COLUMNS]
+            flags = [result[c].astype(np.int8) for c in FLAG_COLUMNS]
+            kept = [columns[c] for c in passthrough]
+            supported = result['supported'].astype(np.int8)
+            writer.writerows(
+                [_format(col[i]) for col in kept]
+                + [supported[i]]
+                + ['' if d[i] < 0 else d[i] for d in doses]
+                + [f[i] for f in flags]
+                for i in range(n))
+            out.flush()
+            total += n
+            print(f"Processed {total} rows", file=sys.stderr)
+    return total
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Batch fertilizer recommendations for soil-health-card datasets')
+    parser.add_argument('input', help='CSV or Parquet with crop, N, P, K, S, Zn, Fe, Cu, Mn, B, OC, pH, EC columns')
+    parser.add_argument('output', help='CSV to write')
+    parser.add_argument('--chunk-size', type=int, default=200000)
+    parser.add_argument('--crop-column', default='crop')
+    parser.add_argument('--keep', nargs='*', help='input columns to copy to the output (default: all)')
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    total = run(args.input, args.output, args.chunk_size, args.crop_column, args.keep)
+    print(f"✅ Wrote {total} recommendations to {args.output} in {time.perf_counter() - start:.1f}s")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,121 @@
+"""
+Request validation and response caching for the fertilizer API.
+
+Soil test values repeat heavily: labs report to fixed precision and a whole
+village often shares one test. `compile_request_schema` turns the schema
+below into a single validator that checks types and rounds every soil value
+to lab precision in one pass. The validated request is its own cache key, so
+the serialized response is computed once per distinct (crop, region, mode,
+quantized soil vector) and served from a bounded LRU after that. The key
+digest doubles as the response ETag.
+"""
+
+import hashlib
+import math
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Mapping, Optional, Tuple
+
+# Decimal places each soil value is reported to on a soil health card
+SOIL_PRECISION = {
+    'N': 1, 'P': 1, 'K': 1,
+    'S': 2, 'Zn': 2, 'Fe': 2, 'Cu': 2, 'Mn': 2, 'B': 2,
+    'OC': 2, 'pH': 2, 'EC': 2,
+}
+MODES = ('standard', 'optimize')
+
+
+class RequestError(ValueError):
+    """Invalid /recommend body; the message is safe to return to the client"""
+
+
+def compile_request_schema(precision: Mapping[str, int] = SOIL_PRECISION) -> Callable[[Any], Dict[str, Any]]:
+    """Build a validator returning {'crop', 'region', 'mode', 'soil', 'extra'} with quantized soil"""
+    fields = tuple(precision.items())
+    number = (int, float)
+
+    def validate(data: Any) -> Dict[str, Any]:
+        if not isinstance(data, dict):
+            raise RequestError('Invalid JSON body')
+        crop, soil = data.get('crop'), data.get('soil')
+        if not crop or not soil:
+            raise RequestError('Missing crop or soil data')
+        region, mode = data.get('region'), data.get('mode') or 'standard'
+        if (not isinstance(crop, str) or not isinstance(soil, dict)
+                or not isinstance(region, (str, type(None))) or mode not in MODES):
+            raise RequestError('Invalid input format')
+        values = []
+        for name, places in fields:
+            v = soil.get(name)
+            if type(v) not in number or not math.isfinite(v):
+                raise RequestError(f"soil.{name} must be a number")
+            values.append(round(float(v), places))
+        # Price overrides and product lists only matter to the optimizer
+        extra = (_freeze(data.get('prices')), _freeze(data.get('products'))) if mode == 'optimize' else None
+        return {'crop': crop, 'region': region.strip().lower() if region else None, 'mode': mode,
+                'soil': tuple(values), 'extra': extra}
+
+    return validate
+
+
+def _freeze(value: Any) -> Any:
+    """Hashable, order-independent form of a JSON value"""
+    if isinstance(value, dict):
+        return tuple(sorted((str(k), _freeze(v)) for k, v in value.items()))
+    if isinstance(value, list):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+def soil_dict(req: Mapping[str, Any]) -> Dict[str, float]:
+    return dict(zip(SOIL_PRECISION, req['soil']))
+
+
+def cache_key(tables_digest: str, req: Mapping[str, Any]) -> Tuple:
+    return (tables_digest, req['crop'], req['region'], req['mode'], req['soil'], req['extra'])
+
+
+def etag_for(key: Tuple) -> str:
+    return hashlib.blake2b(repr(key).encode(), digest_size=12).hexdigest()
+
+
+class ResponseCache:
+    """Thread-safe LRU of serialized responses with hit/miss counters"""
+
+    def __init__(self, capacity: int):
+        self.capacity = max(1, capacity)
+        self._items: 'OrderedDict[Tuple, bytes]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Tuple) -> Optional[bytes]:
+        with self._lock:
+            body = self._items.get(key)
+            if body is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return body
+
+    def put(self, key: Tuple, body: bytes) -> None:
+        with self._lock:
+            self._items[key] = body
+            self._items.move_to_end(key)
+            while len(self._items) > self.capacity:
+                self._items.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._items),
+                'capacity': self.capacity,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else None,
+            }
@@ -1,6 +1,50 @@
+import math
+from typing import Any, Dict, List, Mapping, Optional, Sequence
 
+import numpy as np
 
-def fertilizer_recommendation(crop, soil):
+# The tables and the optimizer ship with the crop advisory service, which also prices fertilizer
+try:
+    from .crop_advisory.fertilizer_optimizer import MIX_NUTRIENTS, get_optimizer
+    from .crop_advisory.fertilizer_tables import NUTRIENTS, get_tables
+except ImportError:
+    from crop_advisory.fertilizer_optimizer import MIX_NUTRIENTS, get_optimizer
+    from crop_advisory.fertilizer_tables import NUTRIENTS, get_tables
+
+SOIL_FIELDS = NUTRIENTS + ('OC', 'pH', 'EC')
+
+
+def soil_advisories(thresholds, soil, tables, fertilizer_doses):
+    """
+    Micronutrient sprays and soil amendment advice that do not depend on which
+    N/P/K/S products are used. Adds the compost dose to fertilizer_doses.
+    """
+    recommendations = []
+
+    if soil["Fe"] < thresholds["Fe"]:
+        recommendations.append("✔ Iron low: Apply 0.5% FeSO₄ foliar spray twice during crop growth.")
+
+    if soil["Cu"] < thresholds["Cu"]:
+        recommendations.append("✔ Copper low: Apply 5 kg/ha CuSO₄ or foliar spray (0.2%).")
+
+    if soil["Mn"] < thresholds["Mn"]:
+        recommendations.append("✔ Manganese low: Apply foliar spray of 0.5% MnSO₄.")
+
+    # --- Soil amendments ---
+    if soil["OC"] < tables.oc_min:
+        recommendations.append("✔ Add 5–10 tons/ha FYM/compost to improve soil organic matter.")
+        fertilizer_doses["Compost_tons/ha"] = tables.compost_tons
+
+    if soil["pH"] > tables.ph_max:
+        recommendations.append("⚠ Soil is alkaline. Apply gypsum and use acid-forming fertilizers.")
+
+    if soil["EC"] > tables.ec_max:
+        recommendations.append("⚠ Soil is saline. Improve drainage and consider salt-tolerant varieties.")
+
+    return recommendations
+
+
+def fertilizer_recommendation(crop, soil, region=None):
     """
     crop: string, crop name
     soil: dictionary containing soil report values
@@ -8,37 +52,21 @@ def fertilizer_recommendation(crop, soil):
         - S, Zn, Fe, Cu, Mn, B: ppm (mg/kg)
         - OC: %
         - pH, EC: as reported
+    region: optional state/region name; its overrides in fertilizer_tables.json apply
     Returns:
         - recommendations: list of advice strings
         - fertilizer_doses: dict of fertilizer quantities
     """
 
-    # Crop-specific nutrient thresholds (kg/ha or ppm)
-    crop_thresholds = {
-        "wheat": {"N": 250, "P": 20, "K": 120, "S": 10, "Zn": 0.6, "Fe": 4.5, "Cu": 0.2, "Mn": 1.5, "B": 0.5},
-        "paddy": {"N": 280, "P": 18, "K": 100, "S": 10, "Zn": 0.6, "Fe": 4.5, "Cu": 0.2, "Mn": 1.5, "B": 0.5},
-        "maize": {"N": 250, "P": 22, "K": 100, "S": 12, "Zn": 0.6, "Fe": 4.5, "Cu": 0.2, "Mn": 1.5, "B": 0.5},
-        "cotton": {"N": 180, "P": 20, "K": 120, "S": 12, "Zn": 0.75, "Fe": 4.5, "Cu": 0.2, "Mn": 1.5, "B": 0.5},
-        "mustard": {"N": 150, "P": 25, "K": 100, "S": 15, "Zn": 0.6, "Fe": 4.5, "Cu": 0.2, "Mn": 1.5, "B": 0.5},
-    }
-
-    thresholds = crop_thresholds.get(crop.lower())
+    tables = get_tables()
+    thresholds = tables.thresholds(crop, region)
     if not thresholds:
         return f"❌ Crop '{crop}' not supported.", {}
 
     recommendations = []
     fertilizer_doses = {}
 
-    # Fertilizer contents
-    fert_content = {
-        "urea": 0.46,                 # 46% N
-        "dap": {"N": 0.18, "P": 0.20},# 18% N, 20% P
-        "mop": {"K": 0.50},           # 50% K
-        "gypsum": {"S": 0.18},        # 18% S
-        "znso4": {"Zn": 0.21},        # 21% Zn
-        "borax": {"B": 0.11},         # 11% B
-        "compost": {"OC": 0.005}      # 0.5% OC contribution
-    }
+    fert_content = tables.products
 
     # --- Major nutrients: N, P, K ---
     if soil["P"] < thresholds["P"]:
@@ -53,7 +81,7 @@ def fertilizer_recommendation(crop, soil):
     if soil["N"] < thresholds["N"]:
         deficit_N = thresholds["N"] - soil["N"] - N_from_dap
         if deficit_N > 0:
-            urea_needed = round(deficit_N / fert_content["urea"])
+            urea_needed = round(deficit_N / fert_content["urea"]["N"])
             recommendations.append(f"✔ Apply {urea_needed} kg/ha Urea because nitrogen is below recommended level.")
             fertilizer_doses["Urea_kg/ha"] = urea_needed
 
@@ -83,34 +111,80 @@ def fertilizer_recommendation(crop, soil):
         recommendations.append(f"✔ Apply {borax_needed} kg/ha Borax because soil boron is deficient.")
         fertilizer_doses["Borax_kg/ha"] = borax_needed
 
-    if soil["Fe"] < thresholds["Fe"]:
-        recommendations.append("✔ Iron low: Apply 0.5% FeSO₄ foliar spray twice during crop growth.")
-
-    if soil["Cu"] < thresholds["Cu"]:
-        recommendations.append("✔ Copper low: Apply 5 kg/ha CuSO₄ or foliar spray (0.2%).")
+    recommendations.extend(soil_advisories(thresholds, soil, tables, fertilizer_doses))
 
-    if soil["Mn"] < thresholds["Mn"]:
-        recommendations.append("✔ Manganese low: Apply foliar spray of 0.5% MnSO₄.")
+    return recommendations, fertilizer_doses
 
-    # --- Soil amendments ---
-    if soil["OC"] < 0.5:
-        recommendations.append("✔ Add 5–10 tons/ha FYM/compost to improve soil organic matter.")
-        fertilizer_doses["Compost_tons/ha"] = 5
 
-    if soil["pH"] > 8.5:
-        recommendations.append("⚠ Soil is alkaline. Apply gypsum and use acid-forming fertilizers.")
+def _soil_vector(soil: Any) -> Dict[str, float]:
+    if not isinstance(soil, dict):
+        raise ValueError('soil must be an object')
+    values = {}
+    for k in SOIL_FIELDS:
+        v = soil.get(k)
+        if isinstance(v, bool) or not isinstance(v, (int, float)) or not math.isfinite(v):
+            raise ValueError(f"soil.{k} must be a number")
+        values[k] = float(v)
+    return values
 
-    if soil["EC"] > 4.0:
-        recommendations.append("⚠ Soil is saline. Improve drainage and consider salt-tolerant varieties.")
 
-    return recommendations, fertilizer_doses
+def recommend_mixes(farms: Sequence[Mapping[str, Any]], prices: Optional[Mapping[str, float]] = None,
+                    available: Optional[Sequence[str]] = None) -> List[Dict[str, Any]]:
+    """
+    Least-cost mix for each {'crop', 'soil', 'region'} farm, solved as one batch.
+    Each result has recommendations, doses, cost_per_ha and unmet nutrients, or
+    'error' for a farm whose crop is unsupported or soil is incomplete.
+    """
+    tables = get_tables()
+    optimizer = get_optimizer(tables, prices, available)
+    results: List[Dict[str, Any]] = [{} for _ in farms]
+    valid, deficits, context = [], [], []
+    for i, farm in enumerate(farms):
+        try:
+            soil = _soil_vector(farm.get('soil'))
+        except ValueError as e:
+            results[i] = {'error': str(e)}
+            continue
+        thresholds = tables.thresholds(farm.get('crop'), farm.get('region'))
+        if thresholds is None:
+            results[i] = {'error': f"Crop '{farm.get('crop')}' not supported."}
+            continue
+        valid.append(i)
+        deficits.append([max(thresholds[n] - soil[n], 0.0) for n in MIX_NUTRIENTS])
+        context.append((thresholds, soil))
+    if not valid:
+        return results
+
+    doses, unmet = optimizer.solve(np.array(deficits))
+    costs = doses @ optimizer.prices
+    for row, i in enumerate(valid):
+        thresholds, soil = context[row]
+        recommendations, fertilizer_doses = [], {}
+        for j in np.flatnonzero(doses[row] > 0):
+            name = optimizer.products[j]
+            kg = int(doses[row, j])
+            supplies = ', '.join(n for n in MIX_NUTRIENTS if tables.products[name].get(n))
+            recommendations.append(f"✔ Apply {kg} kg/ha {tables.labels[name]} (supplies {supplies}).")
+            fertilizer_doses[tables.dose_keys[name]] = kg
+        missing = [n for n, flag in zip(MIX_NUTRIENTS, unmet[row]) if flag]
+        if missing:
+            recommendations.append(f"⚠ No available product supplies {', '.join(missing)}.")
+        recommendations.extend(soil_advisories(thresholds, soil, tables, fertilizer_doses))
+        results[i] = {
+            'recommendations': recommendations,
+            'doses': fertilizer_doses,
+            'cost_per_ha': round(float(costs[row]), 2),
+            'currency': tables.currency,
+            'unmet': missing,
+        }
+    return results
 
 
 # ============================
 # Interactive Input
 # ============================
 if __name__ == "__main__":
-    crop = input("Enter crop (wheat/paddy/maize/cotton/mustard): ")
+    crop = input(f"Enter crop ({', '.join(get_tables().crops)}): ")
 
     soil = {}
     for nutrient in ["N", "P", "K"]:
@@ -0,0 +1,18 @@
+# Gunicorn config for the disease detection service.
+# Usage (from client/models):
+#   gunicorn -c gunicorn_disease.conf.py disease_detection:app
+#
+# The app is NOT preloaded: TensorFlow does not support fork() once it has
+# been initialised, whatever the worker class, so the master never imports
+# disease_detection. Each worker imports it, loads and warms up its own copy
+# of the model, and only then starts accepting requests. Weights are not
+# shared between workers: budget roughly one model's weights plus the
+# TensorFlow runtime (a few hundred MB) of resident memory per worker.
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+workers = int(os.environ.get('WEB_CONCURRENCY', '2'))
+threads = int(os.environ.get('GUNICORN_THREADS', '2'))
+preload_app = False
+# Loading and warming the model happens during worker boot
+timeout = 120
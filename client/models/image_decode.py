@@ -0,0 +1,80 @@
+"""
+Image decoding helpers for the disease detection service.
+
+Kept free of Flask/TensorFlow imports so that decode pool processes start
+quickly and never load the model.
+"""
+
+import io
+import zipfile
+from multiprocessing import shared_memory
+from typing import List, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+INPUT_SIZE = (224, 224)
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.webp', '.bmp')
+
+
+class UploadTooLarge(Exception):
+    """Raised when an archive member or the archive as a whole exceeds its byte budget"""
+
+
+def decode_image_bytes(image_bytes: bytes, size: Tuple[int, int] = INPUT_SIZE) -> np.ndarray:
+    """Decode raw image bytes into a (H, W, 3) uint8 RGB array of `size`"""
+    image = Image.open(io.BytesIO(image_bytes))
+    # For JPEGs let the decoder downscale by a power of two before the resize
+    image.draft('RGB', size)
+    if image.mode != 'RGB':
+        image = image.convert('RGB')
+    image = image.resize(size)
+    return np.asarray(image, dtype=np.uint8)
+
+
+def decode_into_shm(shm_name: str, index: int, image_bytes: bytes,
+                    size: Tuple[int, int] = INPUT_SIZE) -> Tuple[int, Optional[str]]:
+    """Decode one image straight into slot `index` of a shared (N, H, W, 3) buffer.
+
+    Runs inside a pool process; only the index and an optional error string are
+    pickled back to the parent, never the pixel data.
+    """
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        slot_bytes = size[1] * size[0] * 3
+        out = np.ndarray((size[1], size[0], 3), dtype=np.uint8, buffer=shm.buf, offset=index * slot_bytes)
+        out[...] = decode_image_bytes(image_bytes, size)
+        del out
+        return index, None
+    except Exception as e:
+        return index, str(e)
+    finally:
+        shm.close()
+
+
+def read_zip_images(data: bytes, limit: int, max_image_bytes: int,
+                    max_total_bytes: int) -> List[Tuple[str, bytes]]:
+    """Return (name, bytes) for up to `limit` image members of a zip archive.
+
+    Sizes are checked against the member headers before anything is inflated,
+    and each read is capped in case a header understates its member.
+    """
+    images = []
+    total = 0
+    with zipfile.ZipFile(io.BytesIO(data)) as zf:
+        for info in zf.infolist():
+            if info.is_dir() or not info.filename.lower().endswith(IMAGE_EXTENSIONS):
+                continue
+            if info.file_size > max_image_bytes:
+                raise UploadTooLarge(f"{info.filename} is larger than {max_image_bytes} bytes")
+            if total + info.file_size > max_total_bytes:
+                raise UploadTooLarge(f"Archive images exceed {max_total_bytes} bytes")
+            with zf.open(info) as member:
+                blob = member.read(max_image_bytes + 1)
+            if len(blob) > max_image_bytes:
+                raise UploadTooLarge(f"{info.filename} is larger than {max_image_bytes} bytes")
+            total += len(blob)
+            images.append((info.filename, blob))
+            if len(images) >= limit:
+                break
+    return images
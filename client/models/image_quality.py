@@ -0,0 +1,85 @@
+"""
+Cheap pre-inference image quality checks for disease detection.
+
+All checks run vectorized over the already-downsampled (N, 224, 224, 3)
+uint8 batch: Laplacian-variance blur score, exposure statistics and the
+fraction of vegetation-coloured pixels. Images that fail are rejected with
+reasons the farmer can act on before the model ever runs.
+"""
+
+import os
+from typing import Any, Dict, List
+
+import numpy as np
+
+try:
+    from . import color_features
+except ImportError:
+    import color_features
+
+MIN_SHARPNESS = float(os.environ.get('DISEASE_MIN_SHARPNESS', '40'))
+MIN_BRIGHTNESS = float(os.environ.get('DISEASE_MIN_BRIGHTNESS', '0.15'))
+MAX_BRIGHTNESS = float(os.environ.get('DISEASE_MAX_BRIGHTNESS', '0.90'))
+MAX_CLIPPED = float(os.environ.get('DISEASE_MAX_CLIPPED', '0.40'))
+MIN_VEGETATION = float(os.environ.get('DISEASE_MIN_VEGETATION', '0.15'))
+
+MESSAGES = {
+    'blurry': 'Image is blurry. Hold the camera steady and tap on the leaf to focus.',
+    'too_dark': 'Image is too dark. Take the photo in daylight or move out of deep shade.',
+    'overexposed': 'Image is overexposed. Avoid flash and direct glare on the leaf.',
+    'no_leaf': 'No leaf detected. Fill most of the frame with the affected leaf.',
+}
+
+
+class ImageQualityError(ValueError):
+    """Raised when an upload fails the quality gate; carries the reasons and metrics"""
+
+    def __init__(self, report: Dict[str, Any]):
+        super().__init__('; '.join(r['message'] for r in report['reasons']))
+        self.report = report
+
+
+def assess(batch: np.ndarray) -> List[Dict[str, Any]]:
+    """Return one {'ok', 'reasons', 'metrics'} report per image of a (N, H, W, 3) uint8 batch"""
+    if batch.ndim == 3:
+        batch = batch[None]
+    n = batch.shape[0]
+    gray = batch.astype(np.float32) @ np.array([0.299, 0.587, 0.114], dtype=np.float32)
+
+    # Blur: variance of the 4-neighbour Laplacian (0-255 intensity scale)
+    lap = (4 * gray[:, 1:-1, 1:-1] - gray[:, :-2, 1:-1] - gray[:, 2:, 1:-1]
+           - gray[:, 1:-1, :-2] - gray[:, 1:-1, 2:])
+    sharpness = lap.reshape(n, -1).var(axis=1)
+
+    # Exposure: mean luminance and share of crushed/blown pixels
+    flat = gray.reshape(n, -1) / 255.0
+    brightness = flat.mean(axis=1)
+    clipped = ((flat < 0.04) | (flat > 0.96)).mean(axis=1)
+
+    # Vegetation: green through yellow-brown hues (diseased tissue counts as leaf)
+    hue, sat, val = color_features.rgb_to_hsv(batch[:, ::2, ::2, :])
+    leafy = (hue > 0.05) & (hue < 0.48) & (sat > 0.18) & (val > 0.12)
+    vegetation = leafy.reshape(n, -1).mean(axis=1)
+
+    reports = []
+    for i in range(n):
+        codes = []
+        if sharpness[i] < MIN_SHARPNESS:
+            codes.append('blurry')
+        if brightness[i] < MIN_BRIGHTNESS or (clipped[i] > MAX_CLIPPED and brightness[i] < 0.5):
+            codes.append('too_dark')
+        elif brightness[i] > MAX_BRIGHTNESS or clipped[i] > MAX_CLIPPED:
+            codes.append('overexposed')
+        if vegetation[i] < MIN_VEGETATION:
+            codes.append('no_leaf')
+        reports.append({
+            'ok': not codes,
+            'reasons': [{'code': c, 'message': MESSAGES[c]} for c in codes],
+            'metrics': {
+                'sharpness': round(float(sharpness[i]), 1),
+                'brightness': round(float(brightness[i]), 3),
+                'clipped': round(float(clipped[i]), 3),
+                'vegetation': round(float(vegetation[i]), 3),
+            },
+        })
+    return reports
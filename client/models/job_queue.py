@@ -0,0 +1,258 @@
+"""
+Bounded background job queue with a SQLite job store.
+
+Used by the disease detection service to accept work immediately and run it
+on a fixed number of worker threads. Jobs (including their input payload)
+live in SQLite so queued work survives a restart and any gunicorn worker can
+answer status polls for any job.
+"""
+
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, Optional
+
+SCHEMA = """
+create table if not exists jobs (
+    id text primary key,
+    status text not null,
+    payload text,
+    result text,
+    error text,
+    created_at real not null,
+    updated_at real not null
+);
+create index if not exists jobs_status_idx on jobs(status, created_at);
+"""
+
+FINISHED = ('done', 'failed')
+
+
+class QueueFull(Exception):
+    """Raised by JobQueue.submit when the queue is at capacity"""
+
+    def __init__(self, retry_after: int):
+        super().__init__('Job queue is full')
+        self.retry_after = retry_after
+
+
+class JobStore:
+    """SQLite-backed job rows; one connection per thread"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._conn().executescript(SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or getattr(self._local, 'pid', None) != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute('pragma journal_mode=wal')
+            conn.execute('pragma synchronous=normal')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def create(self, payload: str) -> str:
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        self._conn().execute(
+            'insert into jobs (id, status, payload, created_at, updated_at) values (?, ?, ?, ?, ?)',
+            (job_id, 'queued', payload, now, now))
+        return job_id
+
+    def claim(self, job_id: str) -> Optional[str]:
+        """Atomically move a queued job to running; returns its payload if we won"""
+        conn = self._conn()
+        cur = conn.execute(
+            "update jobs set status = 'running', updated_at = ? where id = ? and status = 'queued'",
+            (time.time(), job_id))
+        if cur.rowcount != 1:
+            return None
+        row = conn.execute('select payload from jobs where id = ?', (job_id,)).fetchone()
+        return row['payload'] if row else None
+
+    def finish(self, job_id: str, result: Optional[Dict[str, Any]] = None, error: Optional[str] = None) -> None:
+        # The payload is dropped once the job has an outcome
+        self._conn().execute(
+            'update jobs set status = ?, result = ?, error = ?, payload = null, updated_at = ? where id = ?',
+            ('failed' if error else 'done', json.dumps(result) if result is not None else None,
+             error, time.time(), job_id))
+
+    def delete(self, job_id: str) -> None:
+        self._conn().execute('delete from jobs where id = ?', (job_id,))
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        row = self._conn().execute(
+            'select id, status, result, error, created_at, updated_at from jobs where id = ?',
+            (job_id,)).fetchone()
+        if row is None:
+            return None
+        return {
+            'id': row['id'],
+            'status': row['status'],
+            'result': json.loads(row['result']) if row['result'] else None,
+            'error': row['error'],
+            'created_at': row['created_at'],
+            'updated_at': row['updated_at'],
+        }
+
+    def recover(self, stale_after: float) -> list:
+        """Requeue jobs left running by a dead process; return ids of all queued jobs"""
+        conn = self._conn()
+        conn.execute(
+            "update jobs set status = 'queued', updated_at = ? where status = 'running' and updated_at < ?",
+            (time.time(), time.time() - stale_after))
+        rows = conn.execute("select id from jobs where status = 'queued' order by created_at").fetchall()
+        return [r['id'] for r in rows]
+
+    def prune(self, older_than: float) -> None:
+        self._conn().execute(
+            "delete from jobs where status in ('done', 'failed') and updated_at < ?",
+            (time.time() - older_than,))
+
+
+class JobQueue:
+    """Fixed pool of worker threads fed from a bounded in-memory queue of job ids.
+
+    start() runs once per process (again after a fork): it starts the threads
+    and requeues work a previous process left behind. Idle workers also rescan
+    the store, so jobs that did not fit in the queue at startup still run, and
+    finished jobs older than `ttl` are pruned every `prune_interval` seconds.
+    """
+
+    def __init__(self, store: JobStore, handler: Callable[[str], Dict[str, Any]],
+                 workers: int = 2, capacity: int = 32, ttl: float = 3600.0, stale_after: float = 300.0,
+                 idle_rescan: float = 30.0, prune_interval: float = 300.0):
+        self.store = store
+        self.handler = handler
+        self.workers = max(1, workers)
+        self.capacity = max(1, capacity)
+        self.ttl = ttl
+        self.stale_after = stale_after
+        self.idle_rescan = idle_rescan
+        self.prune_interval = prune_interval
+        self._queue: Optional[queue.Queue] = None
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+        # Ids sitting in this process's queue, so a rescan never adds them twice
+        self._pending: set = set()
+        self._pending_lock = threading.Lock()
+        self._prune_lock = threading.Lock()
+        self._pruned_at = 0.0
+        self._avg_seconds = 1.0
+
+    def start(self) -> queue.Queue:
+        """Start the worker threads in this process and pick up persisted jobs"""
+        if self._pid == os.getpid():
+            return self._queue
+        with self._lock:
+            if self._pid != os.getpid():
+                self._queue = queue.Queue(maxsize=self.capacity)
+                self._pending = set()
+                self._pid = os.getpid()
+                for i in range(self.workers):
+                    threading.Thread(target=self._worker, name=f'detect_job_{i}', daemon=True).start()
+                self._requeue(max(1, self.capacity // 2))
+                self._maybe_prune(force=True)
+            return self._queue
+
+    def _put(self, job_id: str) -> bool:
+        with self._pending_lock:
+            try:
+                self._queue.put_nowait(job_id)
+            except queue.Full:
+                return False
+            self._pending.add(job_id)
+            return True
+
+    def _requeue(self, limit: int) -> int:
+        """Queue up to `limit` persisted jobs not already queued here.
+
+        Other processes may hold the same ids in their own queues; store.claim
+        lets only one of them run each job, and the limit keeps those
+        duplicates from filling this queue and rejecting new submissions.
+        """
+        ids = self.store.recover(self.stale_after)
+        added = 0
+        with self._pending_lock:
+            for job_id in ids:
+                if added >= limit:
+                    break
+                if job_id in self._pending:
+                    continue
+                try:
+                    self._queue.put_nowait(job_id)
+                except queue.Full:
+                    break
+                self._pending.add(job_id)
+                added += 1
+        return added
+
+    def _maybe_prune(self, force: bool = False) -> None:
+        """Delete expired finished jobs, at most once per prune_interval"""
+        now = time.monotonic()
+        with self._prune_lock:
+            if not force and now - self._pruned_at < self.prune_interval:
+                return
+            self._pruned_at = now
+        self.store.prune(self.ttl)
+
+    def retry_after(self) -> int:
+        """Seconds until a slot is likely to free up"""
+        q = self._queue
+        depth = q.qsize() if q is not None else 0
+        return max(1, int(round(self._avg_seconds * (depth + 1) / self.workers)))
+
+    def depth(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def submit(self, payload: str) -> str:
+        q = self.start()
+        if q.full():
+            raise QueueFull(self.retry_after())
+        job_id = self.store.create(payload)
+        if not self._put(job_id):
+            self.store.delete(job_id)
+            raise QueueFull(self.retry_after())
+        return job_id
+
+    def _worker(self) -> None:
+        while True:
+            try:
+                job_id = self._queue.get(timeout=self.idle_rescan)
+            except queue.Empty:
+                try:
+                    self._requeue(self.workers)
+                    self._maybe_prune()
+                except Exception as e:
+                    logging.error(f"Job rescan failed: {e}")
+                continue
+            with self._pending_lock:
+                self._pending.discard(job_id)
+            try:
+                payload = self.store.claim(job_id)
+                if payload is None:
+                    continue  # another process already took it
+                start = time.perf_counter()
+                try:
+                    self.store.finish(job_id, result=self.handler(payload))
+                except ValueError as e:
+                    self.store.finish(job_id, error=str(e))
+                except Exception as e:
+                    logging.error(f"Job {job_id} failed: {e}")
+                    self.store.finish(job_id, error='Prediction failed')
+                # Exponential moving average feeds the Retry-After estimate
+                self._avg_seconds = 0.8 * self._avg_seconds + 0.2 * (time.perf_counter() - start)
+                self._maybe_prune()
+            except Exception as e:
+                logging.error(f"Job worker error: {e}")
+            finally:
+                self._queue.task_done()
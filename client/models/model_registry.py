@@ -0,0 +1,317 @@
+"""
+Versioned model registry for the disease detection service.
+
+Layout:
+
+    model_registry/
+        ACTIVE                  # name of the version being served
+        v1/model.h5
+        v1/metadata.json        # classes, input_size, preprocessing
+        v2/...
+
+Each worker watches ACTIVE and loads and warms up a new version completely
+before swapping a single reference, so in-flight requests keep the model
+they started with and none are dropped.
+
+CLI (from client/models):
+    python model_registry.py list
+    python model_registry.py register disease_model.h5 v2 [--activate]
+    python model_registry.py activate v2
+"""
+
+import argparse
+import json
+import logging
+import os
+import shutil
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+try:
+    import tensorflow as tf
+    from tensorflow import keras
+except ImportError:
+    tf = None
+    keras = None
+
+ACTIVE_FILE = 'ACTIVE'
+MODEL_FILE = 'model.h5'
+METADATA_FILE = 'metadata.json'
+
+
+@dataclass
+class LoadedModel:
+    """A model plus the metadata needed to feed it and read its output"""
+    version: str
+    model: Any
+    classes: List[str]
+    input_size: Tuple[int, int] = (224, 224)
+    scale: float = 1.0
+    loaded_at: float = field(default_factory=time.time)
+
+    def prepare(self, batch: np.ndarray) -> np.ndarray:
+        """Adapt a (N, 224, 224, 3) uint8 batch to this model's input contract"""
+        x = batch
+        if tuple(x.shape[1:3]) != tuple(self.input_size):
+            x = tf.image.resize(x, self.input_size).numpy()
+        if self.scale != 1.0:
+            x = x.astype(np.float32) * self.scale
+        return x
+
+    def predict(self, batch: np.ndarray) -> np.ndarray:
+        return np.asarray(self.model.predict(self.prepare(batch), verbose=0))
+
+
+class ModelRegistry:
+    def __init__(self, root: str):
+        self.root = root
+
+    def _dir(self, version: str) -> str:
+        if not version or os.sep in version or version.startswith('.'):
+            raise ValueError(f"Invalid model version '{version}'")
+        return os.path.join(self.root, version)
+
+    def versions(self) -> List[str]:
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(v for v in os.listdir(self.root)
+                      if os.path.exists(os.path.join(self.root, v, METADATA_FILE)))
+
+    def metadata(self, version: str) -> Dict[str, Any]:
+        with open(os.path.join(self._dir(version), METADATA_FILE)) as f:
+            return json.load(f)
+
+    def active_version(self) -> Optional[str]:
+        try:
+            with open(os.path.join(self.root, ACTIVE_FILE)) as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def active_mtime(self) -> float:
+        try:
+            return os.stat(os.path.join(self.root, ACTIVE_FILE)).st_mtime
+        except FileNotFoundError:
+            return 0.0
+
+    def activate(self, version: str) -> None:
+        """Point ACTIVE at `version` with an atomic rename"""
+        if version not in self.versions():
+            raise ValueError(f"Unknown model version '{version}'")
+        tmp = os.path.join(self.root, f'.{ACTIVE_FILE}.{os.getpid()}')
+        with open(tmp, 'w') as f:
+            f.write(version)
+        os.replace(tmp, os.path.join(self.root, ACTIVE_FILE))
+
+    def register(self, model_path: str, version: str, classes: Sequence[str],
+                 input_size: Tuple[int, int] = (224, 224), scale: float = 1.0, notes: str = '') -> str:
+        target = self._dir(version)
+        if os.path.exists(target):
+            raise ValueError(f"Model version '{version}' already exists")
+        os.makedirs(target)
+        shutil.copyfile(model_path, os.path.join(target, MODEL_FILE))
+        with open(os.path.join(target, METADATA_FILE), 'w') as f:
+            json.dump({
+                'version': version,
+                'classes': list(classes),
+                'input_size': list(input_size),
+                'preprocessing': {'scale': scale},
+                'created_at': time.time(),
+                'notes': notes,
+            }, f, indent=2)
+        return target
+
+    def load(self, version: str) -> LoadedModel:
+        meta = self.metadata(version)
+        model = keras.models.load_model(os.path.join(self._dir(version), MODEL_FILE))
+        return LoadedModel(
+            version=version,
+            model=model,
+            classes=list(meta['classes']),
+            input_size=tuple(meta.get('input_size') or (224, 224)),
+            scale=float((meta.get('preprocessing') or {}).get('scale', 1.0)),
+        )
+
+
+class RegistryWatcher:
+    """Polls ACTIVE and hands a fully loaded model to `on_swap` when it changes"""
+
+    def __init__(self, registry: ModelRegistry, on_swap: Callable[[LoadedModel], None],
+                 warmup: Callable[[LoadedModel], Any], interval: float = 5.0):
+        self.registry = registry
+        self.on_swap = on_swap
+        self.warmup = warmup
+        self.interval = interval
+        self.current: Optional[str] = None
+        self._mtime = 0.0
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+        self._check_lock = threading.Lock()
+
+    def start(self, current: Optional[str]) -> None:
+        """Start polling in this process (no-op if already running here)"""
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self.current = current
+            self._mtime = self.registry.active_mtime()
+            threading.Thread(target=self._run, name='model_registry_watch', daemon=True).start()
+
+    def _run(self) -> None:
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.check()
+            except Exception as e:
+                logging.error(f"Model registry check failed: {e}")
+
+    def _swap(self, version: str, before_swap: Optional[Callable[[], None]] = None) -> None:
+        start = time.perf_counter()
+        loaded = self.registry.load(version)
+        self.warmup(loaded)
+        if before_swap is not None:
+            before_swap()
+        self.on_swap(loaded)
+        logging.info(f"Hot-swapped disease model {self.current} -> {version} "
+                     f"({(time.perf_counter() - start) * 1000:.0f} ms to load and warm up)")
+        self.current = version
+
+    def check(self) -> bool:
+        """Swap to the ACTIVE version if it changed; serialized so a version loads once.
+
+        The ACTIVE mtime is only recorded after a successful swap, so a version
+        that fails to load is retried on the next poll.
+        """
+        with self._check_lock:
+            mtime = self.registry.active_mtime()
+            if mtime == self._mtime:
+                return False
+            version = self.registry.active_version()
+            swapped = bool(version) and version != self.current
+            if swapped:
+                self._swap(version)
+            self._mtime = mtime
+            return swapped
+
+    def activate(self, version: str) -> None:
+        """Load and warm `version` here, then point ACTIVE at it and swap.
+
+        ACTIVE is only rewritten once the model loaded, so a broken version never
+        reaches the other workers.
+        """
+        if version not in self.registry.versions():
+            raise ValueError(f"Unknown model version '{version}'")
+        with self._check_lock:
+            if version != self.current:
+                self._swap(version, lambda: self.registry.activate(version))
+            else:
+                self.registry.activate(version)
+            self._mtime = self.registry.active_mtime()
+
+
+class ShadowRunner:
+    """Runs a candidate model on a sampled fraction of live batches off the request thread.
+
+    At most one shadow batch is in flight; samples arriving while it is busy
+    are skipped so shadowing can never build a backlog.
+    """
+
+    def __init__(self, rate: float):
+        self.rate = max(0.0, min(1.0, rate))
+        self._busy = threading.Semaphore(1)
+        self._lock = threading.Lock()
+        self._rng = np.random.default_rng()
+        self.stats = {'samples': 0, 'images': 0, 'agree': 0, 'skipped': 0,
+                      'primary_ms_avg': None, 'shadow_ms_avg': None}
+
+    def maybe_run(self, candidate: LoadedModel, batch: np.ndarray, primary_labels: List[str],
+                  primary_ms: float) -> None:
+        if self.rate <= 0 or self._rng.random() >= self.rate:
+            return
+        if not self._busy.acquire(blocking=False):
+            with self._lock:
+                self.stats['skipped'] += 1
+            return
+        threading.Thread(target=self._run, args=(candidate, batch, primary_labels, primary_ms),
+                         name='shadow_inference', daemon=True).start()
+
+    def _run(self, candidate: LoadedModel, batch: np.ndarray, primary_labels: List[str], primary_ms: float) -> None:
+        try:
+            start = time.perf_counter()
+            probs = candidate.predict(batch)
+            shadow_ms = (time.perf_counter() - start) * 1000
+            labels = [candidate.classes[i] for i in probs.argmax(axis=1)]
+            agree = sum(a == b for a, b in zip(labels, primary_labels))
+            with self._lock:
+                s = self.stats
+                s['samples'] += 1
+                s['images'] += len(labels)
+                s['agree'] += agree
+                s['primary_ms_avg'] = _ema(s['primary_ms_avg'], primary_ms)
+                s['shadow_ms_avg'] = _ema(s['shadow_ms_avg'], shadow_ms)
+            logging.info(f"Shadow {candidate.version}: agreement {agree}/{len(labels)}, "
+                         f"latency {shadow_ms:.1f} ms vs primary {primary_ms:.1f} ms")
+        except Exception as e:
+            logging.error(f"Shadow inference failed: {e}")
+        finally:
+            self._busy.release()
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            s = dict(self.stats)
+        s['agreement'] = round(s['agree'] / s['images'], 4) if s['images'] else None
+        return s
+
+
+def _ema(prev: Optional[float], value: float, alpha: float = 0.1) -> float:
+    return round(value if prev is None else (1 - alpha) * prev + alpha * value, 2)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Manage the disease model registry')
+    parser.add_argument('--root', default=os.environ.get('DISEASE_MODEL_REGISTRY', 'model_registry'))
+    sub = parser.add_subparsers(dest='command', required=True)
+    sub.add_parser('list')
+    reg = sub.add_parser('register')
+    reg.add_argument('model_path')
+    reg.add_argument('version')
+    reg.add_argument('--classes', help='JSON file with the class list (default: DISEASE_CLASSES)')
+    reg.add_argument('--input-size', type=int, nargs=2, default=(224, 224))
+    reg.add_argument('--scale', type=float, default=1.0, help='multiplier applied to uint8 pixels')
+    reg.add_argument('--notes', default='')
+    reg.add_argument('--activate', action='store_true')
+    act = sub.add_parser('activate')
+    act.add_argument('version')
+    args = parser.parse_args(argv)
+
+    registry = ModelRegistry(args.root)
+    if args.command == 'list':
+        active = registry.active_version()
+        for v in registry.versions():
+            print(f"{'*' if v == active else ' '} {v}")
+        return 0
+    if args.command == 'register':
+        if args.classes:
+            with open(args.classes) as f:
+                classes = json.load(f)
+        else:
+            from disease_classes import DISEASE_CLASSES as classes
+        os.makedirs(args.root, exist_ok=True)
+        print(f"✅ Registered {registry.register(args.model_path, args.version, classes, tuple(args.input_size), args.scale, args.notes)}")
+        if args.activate:
+            registry.activate(args.version)
+            print(f"✅ Activated {args.version}")
+        return 0
+    registry.activate(args.version)
+    print(f"✅ Activated {args.version}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
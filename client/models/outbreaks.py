@@ -0,0 +1,216 @@
+"""
+Geo-tagged detection store with incrementally maintained outbreak counters.
+
+Each detection is appended to `detections` with only a coarse geohash (no raw
+coordinates), and in the same transaction the matching
+(geohash, disease, day) row of `daily_counts` is incremented. Outbreak
+queries read the small counter table for the cells covering the search
+circle instead of scanning raw events.
+"""
+
+import math
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+_BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+_DECODE = {c: i for i, c in enumerate(_BASE32)}
+EARTH_RADIUS_KM = 6371.0
+# Upper bound on the cells one outbreak query covers; coarser cells are used beyond it
+MAX_SEARCH_CELLS = 1024
+
+SCHEMA = """
+create table if not exists detections (
+    id integer primary key autoincrement,
+    created_at real not null,
+    day integer not null,
+    geohash text not null,
+    disease text not null,
+    confidence real not null
+);
+create table if not exists daily_counts (
+    geohash text not null,
+    disease text not null,
+    day integer not null,
+    count integer not null,
+    primary key (geohash, day, disease)
+) without rowid;
+"""
+
+# Per-connection list of geohash prefix ranges for one query, joined against
+# daily_counts instead of binding every cell as a parameter
+SEARCH_SCHEMA = """
+create temp table if not exists search_cells (
+    lo text not null,
+    hi text not null
+);
+"""
+
+
+def geohash_encode(lat: float, lon: float, precision: int) -> str:
+    lat_lo, lat_hi, lon_lo, lon_hi = -90.0, 90.0, -180.0, 180.0
+    chars, bits, value, even = [], 0, 0, True
+    while len(chars) < precision:
+        if even:
+            mid = (lon_lo + lon_hi) / 2
+            value = (value << 1) | (lon >= mid)
+            lon_lo, lon_hi = (mid, lon_hi) if lon >= mid else (lon_lo, mid)
+        else:
+            mid = (lat_lo + lat_hi) / 2
+            value = (value << 1) | (lat >= mid)
+            lat_lo, lat_hi = (mid, lat_hi) if lat >= mid else (lat_lo, mid)
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(_BASE32[value])
+            bits, value = 0, 0
+    return ''.join(chars)
+
+
+def geohash_bounds(geohash: str) -> Tuple[float, float, float, float]:
+    """Return (lat_lo, lat_hi, lon_lo, lon_hi) of a geohash cell"""
+    lat_lo, lat_hi, lon_lo, lon_hi = -90.0, 90.0, -180.0, 180.0
+    even = True
+    for c in geohash:
+        v = _DECODE[c]
+        for shift in range(4, -1, -1):
+            bit = (v >> shift) & 1
+            if even:
+                mid = (lon_lo + lon_hi) / 2
+                lon_lo, lon_hi = (mid, lon_hi) if bit else (lon_lo, mid)
+            else:
+                mid = (lat_lo + lat_hi) / 2
+                lat_lo, lat_hi = (mid, lat_hi) if bit else (lat_lo, mid)
+            even = not even
+    return lat_lo, lat_hi, lon_lo, lon_hi
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    dp, dl = p2 - p1, math.radians(lon2 - lon1)
+    a = math.sin(dp / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+def cells_within(lat: float, lon: float, radius_km: float, precision: int,
+                 max_cells: int = MAX_SEARCH_CELLS) -> List[str]:
+    """Geohash cells whose area may intersect the circle around (lat, lon).
+
+    When covering the circle at `precision` would take more than `max_cells`
+    cells (large radii, high latitudes) coarser cells are returned instead;
+    callers treat every cell as a prefix of the stored geohashes.
+    """
+    lat = max(-89.999, min(89.999, lat))
+    lat_span = radius_km / 111.0
+    # The circle is widest in longitude at its poleward edge; past the pole it spans every longitude
+    edge = min(90.0, abs(lat) + lat_span)
+    lon_span = 360.0 if edge >= 89.9 else radius_km / (111.0 * math.cos(math.radians(edge)))
+    for p in range(precision, 0, -1):
+        lat_lo, lat_hi, lon_lo, lon_hi = geohash_bounds(geohash_encode(lat, lon, p))
+        dlat, dlon = lat_hi - lat_lo, lon_hi - lon_lo
+        steps_lat = int(math.ceil(lat_span / dlat)) + 1
+        # Never walk more than one full turn of longitude
+        steps_lon = min(int(math.ceil(lon_span / dlon)) + 1, int(math.ceil(180.0 / dlon)))
+        if (2 * steps_lat + 1) * (2 * steps_lon + 1) <= max_cells or p == 1:
+            break
+    # Half the cell diagonal: a cell counts if any part of it can be inside
+    slack = haversine_km(lat_lo, lon_lo, lat_hi, lon_hi) / 2
+    cells = set()
+    for i in range(-steps_lat, steps_lat + 1):
+        for j in range(-steps_lon, steps_lon + 1):
+            clat = max(-89.999, min(89.999, lat + i * dlat))
+            clon = (lon + j * dlon + 180.0) % 360.0 - 180.0
+            cell = geohash_encode(clat, clon, p)
+            if cell in cells:
+                continue
+            b = geohash_bounds(cell)
+            if haversine_km(lat, lon, (b[0] + b[1]) / 2, (b[2] + b[3]) / 2) <= radius_km + slack:
+                cells.add(cell)
+    return sorted(cells)
+
+
+def _within(lat: float, lon: float, radius_km: float, cell: str) -> bool:
+    b = geohash_bounds(cell)
+    slack = haversine_km(b[0], b[2], b[1], b[3]) / 2
+    return haversine_km(lat, lon, (b[0] + b[1]) / 2, (b[2] + b[3]) / 2) <= radius_km + slack
+
+
+class OutbreakStore:
+    """Append-only detections plus per-geohash, per-disease, per-day counters"""
+
+    def __init__(self, path: str, precision: int = 5):
+        self.path = path
+        self.precision = precision
+        self._local = threading.local()
+        self._conn().executescript(SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or getattr(self._local, 'pid', None) != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute('pragma journal_mode=wal')
+            conn.execute('pragma synchronous=normal')
+            conn.execute(SEARCH_SCHEMA)
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def record(self, lat: float, lon: float, disease: str, confidence: float,
+               when: Optional[float] = None) -> str:
+        when = time.time() if when is None else when
+        day = int(when // 86400)
+        cell = geohash_encode(lat, lon, self.precision)
+        conn = self._conn()
+        with conn:
+            conn.execute('begin immediate')
+            conn.execute(
+                'insert into detections (created_at, day, geohash, disease, confidence) values (?, ?, ?, ?, ?)',
+                (when, day, cell, disease, float(confidence)))
+            conn.execute(
+                'insert into daily_counts (geohash, disease, day, count) values (?, ?, ?, 1) '
+                'on conflict (geohash, day, disease) do update set count = count + 1',
+                (cell, disease, day))
+        return cell
+
+    def top_diseases(self, lat: float, lon: float, radius_km: float, days: int,
+                     limit: int = 10, include_healthy: bool = False) -> Dict[str, Any]:
+        cells = cells_within(lat, lon, radius_km, self.precision)
+        since = int(time.time() // 86400) - max(1, days) + 1
+        healthy = '' if include_healthy else "and c.disease not like '%healthy%'"
+        conn = self._conn()
+        with conn:
+            conn.execute('begin')
+            conn.execute('delete from search_cells')
+            # '~' sorts after every base32 character, so [cell, cell~) is the prefix range
+            conn.executemany('insert into search_cells (lo, hi) values (?, ?)', ((c, c + '~') for c in cells))
+            by_cell = conn.execute(
+                'select c.geohash, c.disease, sum(c.count) from search_cells s '
+                'join daily_counts c on c.geohash >= s.lo and c.geohash < s.hi '
+                f'where c.day >= ? {healthy} group by c.geohash, c.disease',
+                (since,)).fetchall()
+        totals: Dict[str, int] = {}
+        cell_stats: Dict[str, Dict[str, Any]] = {}
+        for cell, disease, count in by_cell:
+            # Coarse search cells can reach past the circle; filter stored cells exactly
+            if len(cell) > len(cells[0]) and not _within(lat, lon, radius_km, cell):
+                continue
+            totals[disease] = totals.get(disease, 0) + count
+            entry = cell_stats.get(cell)
+            if entry is None:
+                b = geohash_bounds(cell)
+                entry = cell_stats[cell] = {'geohash': cell, 'lat': round((b[0] + b[1]) / 2, 4),
+                                            'lon': round((b[2] + b[3]) / 2, 4), 'count': 0,
+                                            'top_disease': disease, '_top': 0}
+            entry['count'] += count
+            if count > entry['_top']:
+                entry['top_disease'], entry['_top'] = disease, count
+        for entry in cell_stats.values():
+            entry.pop('_top')
+        ranked = sorted(totals.items(), key=lambda item: -item[1])[:limit]
+        return {
+            'diseases': [{'disease': d, 'count': c} for d, c in ranked],
+            'cells': sorted(cell_stats.values(), key=lambda e: -e['count']),
+            'cells_searched': len(cells),
+        }
@@ -0,0 +1,86 @@
+"""
+Lesion-area severity estimation for disease detection.
+
+Segments leaf and lesion pixels on the downsampled (N, 224, 224, 3) batch
+with HSV thresholds, cleans the masks with binary morphology and reports the
+lesion share of the leaf area. Morphology uses scipy.ndimage when it is
+installed and otherwise box filters built from integral images; either way
+the whole batch is processed at once in a few milliseconds.
+"""
+
+from typing import Any, Dict, List
+
+import numpy as np
+
+try:
+    from . import color_features
+except ImportError:
+    import color_features
+
+try:
+    from scipy import ndimage
+except ImportError:
+    ndimage = None
+
+# Lesion share of leaf area at which severity moves up a level
+MEDIUM_FRACTION = 0.05
+HIGH_FRACTION = 0.25
+# Masks are built on every STRIDE-th pixel; area ratios barely change at 112x112
+STRIDE = 2
+
+
+def _box_sum(mask: np.ndarray, r: int) -> np.ndarray:
+    """Per-pixel count of set pixels in a (2r+1)^2 window, via integral images"""
+    k = 2 * r + 1
+    padded = np.pad(mask.astype(np.int32), ((0, 0), (r, r), (r, r)), mode='edge')
+    ii = np.pad(padded, ((0, 0), (1, 0), (1, 0))).cumsum(axis=1).cumsum(axis=2)
+    return ii[:, k:, k:] - ii[:, :-k, k:] - ii[:, k:, :-k] + ii[:, :-k, :-k]
+
+
+def _dilate(mask: np.ndarray, r: int) -> np.ndarray:
+    if ndimage is not None:
+        return ndimage.binary_dilation(mask, structure=np.ones((1, 2 * r + 1, 2 * r + 1), bool))
+    return _box_sum(mask, r) > 0
+
+
+def _erode(mask: np.ndarray, r: int) -> np.ndarray:
+    if ndimage is not None:
+        return ndimage.binary_erosion(mask, structure=np.ones((1, 2 * r + 1, 2 * r + 1), bool), border_value=1)
+    return _box_sum(mask, r) == (2 * r + 1) ** 2
+
+
+def segment(batch: np.ndarray):
+    """Return (leaf, lesion) boolean masks of shape (N, H // STRIDE, W // STRIDE)"""
+    if batch.ndim == 3:
+        batch = batch[None]
+    hue, sat, val = color_features.rgb_to_hsv(batch[:, ::STRIDE, ::STRIDE, :])
+    healthy = (hue > 0.17) & (hue < 0.45) & (sat > 0.20) & (val > 0.15)
+    # Yellowing, browning and rust tones that appear on diseased tissue
+    discoloured = (hue > 0.02) & (hue <= 0.17) & (sat > 0.25) & (val > 0.15)
+    # Closing fills holes left by lesions so dark necrotic spots count as leaf
+    leaf = _erode(_dilate(healthy | discoloured, 2), 2)
+    # Dark tissue that is not healthy green; shaded healthy leaf stays out
+    necrotic = leaf & ~healthy & (val < 0.25)
+    lesion = (discoloured | necrotic) & leaf
+    # Opening removes isolated speckles (noise, specular highlights)
+    lesion = _dilate(_erode(lesion, 1), 1) & leaf
+    return leaf, lesion
+
+
+def estimate(batch: np.ndarray) -> List[Dict[str, Any]]:
+    """Severity report per image: lesion fraction of the leaf area and a level"""
+    leaf, lesion = segment(batch)
+    n = leaf.shape[0]
+    leaf_px = leaf.reshape(n, -1).sum(axis=1)
+    lesion_px = lesion.reshape(n, -1).sum(axis=1)
+    fraction = np.where(leaf_px > 0, lesion_px / np.maximum(leaf_px, 1), 0.0)
+    coverage = leaf_px / float(leaf.shape[1] * leaf.shape[2])
+    reports = []
+    for i in range(n):
+        f = float(fraction[i])
+        reports.append({
+            'severity': 'High' if f >= HIGH_FRACTION else 'Medium' if f >= MEDIUM_FRACTION else 'Low',
+            'lesion_fraction': round(f, 4),
+            'leaf_coverage': round(float(coverage[i]), 4),
+        })
+    return reports
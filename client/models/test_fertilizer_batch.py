@@ -0,0 +1,76 @@
+import csv
+import math
+
+import numpy as np
+
+from fertilizer_batch import DOSE_COLUMNS, SOIL_FIELDS, recommend_batch, row_doses, run
+from fertilizer_rec import fertilizer_recommendation
+from crop_advisory.fertilizer_tables import get_tables
+
+FLAG_TEXT = {
+    'iron_low': 'Iron low',
+    'copper_low': 'Copper low',
+    'manganese_low': 'Manganese low',
+    'alkaline': 'alkaline',
+    'saline': 'saline',
+}
+
+
+def random_farms(n, seed=0):
+    """Farms scattered around each crop's thresholds so every rule fires both ways"""
+    tables = get_tables()
+    rng = np.random.default_rng(seed)
+    crops = list(rng.choice(tables.crops + ['Dragonfruit'], size=n))
+    regions = list(rng.choice(['', 'Punjab', 'kerala', 'Atlantis'], size=n))
+    soil = {k: [] for k in SOIL_FIELDS}
+    for crop, region in zip(crops, regions):
+        thresholds = tables.thresholds(crop, region or None) or tables.thresholds(tables.crops[0])
+        for k in SOIL_FIELDS:
+            if k in thresholds:
+                # One decimal place makes exact ties and half-kg deficits common
+                soil[k].append(round(thresholds[k] * rng.uniform(0.3, 1.3), 1))
+        soil['OC'].append(round(rng.uniform(0.2, 1.0), 2))
+        soil['pH'].append(round(rng.uniform(6.0, 9.5), 1))
+        soil['EC'].append(round(rng.uniform(0.5, 6.0), 1))
+    return crops, soil, regions
+
+
+def test_batch_matches_scalar_recommendation():
+    crops, soil, regions = random_farms(600)
+    result = recommend_batch(crops, soil, regions)
+    for i, (crop, region) in enumerate(zip(crops, regions)):
+        farm = {k: soil[k][i] for k in SOIL_FIELDS}
+        recommendations, doses = fertilizer_recommendation(crop, farm, region or None)
+        if isinstance(recommendations, str):
+            assert not result['supported'][i]
+            continue
+        assert row_doses(result, i) == doses, (crop, region, farm)
+        for column, text in FLAG_TEXT.items():
+            assert bool(result[column][i]) == any(text in r for r in recommendations), (column, crop, farm)
+
+
+def test_missing_values_never_recommend():
+    crop = get_tables().crops[0]
+    soil = {k: [math.nan] for k in SOIL_FIELDS}
+    result = recommend_batch([crop], soil)
+    assert result['supported'][0]
+    assert row_doses(result, 0) == {}
+    assert not any(result[c][0] for c in FLAG_TEXT)
+
+
+def test_csv_run_round_trips_chunks(tmp_path):
+    crops, soil, regions = random_farms(50, seed=1)
+    source = tmp_path / 'cards.csv'
+    with open(source, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['farm', 'crop', 'region'] + list(SOIL_FIELDS))
+        for i in range(len(crops)):
+            writer.writerow([f'f{i}', crops[i], regions[i]] + [soil[k][i] for k in SOIL_FIELDS])
+    output = tmp_path / 'out.csv'
+    assert run(str(source), str(output), chunk_size=7, keep_columns=['farm']) == 50
+    expected = recommend_batch(crops, soil, regions)
+    with open(output, newline='') as f:
+        rows = list(csv.DictReader(f))
+    assert [r['farm'] for r in rows] == [f'f{i}' for i in range(50)]
+    for i, row in enumerate(rows):
+        assert {c: int(row[c]) for c in DOSE_COLUMNS if row[c]} == row_doses(expected, i)
@@ -0,0 +1,81 @@
+import copy
+import itertools
+import json
+
+import numpy as np
+
+from crop_advisory.fertilizer_optimizer import MIX_NUTRIENTS, MixOptimizer, get_optimizer
+from crop_advisory.fertilizer_tables import TABLES_PATH, FertilizerTables
+
+
+def table_data():
+    with open(TABLES_PATH) as f:
+        return json.load(f)
+
+
+def brute_force_cost(content, prices, deficit):
+    """Cheapest cover by enumerating every vertex of {x >= 0 : content.T x >= deficit}"""
+    A = content.T
+    m, p = A.shape
+    cols = np.hstack([A, -np.eye(m)])
+    costs = np.concatenate([prices, np.zeros(m)])
+    best = np.inf
+    for basis in itertools.combinations(range(p + m), m):
+        B = cols[:, basis]
+        if abs(np.linalg.det(B)) < 1e-12:
+            continue
+        x = np.linalg.solve(B, deficit)
+        if (x >= -1e-9).all():
+            best = min(best, costs[list(basis)] @ x)
+    return best
+
+
+def test_solve_matches_brute_force_and_covers_deficit():
+    content = np.array([[0.46, 0, 0, 0, 0, 0],
+                        [0.18, 0.46, 0, 0, 0, 0],
+                        [0, 0, 0.60, 0, 0, 0],
+                        [0.10, 0.26, 0.26, 0, 0, 0]])
+    prices = np.array([5.9, 27.0, 17.0, 24.0])
+    optimizer = MixOptimizer(['urea', 'dap', 'mop', 'npk'], content, prices)
+    rng = np.random.default_rng(0)
+    deficits = np.zeros((200, len(MIX_NUTRIENTS)))
+    deficits[:, :3] = rng.uniform(0, 120, size=(200, 3))
+    doses, unmet = optimizer.solve(deficits)
+    assert not unmet.any()
+    assert (doses @ content >= deficits - 1e-9).all()
+    for row in range(0, 200, 20):
+        # Whole-kg rounding costs at most one kg of each product over the LP optimum
+        optimum = brute_force_cost(content[:, :3], prices, deficits[row, :3])
+        assert optimum - 1e-6 <= doses[row] @ prices <= optimum + prices.sum()
+
+
+def test_unsupplied_nutrient_is_reported_unmet():
+    optimizer = MixOptimizer(['urea'], np.array([[0.46, 0, 0, 0, 0, 0]]), np.array([5.9]))
+    doses, unmet = optimizer.solve([[40, 0, 0, 0, 0.5, 0]])
+    assert doses[0, 0] >= 40 / 0.46
+    assert unmet[0].tolist() == [False, False, False, False, True, False]
+
+
+def test_optimizer_cache_follows_table_content_not_version():
+    data = table_data()
+    tables = FertilizerTables(data)
+    assert get_optimizer(tables) is get_optimizer(FertilizerTables(copy.deepcopy(data)))
+    # Halve urea's nitrogen without bumping "version"
+    edited = copy.deepcopy(data)
+    edited['products']['urea']['content']['N'] /= 2
+    edited_tables = FertilizerTables(edited)
+    optimizer = get_optimizer(edited_tables)
+    assert optimizer is not get_optimizer(tables)
+    content = np.array([[edited_tables.products[n].get(k, 0.0) for k in MIX_NUTRIENTS]
+                        for n in optimizer.products])
+    deficit = np.array([[120.0, 30.0, 20.0, 0, 0, 0]])
+    doses, _ = optimizer.solve(deficit)
+    assert (doses @ content >= deficit - 1e-9).all()
+
+
+def test_repricing_gets_its_own_optimizer():
+    tables = FertilizerTables(table_data())
+    base = get_optimizer(tables)
+    repriced = get_optimizer(tables, {'urea': tables.prices['urea'] * 10})
+    assert repriced is not base
+    assert get_optimizer(tables) is base
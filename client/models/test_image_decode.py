@@ -0,0 +1,43 @@
+import io
+import struct
+import zipfile
+
+import pytest
+
+from image_decode import UploadTooLarge, read_zip_images
+
+
+def make_zip(members):
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, 'w', zipfile.ZIP_DEFLATED) as zf:
+        for name, data in members:
+            zf.writestr(name, data)
+    return buf.getvalue()
+
+
+def test_reads_image_members_only_up_to_limit():
+    data = make_zip([('a.jpg', b'1' * 10), ('notes.txt', b'x'), ('b.PNG', b'2' * 10), ('c.png', b'3')])
+    assert read_zip_images(data, 2, 100, 1000) == [('a.jpg', b'1' * 10), ('b.PNG', b'2' * 10)]
+
+
+def test_rejects_member_over_the_image_cap_before_inflating():
+    bomb = make_zip([('leaf.jpg', b'\0' * (5 * 1024 * 1024))])
+    assert len(bomb) < 10 * 1024
+    with pytest.raises(UploadTooLarge):
+        read_zip_images(bomb, 10, 1024 * 1024, 100 * 1024 * 1024)
+
+
+def test_rejects_archive_over_the_total_budget():
+    data = make_zip([(f'{i}.jpg', b'\0' * 1000) for i in range(10)])
+    assert len(read_zip_images(data, 10, 1000, 10000)) == 10
+    with pytest.raises(UploadTooLarge):
+        read_zip_images(data, 10, 1000, 9999)
+
+
+def test_understated_header_size_is_still_capped():
+    data = bytearray(make_zip([('leaf.jpg', b'\0' * 50000)]))
+    # Shrink the uncompressed size recorded in the central directory
+    central = data.rindex(b'PK\x01\x02')
+    struct.pack_into('<I', data, central + 24, 100)
+    with pytest.raises((UploadTooLarge, zipfile.BadZipFile)):
+        read_zip_images(bytes(data), 10, 1000, 10000)
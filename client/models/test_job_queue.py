@@ -0,0 +1,105 @@
+import json
+import threading
+import time
+
+import pytest
+
+from job_queue import JobQueue, JobStore, QueueFull
+
+
+def wait_for(predicate, timeout=5.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_claim_is_won_once(tmp_path):
+    store = JobStore(str(tmp_path / 'jobs.db'))
+    job_id = store.create('{"x": 1}')
+    assert store.claim(job_id) == '{"x": 1}'
+    assert store.claim(job_id) is None
+    assert store.get(job_id)['status'] == 'running'
+
+
+def test_recover_requeues_only_stale_running_jobs(tmp_path):
+    store = JobStore(str(tmp_path / 'jobs.db'))
+    stale, fresh, queued = store.create('a'), store.create('b'), store.create('c')
+    store.claim(stale)
+    store.claim(fresh)
+    store._conn().execute('update jobs set updated_at = ? where id = ?', (time.time() - 600, stale))
+    assert set(store.recover(stale_after=300)) == {stale, queued}
+    assert store.get(fresh)['status'] == 'running'
+
+
+def test_prune_removes_only_expired_finished_jobs(tmp_path):
+    store = JobStore(str(tmp_path / 'jobs.db'))
+    old, recent, queued = store.create('a'), store.create('b'), store.create('c')
+    store.finish(old, result={'ok': True})
+    store.finish(recent, error='bad image')
+    store._conn().execute('update jobs set updated_at = ? where id = ?', (time.time() - 7200, old))
+    store.prune(older_than=3600)
+    assert store.get(old) is None
+    assert store.get(recent)['status'] == 'failed'
+    assert store.get(queued)['status'] == 'queued'
+
+
+def test_persisted_jobs_run_after_start(tmp_path):
+    store = JobStore(str(tmp_path / 'jobs.db'))
+    ids = [store.create(json.dumps({'n': n})) for n in range(5)]
+    jobs = JobQueue(store, lambda payload: {'double': json.loads(payload)['n'] * 2},
+                    workers=2, capacity=4, idle_rescan=0.05)
+    jobs.start()
+    assert wait_for(lambda: all(store.get(i)['status'] == 'done' for i in ids))
+    assert [store.get(i)['result']['double'] for i in ids] == [0, 2, 4, 6, 8]
+
+
+def test_handler_value_error_fails_the_job(tmp_path):
+    def handler(payload):
+        raise ValueError('No image provided')
+    jobs = JobQueue(JobStore(str(tmp_path / 'jobs.db')), handler, workers=1)
+    job_id = jobs.submit('{}')
+    assert wait_for(lambda: jobs.store.get(job_id)['status'] == 'failed')
+    assert jobs.store.get(job_id)['error'] == 'No image provided'
+
+
+def test_long_running_worker_keeps_pruning(tmp_path):
+    store = JobStore(str(tmp_path / 'jobs.db'))
+    jobs = JobQueue(store, lambda payload: {}, workers=1, ttl=0.2, idle_rescan=0.05, prune_interval=0.1)
+    first = jobs.submit('{}')
+    assert wait_for(lambda: store.get(first) is None)
+    second = jobs.submit('{}')
+    assert wait_for(lambda: store.get(second) is None)
+
+
+def test_rescan_skips_queued_ids_and_respects_limit(tmp_path):
+    store = JobStore(str(tmp_path / 'jobs.db'))
+    release = threading.Event()
+    jobs = JobQueue(store, lambda payload: release.wait(5) and {}, workers=1, capacity=4, idle_rescan=60)
+    jobs.start()
+    # Jobs another process created and holds in its own queue
+    for _ in range(10):
+        store.create('{}')
+    assert jobs._requeue(2) == 2
+    assert jobs._requeue(2) == 2
+    assert jobs.depth() <= 4
+    # Repeated rescans never add an id that is already waiting here
+    queued = list(jobs._queue.queue)
+    assert len(queued) == len(set(queued))
+    release.set()
+
+
+def test_submit_raises_queue_full_and_drops_the_row(tmp_path):
+    store = JobStore(str(tmp_path / 'jobs.db'))
+    release = threading.Event()
+    jobs = JobQueue(store, lambda payload: release.wait(5) and {}, workers=1, capacity=1, idle_rescan=60)
+    jobs.submit('{}')
+    assert wait_for(lambda: jobs.depth() == 0)
+    jobs.submit('{}')
+    with pytest.raises(QueueFull) as full:
+        jobs.submit('{}')
+    assert full.value.retry_after >= 1
+    assert store._conn().execute('select count(*) from jobs').fetchone()[0] == 2
+    release.set()
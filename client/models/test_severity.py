@@ -0,0 +1,29 @@
+import numpy as np
+
+from severity import estimate
+
+
+def leaf_image(rgb, background=(245, 245, 245)):
+    """224x224 image with a leaf-coloured square on a plain background"""
+    image = np.empty((224, 224, 3), dtype=np.uint8)
+    image[:] = background
+    image[32:192, 32:192] = rgb
+    return image
+
+
+def test_shaded_healthy_leaf_has_no_lesions():
+    report = estimate(leaf_image((30, 51, 20))[None])[0]
+    assert report['leaf_coverage'] > 0.4
+    assert report['lesion_fraction'] < 0.01
+    assert report['severity'] == 'Low'
+
+
+def test_dark_necrotic_spots_still_count():
+    image = leaf_image((60, 150, 40))
+    # Spots small enough for the closing step to keep them inside the leaf
+    for y in range(40, 176, 24):
+        for x in range(40, 176, 24):
+            image[y:y + 8, x:x + 8] = (25, 18, 12)
+    report = estimate(image[None])[0]
+    assert 0.05 < report['lesion_fraction'] < 0.25
+    assert report['severity'] == 'Medium'
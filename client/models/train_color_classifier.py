@@ -0,0 +1,80 @@
+"""
+Train the NumPy colour-feature fallback classifier for disease detection.
+
+The dataset folder holds one sub-folder per class, named like the entries of
+DISEASE_CLASSES (the PlantVillage layout), e.g.:
+
+    dataset/Tomato___Late_blight/img001.jpg
+    dataset/Tomato___healthy/img002.jpg
+
+Usage (from client/models):
+    python train_color_classifier.py dataset --out color_model.npz
+"""
+
+import argparse
+import os
+import sys
+
+import numpy as np
+
+import color_features
+import image_decode
+
+
+def iter_labeled_images(root):
+    for label in sorted(os.listdir(root)):
+        folder = os.path.join(root, label)
+        if not os.path.isdir(folder):
+            continue
+        for name in sorted(os.listdir(folder)):
+            if name.lower().endswith(image_decode.IMAGE_EXTENSIONS):
+                yield label, os.path.join(folder, name)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('dataset', help='folder with one sub-folder of images per class')
+    parser.add_argument('--out', default='color_model.npz', help='output .npz path')
+    parser.add_argument('--batch-size', type=int, default=256)
+    args = parser.parse_args(argv)
+
+    classes, labels, features = [], [], []
+    pending, pending_labels = [], []
+
+    def flush():
+        if pending:
+            features.append(color_features.extract_features(np.stack(pending)))
+            labels.extend(pending_labels)
+            pending.clear()
+            pending_labels.clear()
+
+    for label, path in iter_labeled_images(args.dataset):
+        if label not in classes:
+            classes.append(label)
+        try:
+            with open(path, 'rb') as f:
+                pending.append(image_decode.decode_image_bytes(f.read()))
+        except Exception as e:
+            print(f"⚠️ Skipping {path}: {e}")
+            continue
+        pending_labels.append(classes.index(label))
+        if len(pending) >= args.batch_size:
+            flush()
+    flush()
+
+    if not features:
+        print("❌ No images found")
+        return 1
+
+    X = np.vstack(features)
+    y = np.asarray(labels)
+    model = color_features.fit_classifier(X, y, classes)
+    accuracy = float((model.predict_proba(X).argmax(axis=1) == y).mean())
+    model.save(args.out)
+    print(f"✅ Trained on {len(y)} images, {len(classes)} classes (train accuracy {accuracy:.2%})")
+    print(f"✅ Saved {args.out}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,8 +1,27 @@
+export type SoilTest = {
+  N?: number
+  P?: number
+  K?: number
+  S?: number
+  Zn?: number
+  B?: number
+}
+
 export type AdvisoryRequest = {
   lat: number
   lon: number
   past_crop?: string
   date?: string // YYYY-MM-DD
+  soil_test?: SoilTest // adds per-crop fertilizer cost to the ranking
+  region?: string // state whose fertilizer threshold overrides apply
+}
+
+export type FertilizerPlan = {
+  doses?: Record<string, number>
+  cost_per_ha?: number
+  currency?: string
+  unmet?: string[] // nutrients no priced product supplies
+  error?: string // set instead of a plan when pricing failed
 }
 
 export type SoilAnalysis = {
@@ -28,6 +47,8 @@ export type Recommendation = {
   rainfall_range?: string
   soil_types?: string[]
   rotation_benefit?: string
+  fertilizer?: FertilizerPlan
+  cost_adjusted_score?: number
 }
 
 export type AdvisoryResponse = {
@@ -41,6 +62,22 @@ export type AdvisoryResponse = {
 
 const API_BASE = 'https://crop-advisory-gneg.onrender.com'
 
+// Last soil test entered on the fertilizer page, reused to price crops here
+const SOIL_TEST_KEY = 'soil-test'
+
+export function saveSoilTest(test: SoilTest) {
+  try { localStorage.setItem(SOIL_TEST_KEY, JSON.stringify(test)) } catch {}
+}
+
+export function loadSoilTest(): SoilTest | undefined {
+  try {
+    const raw = localStorage.getItem(SOIL_TEST_KEY)
+    return raw ? JSON.parse(raw) : undefined
+  } catch {
+    return undefined
+  }
+}
+
 export async function fetchCropAdvisory(body: AdvisoryRequest): Promise<AdvisoryResponse> {
   const base = API_BASE.replace(/\/$/, '')
   const attempts: Array<{ url: string; payload: any }> = [
@@ -51,6 +88,8 @@ export async function fetchCropAdvisory(body: AdvisoryRequest): Promise<Advisory
         lon: body.lon,
         past_crop: body.past_crop || undefined,
         date: body.date || undefined,
+        soil_test: body.soil_test || undefined,
+        region: body.region || undefined,
       }
     }
   ]
@@ -106,11 +106,10 @@ export async function syncProfile(): Promise<boolean> {
   if (!supa) return false
   const p = loadProfile()
   try {
-    // Best-effort upsert; requires a 'profiles' table with matching columns
+    // Best-effort upsert; points are kept by the server's ledger and are read-only here
     const payload = {
       id: p.id,
       name: p.name ?? null,
-      points: p.points,
       quests_completed: p.completedQuests,
       updated_at: new Date().toISOString()
     }
@@ -20,6 +20,25 @@ export async function submitEvidence(args: { profileId: string; questId: string;
   return r.json()
 }
 
+async function postJson(path: string, body: any, what: string) {
+  const r = await fetch(`${base()}${path}`, { method:'POST', headers:{ 'Content-Type':'application/json' }, body: JSON.stringify(body) })
+  if (!r.ok) {
+    const ct = r.headers.get('content-type') || ''
+    if (ct.includes('application/json')) throw new Error((await r.json().catch(()=>null))?.error || `${what} failed (${r.status})`)
+    throw new Error((await r.text().catch(()=> '')) || `${what} failed (${r.status})`)
+  }
+  return r.json()
+}
+
+// Evidence image goes straight to storage through a signed URL; the server only records the row
+export async function uploadEvidence(args: { profileId: string; questId: string; file: File; notes?: string }) {
+  const contentType = args.file.type || 'image/jpeg'
+  const signed = await postJson('/api/review/evidence/upload-url', { profileId: args.profileId, questId: args.questId, contentType }, 'Upload') as { uploadUrl: string; path: string }
+  const put = await fetch(signed.uploadUrl, { method:'PUT', headers:{ 'Content-Type': contentType, 'x-upsert': 'false' }, body: args.file })
+  if (!put.ok) throw new Error(`Upload failed (${put.status})`)
+  return postJson('/api/review/evidence/finalize', { profileId: args.profileId, questId: args.questId, path: signed.path, notes: args.notes }, 'Submit') as Promise<{ ok: boolean; id: string; status: EvidenceStatus; imageUrl: string }>
+}
+
 export async function getEvidenceStatus(profileId: string) {
   const url = `${base()}/api/review/evidence/status?profileId=${encodeURIComponent(profileId)}`
   const r = await fetch(url)
@@ -35,8 +54,18 @@ export async function getEvidenceStatus(profileId: string) {
   return r.json() as Promise<{ ok: boolean; byQuest: Record<string, { status: EvidenceStatus; id: string; imageUrl?: string; notes?: string }> }>
 }
 
-export async function adminList(params: { status?: EvidenceStatus | 'all' } = {}) {
-  const url = `${base()}/api/review/admin/evidence${params.status ? `?status=${params.status}` : ''}`
+// Admin lists are newest-first pages; pass the previous page's nextCursor to get older rows
+export type PageParams = { cursor?: string | null; limit?: number }
+
+function pageQuery(params: Record<string, string | number | null | undefined>) {
+  const q = new URLSearchParams()
+  for (const [k, v] of Object.entries(params)) if (v !== undefined && v !== null && v !== '') q.set(k, String(v))
+  const s = q.toString()
+  return s ? `?${s}` : ''
+}
+
+export async function adminList(params: { status?: EvidenceStatus | 'all' } & PageParams = {}) {
+  const url = `${base()}/api/review/admin/evidence${pageQuery({ status: params.status, cursor: params.cursor, limit: params.limit })}`
   const pwd = (typeof window !== 'undefined' && window.sessionStorage ? sessionStorage.getItem('adminPassword') : null) || (import.meta as any).env?.VITE_ADMIN_KEY || ''
   const r = await fetch(url, { headers: { 'X-Admin-Key': pwd } })
   if (!r.ok) {
@@ -48,7 +77,7 @@ export async function adminList(params: { status?: EvidenceStatus | 'all' } = {}
       throw new Error(txt || `List failed (${r.status})`)
     }
   }
-  return r.json()
+  return r.json() as Promise<{ ok: boolean; items: any[]; nextCursor: string | null }>
 }
 
 export async function adminDecision(args: { id: string; decision: EvidenceStatus; reward?: number }) {
@@ -104,6 +133,20 @@ export async function getProfileState(profileId: string) {
   return r.json() as Promise<{ ok: boolean; profile: { id: string; points: number; completedQuests: string[] }; ledger: any[]; claims: any[] }>
 }
 
+export type LeaderboardEntry = { rank: number; profileId: string; points: number }
+
+export async function getLeaderboard(top = 10) {
+  const r = await fetch(`${base()}/api/leaderboard?top=${top}`)
+  if (!r.ok) throw new Error(`Leaderboard failed (${r.status})`)
+  return r.json() as Promise<{ ok: boolean; ready: boolean; total: number; items: LeaderboardEntry[] }>
+}
+
+export async function getRank(profileId: string) {
+  const r = await fetch(`${base()}/api/leaderboard/rank?profileId=${encodeURIComponent(profileId)}`)
+  if (!r.ok) throw new Error(`Rank failed (${r.status})`)
+  return r.json() as Promise<{ ok: boolean; ready: boolean; profileId: string; rank: number; points: number; total: number }>
+}
+
 export async function claimQuest(args: { profileId: string; questId: string; reward: number; evidenceId?: string }) {
   const r = await fetch(`${base()}/api/quests/claim`, { method:'POST', headers:{ 'Content-Type':'application/json' }, body: JSON.stringify(args) })
   if (!r.ok) {
@@ -114,12 +157,12 @@ export async function claimQuest(args: { profileId: string; questId: string; rew
   return r.json() as Promise<{ ok: boolean; points: number; completedQuests: string[] }>
 }
 
-export async function adminListPosts() {
-  const url = `${base()}/api/admin/posts`
+export async function adminListPosts(params: PageParams = {}) {
+  const url = `${base()}/api/admin/posts${pageQuery({ cursor: params.cursor, limit: params.limit })}`
   const pwd = (typeof window !== 'undefined' && window.sessionStorage ? sessionStorage.getItem('adminPassword') : null) || (import.meta as any).env?.VITE_ADMIN_KEY || ''
   const r = await fetch(url, { headers: { 'X-Admin-Key': pwd } })
   if (!r.ok) throw new Error(`Posts list failed (${r.status})`)
-  return r.json()
+  return r.json() as Promise<{ ok: boolean; items: any[]; nextCursor: string | null }>
 }
 export async function adminDeletePost(id: string) {
   const url = `${base()}/api/admin/posts/delete`
@@ -128,12 +171,12 @@ export async function adminDeletePost(id: string) {
   if (!r.ok) throw new Error(`Post delete failed (${r.status})`)
   return r.json()
 }
-export async function adminListFeedback() {
-  const url = `${base()}/api/admin/feedback`
+export async function adminListFeedback(params: PageParams = {}) {
+  const url = `${base()}/api/admin/feedback${pageQuery({ cursor: params.cursor, limit: params.limit })}`
   const pwd = (typeof window !== 'undefined' && window.sessionStorage ? sessionStorage.getItem('adminPassword') : null) || (import.meta as any).env?.VITE_ADMIN_KEY || ''
   const r = await fetch(url, { headers: { 'X-Admin-Key': pwd } })
   if (!r.ok) throw new Error(`Feedback list failed (${r.status})`)
-  return r.json()
+  return r.json() as Promise<{ ok: boolean; items: any[]; nextCursor: string | null }>
 }
 export async function adminDeleteFeedback(id: string) {
   const url = `${base()}/api/admin/feedback/delete`
@@ -142,3 +185,27 @@ export async function adminDeleteFeedback(id: string) {
   if (!r.ok) throw new Error(`Feedback delete failed (${r.status})`)
   return r.json()
 }
+
+// Bulk moderation: one request per action for any number of selected rows
+async function adminBulk(path: string, body: any, what: string) {
+  const pwd = (typeof window !== 'undefined' && window.sessionStorage ? sessionStorage.getItem('adminPassword') : null) || (import.meta as any).env?.VITE_ADMIN_KEY || ''
+  const r = await fetch(`${base()}${path}`, { method:'POST', headers:{ 'Content-Type':'application/json', 'X-Admin-Key': pwd }, body: JSON.stringify(body) })
+  if (!r.ok) {
+    const ct = r.headers.get('content-type') || ''
+    if (ct.includes('application/json')) throw new Error((await r.json().catch(()=>null))?.error || `${what} failed (${r.status})`)
+    throw new Error(`${what} failed (${r.status})`)
+  }
+  return r.json()
+}
+export async function adminBulkDecision(ids: string[], decision: EvidenceStatus) {
+  return adminBulk('/api/review/admin/evidence/decision/bulk', { ids, decision }, 'Bulk decision') as Promise<{ ok: boolean; updated: number }>
+}
+export async function adminBulkDelete(ids: string[]) {
+  return adminBulk('/api/review/admin/evidence/delete/bulk', { ids }, 'Bulk delete') as Promise<{ ok: boolean; deleted: number }>
+}
+export async function adminBulkDeletePosts(ids: string[]) {
+  return adminBulk('/api/admin/posts/delete/bulk', { ids }, 'Bulk post delete') as Promise<{ ok: boolean; deleted: number }>
+}
+export async function adminBulkDeleteFeedback(ids: string[]) {
+  return adminBulk('/api/admin/feedback/delete/bulk', { ids }, 'Bulk feedback delete') as Promise<{ ok: boolean; deleted: number }>
+}
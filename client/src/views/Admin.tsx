@@ -1,8 +1,8 @@
 import { useEffect, useState, FormEvent } from 'react'
-import { adminDecision, adminDelete, adminList, adminRevoke, adminListPosts, adminDeletePost, adminListFeedback, adminDeleteFeedback } from '../lib/review'
+import { adminDecision, adminDelete, adminList, adminRevoke, adminListPosts, adminDeletePost, adminListFeedback, adminDeleteFeedback, adminBulkDecision, adminBulkDelete, adminBulkDeletePosts, adminBulkDeleteFeedback } from '../lib/review'
 import { QUESTS } from '../lib/quests'
 
-type Item = { id: string; profile_id: string; quest_id: string; image_url?: string; notes?: string; status: string; created_at?: string }
+type Item = { id: string; profile_id: string; quest_id: string; image_url?: string; thumb_url?: string; display_url?: string; notes?: string; status: string; created_at?: string }
 
 export default function Admin(){
   const [items, setItems] = useState<Item[]>([])
@@ -18,25 +18,45 @@ export default function Admin(){
   const [confirmId, setConfirmId] = useState<string|null>(null)
   const [confirmDeleteId, setConfirmDeleteId] = useState<string|null>(null)
   const [confirmResetId, setConfirmResetId] = useState<string|null>(null)
+  const [nextCursor, setNextCursor] = useState<string|null>(null)
+  const [loadingMore, setLoadingMore] = useState(false)
+  const [selected, setSelected] = useState<Set<string>>(new Set())
 
   const statuses: Array<'pending'|'approved'|'rejected'|'all'> = ['pending','approved','rejected','all']
 
   const load = async () => {
     setErr(null)
     setLoading(true)
+    setSelected(new Set())
     try {
       if (tab==='evidence') {
-        const r = await adminList({ status }); setItems(r.items || [])
+        const r = await adminList({ status }); setItems(r.items || []); setNextCursor(r.nextCursor || null)
       } else if (tab==='community') {
-        const r = await adminListPosts(); setPosts(r.items || [])
+        const r = await adminListPosts(); setPosts(r.items || []); setNextCursor(r.nextCursor || null)
       } else if (tab==='feedback') {
-        const r = await adminListFeedback(); setFeedback(r.items || [])
+        const r = await adminListFeedback(); setFeedback(r.items || []); setNextCursor(r.nextCursor || null)
       }
     }
     catch(e:any){ setErr(String(e?.message||e)) }
     finally { setLoading(false) }
   }
 
+  const loadMore = async () => {
+    if (!nextCursor) return
+    setLoadingMore(true)
+    try {
+      if (tab==='evidence') {
+        const r = await adminList({ status, cursor: nextCursor }); setItems(prev => [...prev, ...(r.items || [])]); setNextCursor(r.nextCursor || null)
+      } else if (tab==='community') {
+        const r = await adminListPosts({ cursor: nextCursor }); setPosts(prev => [...prev, ...(r.items || [])]); setNextCursor(r.nextCursor || null)
+      } else if (tab==='feedback') {
+        const r = await adminListFeedback({ cursor: nextCursor }); setFeedback(prev => [...prev, ...(r.items || [])]); setNextCursor(r.nextCursor || null)
+      }
+    }
+    catch(e:any){ setErr(String(e?.message||e)) }
+    finally { setLoadingMore(false) }
+  }
+
   useEffect(()=>{ if (authed) load() }, [status, authed, tab])
 
   const login = (e: FormEvent) => {
@@ -48,6 +68,39 @@ export default function Admin(){
     setErr(null)
   }
 
+  const toggle = (id: string) => setSelected(prev => { const next = new Set(prev); if (next.has(id)) next.delete(id); else next.add(id); return next })
+  const visibleIds = tab==='evidence' ? items.map(i=>i.id) : tab==='community' ? posts.map(p=>p.id) : feedback.map(f=>f.id)
+  const allSelected = visibleIds.length > 0 && visibleIds.every(id => selected.has(id))
+
+  const bulkDecision = async (decision: 'approved'|'rejected') => {
+    const ids = Array.from(selected)
+    if (!ids.length || !confirm(`${decision==='approved'?'Approve':'Reject'} ${ids.length} item(s)?`)) return
+    try { await adminBulkDecision(ids, decision); await load() }
+    catch(e:any){ alert(String(e?.message||e)) }
+  }
+  const bulkDelete = async () => {
+    const ids = Array.from(selected)
+    if (!ids.length || !confirm(`Delete ${ids.length} item(s)? This cannot be undone.`)) return
+    try {
+      if (tab==='evidence') {
+        // Approved evidence carries awarded points, so it goes through revoke like a single delete
+        const approved = items.filter(it => selected.has(it.id) && it.status==='approved')
+        for (const it of approved) {
+          const reward = QUESTS.find(q=>q.id===it.quest_id)?.reward || 0
+          await adminRevoke({ profileId: it.profile_id, questId: it.quest_id, points: reward, deleteEvidence: true })
+        }
+        const rest = ids.filter(id => !approved.some(it => it.id===id))
+        if (rest.length) await adminBulkDelete(rest)
+      } else if (tab==='community') {
+        await adminBulkDeletePosts(ids)
+      } else {
+        await adminBulkDeleteFeedback(ids)
+      }
+      await load()
+    }
+    catch(e:any){ alert(String(e?.message||e)) }
+  }
+
   const doDecision = async (id: string, decision: 'approved'|'rejected') => {
     try { await adminDecision({ id, decision }); await load() }
     catch(e:any){ alert(String(e?.message||e)) }
@@ -98,6 +151,21 @@ export default function Admin(){
           </div>
           <button className="secondary" onClick={load}>Refresh</button>
         </div>}
+        {!loading && visibleIds.length > 0 && (
+          <div style={{display:'flex', gap:8, alignItems:'center', marginBottom:12, flexWrap:'wrap'}}>
+            <label style={{display:'inline-flex', gap:6, alignItems:'center'}}>
+              <input type="checkbox" checked={allSelected} onChange={()=>setSelected(allSelected ? new Set() : new Set(visibleIds))} /> Select all
+            </label>
+            {selected.size > 0 && <>
+              <small className="muted">{selected.size} selected</small>
+              {tab==='evidence' && <>
+                <button className="secondary" onClick={()=>bulkDecision('rejected')}>Reject selected</button>
+                <button onClick={()=>bulkDecision('approved')}>Approve selected</button>
+              </>}
+              <button className="danger" onClick={bulkDelete}>Delete selected</button>
+            </>}
+          </div>
+        )}
         {err && <p className="text-danger">{err}</p>}
         {loading ? (
           <div style={{display:'flex', alignItems:'center', gap:10}}>
@@ -112,7 +180,7 @@ export default function Admin(){
             {items.map(it=> (
               <div className="card" key={it.id}>
                 <div className="row" style={{marginBottom:8}}>
-                  <div className="col"><b>Profile:</b> {it.profile_id}</div>
+                  <div className="col"><input type="checkbox" checked={selected.has(it.id)} onChange={()=>toggle(it.id)} style={{marginRight:6}} /><b>Profile:</b> {it.profile_id}</div>
                   <div className="col" style={{textAlign:'right'}}>
                     <span className={`tag ${it.status==='approved'?'success':it.status==='rejected'?'danger':'warning'}`}>{it.status}</span>
                   </div>
@@ -122,9 +190,9 @@ export default function Admin(){
                   {it.created_at && <div className="col" style={{textAlign:'right'}}><small className="muted">{new Date(it.created_at).toLocaleString()}</small></div>}
                 </div>
                 {it.image_url && <div style={{marginTop:8}}>
-                  <img src={it.image_url} alt="evidence" style={{maxHeight:240, objectFit:'contain', border:'1px solid var(--panel-border)'}} />
+                  <img src={it.thumb_url || it.image_url} alt="evidence" loading="lazy" style={{maxHeight:240, objectFit:'contain', border:'1px solid var(--panel-border)'}} />
                   <div style={{display:'flex', gap:8, marginTop:6}}>
-                    <a className="secondary" href={it.image_url} target="_blank" rel="noreferrer">Open</a>
+                    <a className="secondary" href={it.display_url || it.image_url} target="_blank" rel="noreferrer">Open</a>
                     <button className="secondary" onClick={()=>{ navigator.clipboard.writeText(it.image_url||'') }}>Copy Link</button>
                   </div>
                 </div>}
@@ -155,7 +223,7 @@ export default function Admin(){
             {posts.length===0 && <p className="muted">No posts.</p>}
             {posts.map(p=> (
               <div className="card" key={p.id}>
-                <div className="row"><div className="col"><b>{p.author||'Anon'}</b></div><div className="col" style={{textAlign:'right'}}>{p.created_at? new Date(p.created_at).toLocaleString(): ''}</div></div>
+                <div className="row"><div className="col"><input type="checkbox" checked={selected.has(p.id)} onChange={()=>toggle(p.id)} style={{marginRight:6}} /><b>{p.author||'Anon'}</b></div><div className="col" style={{textAlign:'right'}}>{p.created_at? new Date(p.created_at).toLocaleString(): ''}</div></div>
                 <p>{p.content}</p>
                 <div style={{textAlign:'right'}}>
                   <button className="danger" onClick={async()=>{ if (!confirm('Delete this post?')) return; try{ await adminDeletePost(p.id); await load() }catch(e:any){ alert(String(e?.message||e)) } }}>Delete</button>
@@ -170,7 +238,7 @@ export default function Admin(){
             {feedback.length===0 && <p className="muted">No feedback.</p>}
             {feedback.map(f=> (
               <div className="card" key={f.id}>
-                <div className="row"><div className="col">Rating: <b>{f.rating}</b></div><div className="col" style={{textAlign:'right'}}>{f.created_at? new Date(f.created_at).toLocaleString(): ''}</div></div>
+                <div className="row"><div className="col"><input type="checkbox" checked={selected.has(f.id)} onChange={()=>toggle(f.id)} style={{marginRight:6}} />Rating: <b>{f.rating}</b></div><div className="col" style={{textAlign:'right'}}>{f.created_at? new Date(f.created_at).toLocaleString(): ''}</div></div>
                 <p>{f.comment}</p>
                 <div style={{textAlign:'right'}}>
                   <button className="danger" onClick={async()=>{ if (!confirm('Delete this feedback?')) return; try{ await adminDeleteFeedback(f.id); await load() }catch(e:any){ alert(String(e?.message||e)) } }}>Delete</button>
@@ -179,6 +247,12 @@ export default function Admin(){
             ))}
           </div>
         )}
+
+        {!loading && nextCursor && (
+          <div style={{textAlign:'center', marginTop:12}}>
+            <button className="secondary" onClick={loadMore} disabled={loadingMore}>{loadingMore ? 'Loading...' : 'Load more'}</button>
+          </div>
+        )}
       </section>
       {confirmId && (
         <>
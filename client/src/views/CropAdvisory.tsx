@@ -1,5 +1,5 @@
 import { useEffect, useMemo, useState } from 'react'
-import { fetchCropAdvisory } from '../lib/advisory'
+import { fetchCropAdvisory, loadSoilTest } from '../lib/advisory'
 import { trackEvent } from '../lib/analytics'
 import { motion, AnimatePresence } from 'framer-motion'
 
@@ -8,18 +8,23 @@ type FormState = {
   lon: string
   past_crop: string
   date: string
+  region: string
 }
 
 const crops = [
   'Wheat','Rice','Paddy','Maize','Corn','Cotton','Mustard','Soybean','Sugarcane','Pulses','Groundnut','Millet','Barley','Sorghum','Potato','Onion','Tomato'
 ]
 
+// States with their own fertilizer thresholds in fertilizer_tables.json
+const regions = ['Punjab','Haryana','Maharashtra','Rajasthan','Kerala']
+
 export default function CropAdvisory(){
   const [form, setForm] = useState<FormState>(()=>({
     lat: '28.6139', // Delhi default
     lon: '77.2090',
     past_crop: 'Wheat',
-    date: new Date().toISOString().slice(0,10)
+    date: new Date().toISOString().slice(0,10),
+    region: ''
   }))
 
   // Auto-detect user location on mount
@@ -54,7 +59,8 @@ export default function CropAdvisory(){
       const result = await fetchCropAdvisory({
         ...form,
         lat: Number(form.lat),
-        lon: Number(form.lon)
+        lon: Number(form.lon),
+        soil_test: loadSoilTest()
       })
       setResp(result)
       setSoil(result?.soil || null)
@@ -97,6 +103,13 @@ export default function CropAdvisory(){
                 {crops.map((c: string) => <option key={c} value={c}>{c}</option>)}
               </select>
             </div>
+            <div className="col">
+              <label>State (optional)</label>
+              <select value={form.region} onChange={e=>update('region', e.target.value)}>
+                <option value="">Other / national</option>
+                {regions.map((r: string) => <option key={r} value={r}>{r}</option>)}
+              </select>
+            </div>
             <div className="col">
               <label>Date (optional)</label>
               <input type="date" value={form.date} onChange={e=>update('date', e.target.value)} />
@@ -178,6 +191,13 @@ export default function CropAdvisory(){
                         {r.temp_range ? (<p className="muted">Temp range: {r.temp_range}</p>) : null}
                         {r.rainfall_range ? (<p className="muted">Rainfall: {r.rainfall_range}</p>) : null}
                         {r.rotation_benefit ? (<p className="muted">Rotation: {r.rotation_benefit}</p>) : null}
+                        {r.fertilizer?.error ? (<p className="muted">Fertilizer: {r.fertilizer.error}</p>) : null}
+                        {r.fertilizer && typeof r.fertilizer.cost_per_ha === 'number' ? (
+                          <p className="muted">
+                            Fertilizer: {r.fertilizer.currency === 'INR' ? '₹' : ''}{Math.round(r.fertilizer.cost_per_ha)}/ha
+                            {typeof r.cost_adjusted_score === 'number' ? ` · Cost-adjusted score: ${r.cost_adjusted_score}` : ''}
+                          </p>
+                        ) : null}
                       </motion.div>
                     ))}
                   </motion.div>
@@ -8,6 +8,7 @@ type Result = {
   treatments: string[]
   plant_type: string
   severity: string
+  lesion_area?: number
 }
 
 export default function PestDetect() {
@@ -168,6 +169,7 @@ export default function PestDetect() {
           </p>
           <p>
             <b>Severity:</b> {result.severity}
+            {typeof result.lesion_area === 'number' && ` (${(result.lesion_area * 100).toFixed(1)}% of leaf affected)`}
           </p>
           <p>
             <b>Confidence:</b>{' '}
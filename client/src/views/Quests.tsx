@@ -1,6 +1,6 @@
 import { useEffect, useMemo, useState } from 'react'
 import { trackEvent, getVerifiedSet, DEFAULT_RULES } from '../lib/analytics'
-import { getEvidenceStatus, submitEvidence, type EvidenceStatus, claimQuest } from '../lib/review'
+import { getEvidenceStatus, uploadEvidence, type EvidenceStatus, claimQuest } from '../lib/review'
 import { showToast } from '../ui/Toast'
 import { ensureOnlineSyncListener, getProfile, markQuestComplete, unmarkQuestComplete, deductPoints } from '../lib/profile'
 import { QUESTS } from '../lib/quests'
@@ -133,26 +133,22 @@ export default function Quests(){
 			const st = statusFor(q.id)
 			if (state.completed[q.id]) { setUploadErr((s: Record<string, string|undefined>)=>({ ...s, [q.id]: 'This quest is already completed. Upload not allowed.' })); showToast('Quest already completed. Upload not allowed.', 'warning'); return }
 			if (st === 'pending' || st === 'approved') { setUploadErr((s: Record<string, string|undefined>)=>({ ...s, [q.id]: 'Evidence is already submitted for review.' })); showToast('Evidence already submitted for this quest.', 'info'); return }
-		const reader = new FileReader()
 		setUploading((s: Record<string, boolean>)=>({ ...s, [q.id]: true }))
 		setUploadErr((s: Record<string, string|undefined>)=>({ ...s, [q.id]: undefined }))
-		reader.onload = async () => {
-			try {
-				const pid = getProfile().id
-				await submitEvidence({ profileId: pid, questId: q.id, imageData: String(reader.result) })
-				const r = await getEvidenceStatus(pid)
-				setEvidenceByQuest(r.byQuest || {})
+		try {
+			const pid = getProfile().id
+			await uploadEvidence({ profileId: pid, questId: q.id, file })
+			const r = await getEvidenceStatus(pid)
+			setEvidenceByQuest(r.byQuest || {})
 			setSelectedFile((s: Record<string, File|undefined>)=>({ ...s, [q.id]: undefined }))
-					showToast('Evidence uploaded. Awaiting review.', 'success')
-			} catch (e:any) {
-				const msg = String(e?.message||e)
-				setUploadErr((s: Record<string, string|undefined>)=>({ ...s, [q.id]: msg }))
-					showToast(msg, 'error')
-			} finally {
+			showToast('Evidence uploaded. Awaiting review.', 'success')
+		} catch (e:any) {
+			const msg = String(e?.message||e)
+			setUploadErr((s: Record<string, string|undefined>)=>({ ...s, [q.id]: msg }))
+			showToast(msg, 'error')
+		} finally {
 			setUploading((s: Record<string, boolean>)=>({ ...s, [q.id]: false }))
-			}
 		}
-		reader.readAsDataURL(file)
 	}
 
 		const completeQuest = async (q: Quest) => {
@@ -224,7 +220,7 @@ export default function Quests(){
 									<div className="col">
 										<label className="muted" style={{marginBottom:6}}>Evidence (image/screenshot)</label>
 										<div style={{display:'flex', gap:8, alignItems:'center', flexWrap:'wrap'}}>
-											<input id={`file-${q.id}`} type="file" accept="image/*" style={{display:'none'}} onChange={e=>{ const f=e.target.files?.[0]; setSelectedFile(s=>({ ...s, [q.id]: f })) }} />
+											<input id={`file-${q.id}`} type="file" accept="image/jpeg,image/png,image/webp" style={{display:'none'}} onChange={e=>{ const f=e.target.files?.[0]; setSelectedFile(s=>({ ...s, [q.id]: f })) }} />
 											<button type="button" className="secondary" onClick={()=> document.getElementById(`file-${q.id}`)?.click()} disabled={uploading[q.id]}>Choose Image</button>
 											<button type="button" onClick={()=>{ const f=selectedFile[q.id]; if (!f) { setUploadErr(s=>({ ...s, [q.id]: 'Please choose an image first.' })); return; } onUpload(q, f) }} disabled={!!uploading[q.id]}>Upload Evidence</button>
 											{selectedFile[q.id] && <span className="muted">{selectedFile[q.id]?.name}</span>}
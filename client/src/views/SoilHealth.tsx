@@ -1,5 +1,6 @@
 import React, { useState } from 'react';
 import { motion } from 'framer-motion';
+import { saveSoilTest } from '../lib/advisory';
 
 const crops = ['Wheat', 'Paddy', 'Maize', 'Cotton', 'Mustard'];
 
@@ -65,6 +66,8 @@ export default function SoilHealth() {
       const data = (await res.json()) as { status: string; data?: FertilizerResult; message?: string };
       if (data.status === 'success' && data.data) {
         setResult(data.data);
+        // Crop Advisory uses this to show fertilizer cost for every candidate crop
+        saveSoilTest({ N: form.N, P: form.P, K: form.K, S: form.S, Zn: form.Zn, B: form.B });
       } else {
         throw new Error(data.message || 'Failed to get recommendations');
       }
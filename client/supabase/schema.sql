@@ -41,8 +41,11 @@ create table if not exists public.posts (
 -- Indexes
 -- =====================
 create index if not exists prices_commodity_date_idx on public.prices (commodity, date desc);
-create index if not exists feedback_created_at_idx on public.feedback (created_at desc);
-create index if not exists posts_created_at_idx on public.posts (created_at desc);
+-- Admin lists page by keyset on (created_at, id)
+drop index if exists public.feedback_created_at_idx;
+drop index if exists public.posts_created_at_idx;
+create index if not exists feedback_created_at_id_idx on public.feedback (created_at desc, id desc);
+create index if not exists posts_created_at_id_idx on public.posts (created_at desc, id desc);
 
 -- =====================
 -- Row Level Security (RLS) & Policies
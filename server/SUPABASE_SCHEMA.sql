@@ -13,9 +13,28 @@ create table if not exists public.quest_evidence (
   decided_at timestamptz
 );
 
+-- WebP derivatives written by the server's background image pipeline
+alter table public.quest_evidence add column if not exists thumb_url text;
+alter table public.quest_evidence add column if not exists display_url text;
+
 -- Optional indexes
-create index if not exists idx_quest_evidence_profile on public.quest_evidence(profile_id);
-create index if not exists idx_quest_evidence_status on public.quest_evidence(status);
+-- (profile_id) lookups use idx_quest_evidence_profile_quest_created below
+drop index if exists public.idx_quest_evidence_profile;
+-- Admin review list: keyset pages on (created_at, id), optionally filtered by status
+drop index if exists public.idx_quest_evidence_status;
+create index if not exists idx_quest_evidence_status_created
+  on public.quest_evidence(status, created_at desc, id desc);
+create index if not exists idx_quest_evidence_created
+  on public.quest_evidence(created_at desc, id desc);
+
+-- Latest submission per (profile, quest), read by GET /api/review/evidence/status.
+-- Filtering the view on profile_id walks this index once per quest instead of the whole history.
+create index if not exists idx_quest_evidence_profile_quest_created
+  on public.quest_evidence(profile_id, quest_id, created_at desc);
+create or replace view public.latest_quest_evidence as
+  select distinct on (profile_id, quest_id) *
+  from public.quest_evidence
+  order by profile_id, quest_id, created_at desc;
 
 -- Enforce at-most-one active (pending/approved) submission per (profile_id, quest_id)
 create unique index if not exists uniq_active_evidence
@@ -35,5 +54,305 @@ end $$;
 
 -- No update/delete policy; only the server with service key performs updates
 
--- Profiles table must exist as earlier with columns: id text primary key, points int, quests_completed text[] or jsonb.
--- If you used jsonb for quests_completed, keep the backend reading/writing jsonb.
+-- Profiles table must exist as earlier with columns: id text primary key, points int, quests_completed jsonb.
+-- The functions below read and write quests_completed as jsonb. If you created it as text[], convert it once:
+--   alter table public.profiles alter column quests_completed type jsonb using to_jsonb(quests_completed);
+create table if not exists public.profiles (
+  id text primary key,
+  name text,
+  points int not null default 0,
+  quests_completed jsonb not null default '[]'::jsonb,
+  updated_at timestamptz not null default now()
+);
+-- Display name written by the app's profile sync
+alter table public.profiles add column if not exists name text;
+-- Last point_ledger seq assigned to this profile; bumping it serialises appends per user only
+alter table public.profiles add column if not exists ledger_seq bigint not null default 0;
+
+-- The server's in-memory leaderboard pulls profiles changed since its last sync
+create index if not exists idx_profiles_updated on public.profiles(updated_at, id);
+
+-- Claims and point ledger written by the server
+create table if not exists public.quest_claims (
+  id uuid primary key default gen_random_uuid(),
+  user_id text not null,
+  quest_id text not null,
+  reward int not null default 0,
+  status text not null default 'claimed' check (status in ('claimed','revoked')),
+  evidence_id uuid,
+  claimed_at timestamptz not null default now()
+);
+create index if not exists idx_quest_claims_user on public.quest_claims(user_id, claimed_at desc);
+-- Existing installs can already hold duplicate live claims from the double-claim race the index below
+-- closes; keep the earliest claim per (user, quest) and revoke the rest so the index can be built
+update public.quest_claims c set status = 'revoked'
+  where c.status = 'claimed'
+    and exists (select 1 from public.quest_claims e
+                where e.user_id = c.user_id and e.quest_id = c.quest_id and e.status = 'claimed'
+                  and (e.claimed_at, e.id) < (c.claimed_at, c.id));
+-- At most one live claim per (user, quest): the database rejects a second concurrent claim
+create unique index if not exists uniq_active_claim
+  on public.quest_claims(user_id, quest_id)
+  where status = 'claimed';
+
+-- =====================
+-- Points: the ledger is the source of truth
+-- =====================
+-- Every change to a balance is an appended point_ledger row numbered 1, 2, 3... per user (seq).
+-- A balance is its point_snapshots row plus the ledger entries after the snapshot's seq;
+-- compact_point_ledger() periodically rolls those tails into new snapshots.
+-- profiles.points is only a mirror of the balance, kept for the app's local-first profile sync.
+create table if not exists public.point_ledger (
+  id bigint generated always as identity primary key,
+  user_id text not null,
+  seq bigint not null,
+  delta int not null,
+  reason text,
+  source text,
+  evidence_id uuid,
+  created_at timestamptz not null default now()
+);
+
+-- One-time upgrade of a ledger created without seq: number the existing entries per user and add an
+-- opening-balance entry wherever profiles.points and the ledger disagree, so balances are unchanged.
+do $$ begin
+  if not exists (select 1 from information_schema.columns
+                 where table_schema = 'public' and table_name = 'point_ledger' and column_name = 'seq') then
+    alter table public.point_ledger add column seq bigint;
+    insert into public.point_ledger (user_id, delta, reason, source)
+      select p.id, coalesce(p.points, 0) - coalesce(l.total, 0), 'balance at ledger cutover', 'opening_balance'
+      from public.profiles p
+      left join (select user_id, sum(delta) as total from public.point_ledger group by user_id) l on l.user_id = p.id
+      where coalesce(p.points, 0) <> coalesce(l.total, 0);
+    update public.point_ledger l set seq = n.rn
+      from (select id, row_number() over (partition by user_id order by created_at, id) as rn
+            from public.point_ledger) n
+      where l.id = n.id;
+    insert into public.profiles (id) select distinct user_id from public.point_ledger on conflict (id) do nothing;
+    update public.profiles p set ledger_seq = m.seq
+      from (select user_id, max(seq) as seq from public.point_ledger group by user_id) m
+      where m.user_id = p.id;
+    alter table public.point_ledger alter column seq set not null;
+  end if;
+end $$;
+
+drop index if exists public.idx_point_ledger_user;
+create unique index if not exists uniq_point_ledger_user_seq on public.point_ledger(user_id, seq);
+
+create or replace function public.point_ledger_append_only()
+returns trigger
+language plpgsql
+as $$
+begin
+  raise exception 'point_ledger is append-only';
+end $$;
+drop trigger if exists point_ledger_append_only on public.point_ledger;
+create trigger point_ledger_append_only before update or delete on public.point_ledger
+  for each row execute function public.point_ledger_append_only();
+
+create table if not exists public.point_snapshots (
+  user_id text primary key,
+  balance bigint not null,
+  seq bigint not null,
+  taken_at timestamptz not null default now()
+);
+
+-- Only the server (service role) reads or writes points directly
+alter table public.point_ledger enable row level security;
+alter table public.point_snapshots enable row level security;
+
+-- Balance = snapshot + ledger tail
+create or replace function public.point_balance(p_user_id text)
+returns bigint
+language sql
+stable
+as $$
+  select coalesce(s.balance, 0) + coalesce((
+      select sum(l.delta) from public.point_ledger l
+      where l.user_id = p_user_id and l.seq > coalesce(s.seq, 0)), 0)
+  from (select 1) one
+  left join public.point_snapshots s on s.user_id = p_user_id;
+$$;
+
+-- Balances for every profile; the server's leaderboard loads and syncs from this view
+create or replace view public.profile_points as
+  select p.id, p.updated_at, (coalesce(s.balance, 0) + coalesce(t.tail, 0))::int as points
+  from public.profiles p
+  left join public.point_snapshots s on s.user_id = p.id
+  left join lateral (
+    select sum(l.delta) as tail from public.point_ledger l
+    where l.user_id = p.id and l.seq > coalesce(s.seq, 0)
+  ) t on true;
+
+-- Append one ledger entry and return the new balance. Taking the next seq locks the user's profile row
+-- until commit, so appends for one user are ordered while different users never wait on each other.
+create or replace function public.append_points(p_user_id text, p_delta int, p_reason text, p_source text,
+                                                p_evidence_id uuid default null)
+returns bigint
+language plpgsql
+as $$
+declare
+  v_seq bigint;
+  v_balance bigint;
+begin
+  insert into public.profiles (id) values (p_user_id) on conflict (id) do nothing;
+  update public.profiles set ledger_seq = ledger_seq + 1, updated_at = now()
+    where id = p_user_id returning ledger_seq into v_seq;
+  insert into public.point_ledger (user_id, seq, delta, reason, source, evidence_id)
+    values (p_user_id, v_seq, p_delta, p_reason, p_source, p_evidence_id);
+  v_balance := public.point_balance(p_user_id);
+  update public.profiles set points = v_balance where id = p_user_id;
+  return v_balance;
+end $$;
+
+-- Roll ledger tails of at least p_min_tail entries into snapshots, in one set-based statement.
+-- Reads profiles.ledger_seq, which commits together with its ledger row, so each snapshot is exact;
+-- never moves a snapshot backwards, and concurrent runs skip instead of repeating the work.
+create or replace function public.compact_point_ledger(p_min_tail int default 20)
+returns int
+language plpgsql
+as $$
+declare
+  v_count int;
+begin
+  if not pg_try_advisory_xact_lock(hashtext('compact_point_ledger')) then
+    return 0;
+  end if;
+  insert into public.point_snapshots as s (user_id, balance, seq, taken_at)
+    select p.id, coalesce(prev.balance, 0) + coalesce(t.total, 0), p.ledger_seq, now()
+    from public.profiles p
+    left join public.point_snapshots prev on prev.user_id = p.id
+    cross join lateral (
+      select sum(l.delta) as total from public.point_ledger l
+      where l.user_id = p.id and l.seq > coalesce(prev.seq, 0) and l.seq <= p.ledger_seq
+    ) t
+    where p.ledger_seq - coalesce(prev.seq, 0) >= greatest(p_min_tail, 1)
+  on conflict (user_id) do update
+    set balance = excluded.balance, seq = excluded.seq, taken_at = excluded.taken_at
+    where excluded.seq > s.seq;
+  get diagnostics v_count = row_count;
+  return v_count;
+end $$;
+
+-- Atomic quest claim, called by POST /api/quests/claim through supabase.rpc('claim_quest').
+-- Locks the profile row first, as revoke_quest does, so a claim and a revoke for the same user run
+-- one after the other; a concurrent second claim then finds the live claim and does nothing;
+-- returns { ok, points, completedQuests } or { error, status } with the HTTP status to send.
+create or replace function public.claim_quest(p_profile_id text, p_quest_id text, p_reward int)
+returns jsonb
+language plpgsql
+as $$
+declare
+  v_evidence uuid;
+  v_claim uuid;
+  v_points bigint;
+  v_quests jsonb;
+begin
+  insert into public.profiles (id) values (p_profile_id) on conflict (id) do nothing;
+  perform 1 from public.profiles where id = p_profile_id for update;
+  select id into v_evidence from public.quest_evidence
+    where profile_id = p_profile_id and quest_id = p_quest_id and status = 'approved'
+    order by created_at desc limit 1;
+  if v_evidence is null then
+    return jsonb_build_object('error', 'No approved evidence found', 'status', 400);
+  end if;
+  insert into public.quest_claims (user_id, quest_id, reward, status, evidence_id)
+    values (p_profile_id, p_quest_id, p_reward, 'claimed', v_evidence)
+    on conflict (user_id, quest_id) where status = 'claimed' do nothing
+    returning id into v_claim;
+  if v_claim is null then
+    return jsonb_build_object('error', 'Quest already claimed', 'status', 409);
+  end if;
+
+  v_points := public.append_points(p_profile_id, greatest(p_reward, 0), p_quest_id, 'quest', v_evidence);
+  update public.profiles
+    set quests_completed = case when coalesce(quests_completed, '[]'::jsonb) ? p_quest_id
+                                then quests_completed
+                                else coalesce(quests_completed, '[]'::jsonb) || to_jsonb(p_quest_id) end
+    where id = p_profile_id
+    returning quests_completed into v_quests;
+  return jsonb_build_object('ok', true, 'points', v_points, 'completedQuests', v_quests);
+end $$;
+
+-- Transactional quest revoke, called by POST /api/review/admin/revoke through supabase.rpc('revoke_quest').
+-- Deducts up to p_points (never below zero), removes the quest from the completed list, rejects or
+-- deletes its evidence, revokes the live claim and records the deduction as a negative ledger entry.
+-- Locks the profile row first so the balance it deducts from cannot change underneath it.
+create or replace function public.revoke_quest(p_profile_id text, p_quest_id text, p_points int, p_delete_evidence boolean)
+returns jsonb
+language plpgsql
+as $$
+declare
+  v_points bigint;
+  v_deduct bigint;
+begin
+  insert into public.profiles (id) values (p_profile_id) on conflict (id) do nothing;
+  perform 1 from public.profiles where id = p_profile_id for update;
+  v_points := public.point_balance(p_profile_id);
+  v_deduct := least(v_points, greatest(0, p_points));
+  if v_deduct > 0 then
+    v_points := public.append_points(p_profile_id, -v_deduct::int, p_quest_id, 'revoke');
+  end if;
+  update public.profiles
+    set quests_completed = coalesce(quests_completed, '[]'::jsonb) - p_quest_id,
+        updated_at = now()
+    where id = p_profile_id;
+
+  if p_delete_evidence then
+    delete from public.quest_evidence where profile_id = p_profile_id and quest_id = p_quest_id;
+  else
+    update public.quest_evidence set status = 'rejected'
+      where profile_id = p_profile_id and quest_id = p_quest_id;
+  end if;
+  update public.quest_claims set status = 'revoked'
+    where user_id = p_profile_id and quest_id = p_quest_id and status = 'claimed';
+  return jsonb_build_object('ok', true, 'newPoints', v_points);
+end $$;
+
+-- Profile state for GET /api/profile/state in one round trip: the profile (created if missing), its last 50
+-- ledger entries and last 50 claims. version changes whenever points, quests or the ledger change and is
+-- used as the ETag; when it equals p_if_version only { version } is returned and no rows are read.
+create or replace function public.profile_state(p_profile_id text, p_if_version text default null)
+returns jsonb
+language plpgsql
+as $$
+declare
+  v_profile public.profiles;
+  v_version text;
+begin
+  insert into public.profiles (id) values (p_profile_id) on conflict (id) do nothing;
+  select * into v_profile from public.profiles where id = p_profile_id;
+  v_version := extract(epoch from v_profile.updated_at)::text || '-' || v_profile.ledger_seq::text;
+  if v_version = p_if_version then
+    return jsonb_build_object('version', v_version);
+  end if;
+  return jsonb_build_object(
+    'version', v_version,
+    'profile', jsonb_build_object('id', v_profile.id, 'points', public.point_balance(p_profile_id),
+                                  'completedQuests', coalesce(v_profile.quests_completed, '[]'::jsonb)),
+    'ledger', coalesce((select jsonb_agg(to_jsonb(l)) from (
+        select * from public.point_ledger where user_id = p_profile_id
+        order by seq desc limit 50) l), '[]'::jsonb),
+    'claims', coalesce((select jsonb_agg(to_jsonb(c)) from (
+        select * from public.quest_claims where user_id = p_profile_id
+        order by claimed_at desc limit 50) c), '[]'::jsonb)
+  );
+end $$;
+
+-- Only the server (service role) may call the point-changing functions
+revoke all on function public.claim_quest(text, text, int) from public, anon, authenticated;
+revoke all on function public.revoke_quest(text, text, int, boolean) from public, anon, authenticated;
+grant execute on function public.claim_quest(text, text, int) to service_role;
+grant execute on function public.revoke_quest(text, text, int, boolean) to service_role;
+revoke all on function public.profile_state(text, text) from public, anon, authenticated;
+grant execute on function public.profile_state(text, text) to service_role;
+revoke all on function public.append_points(text, int, text, text, uuid) from public, anon, authenticated;
+grant execute on function public.append_points(text, int, text, text, uuid) to service_role;
+revoke all on function public.compact_point_ledger(int) from public, anon, authenticated;
+grant execute on function public.compact_point_ledger(int) to service_role;
+revoke all on table public.profile_points from anon, authenticated;
+-- The app syncs name and quests_completed; points and ledger_seq are only written by the functions above.
+-- PostgREST upserts set every payload column on conflict, id included, so id needs update too.
+revoke insert, update on table public.profiles from anon, authenticated;
+grant insert (id, name, quests_completed, updated_at), update (id, name, quests_completed, updated_at)
+  on table public.profiles to anon, authenticated;
@@ -1,9 +1,14 @@
 import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+import httpx
 from dotenv import load_dotenv
 from flask import Flask, request, jsonify
 from flask_cors import CORS
 from datetime import datetime
-from supabase import create_client, Client
+from supabase import create_client, Client, ClientOptions
 try:
     # storage3 is used under the hood by supabase-py; FileOptions ensures headers are strings
     from storage3.utils import FileOptions  # type: ignore
@@ -11,6 +16,9 @@ except Exception:
     FileOptions = None  # type: ignore
 import base64
 import json
+import re
+from evidence_images import ImagePipeline, derivative_paths
+from leaderboard import Leaderboard, LeaderboardSync
 
 # IMPORTANT: Load environment variables BEFORE reading them
 load_dotenv()
@@ -19,6 +27,17 @@ APP_URL = os.getenv('SUPABASE_URL')
 SERVICE_KEY = os.getenv('SUPABASE_SERVICE_KEY') or os.getenv('SUPABASE_SERVICE_ROLE')
 ADMIN_KEY = os.getenv('ADMIN_KEY')
 BUCKET = os.getenv('EVIDENCE_BUCKET', 'evidence')
+# Connection pool and timeouts for the shared Supabase HTTP client
+POOL_MAX_CONNECTIONS = int(os.getenv('SUPABASE_POOL_MAX_CONNECTIONS', '20'))
+POOL_MAX_KEEPALIVE = int(os.getenv('SUPABASE_POOL_MAX_KEEPALIVE', '10'))
+KEEPALIVE_EXPIRY = float(os.getenv('SUPABASE_KEEPALIVE_EXPIRY', '60'))
+CONNECT_TIMEOUT = float(os.getenv('SUPABASE_CONNECT_TIMEOUT', '5'))
+REQUEST_TIMEOUT = float(os.getenv('SUPABASE_TIMEOUT', '20'))
+SLOW_QUERY_MS = float(os.getenv('SUPABASE_SLOW_QUERY_MS', '500'))
+# Seconds a signed evidence upload may take before finalize refuses it (Supabase itself honours the token for 2h)
+UPLOAD_TTL = int(os.getenv('EVIDENCE_UPLOAD_TTL', '900'))
+# Formats Pillow decodes, so every upload gets its thumbnail and display copy (see evidence_images.py)
+IMAGE_TYPES = { 'image/jpeg': 'jpg', 'image/png': 'png', 'image/webp': 'webp' }
 app = Flask(__name__)
 # Allow all API routes for simplicity
 CORS(app, resources={r"/api/*": {"origins": "*"}})
@@ -26,10 +45,141 @@ CORS(app, resources={r"/api/*": {"origins": "*"}})
 if not APP_URL or not SERVICE_KEY:
     print('[server] Warning: SUPABASE_URL or SUPABASE_SERVICE_KEY missing; admin/review endpoints will fail')
 
+# ---- Supabase client ----
+# One client per process: its httpx pool keeps TLS connections to Supabase alive
+# across requests. httpx.Client is thread-safe, so threaded workers share it.
+_client: Client | None = None
+_client_pid: int | None = None
+_client_lock = threading.Lock()
+_query_stats: dict = {}
+_stats_lock = threading.Lock()
+
+def _query_target(req: httpx.Request) -> str:
+    """'GET rest/quest_evidence' style label for timing stats"""
+    parts = [p for p in req.url.path.split('/') if p]
+    # /rest/v1/<table>, /storage/v1/object/<bucket>/..., /rest/v1/rpc/<fn>
+    label = '/'.join([parts[0]] + parts[2:4]) if len(parts) > 2 else req.url.path
+    return f"{req.method} {label}"
+
+def _on_request(req: httpx.Request):
+    req.extensions['started'] = time.perf_counter()
+
+def _on_response(res: httpx.Response):
+    started = res.request.extensions.get('started')
+    if started is None:
+        return
+    ms = (time.perf_counter() - started) * 1000.0
+    target = _query_target(res.request)
+    with _stats_lock:
+        s = _query_stats.setdefault(target, { 'count': 0, 'errors': 0, 'total_ms': 0.0, 'max_ms': 0.0 })
+        s['count'] += 1
+        s['errors'] += res.status_code >= 400
+        s['total_ms'] += ms
+        s['max_ms'] = max(s['max_ms'], ms)
+    if ms >= SLOW_QUERY_MS:
+        app.logger.warning('[supabase] slow query %s -> %s in %.0f ms', target, res.status_code, ms)
+
+def query_stats() -> dict:
+    """Per-endpoint Supabase call counts and latencies for this process"""
+    with _stats_lock:
+        return { k: { 'count': v['count'], 'errors': v['errors'], 'avg_ms': round(v['total_ms'] / v['count'], 1), 'max_ms': round(v['max_ms'], 1) }
+                 for k, v in _query_stats.items() }
+
+def _build_client() -> Client:
+    http = httpx.Client(
+        limits=httpx.Limits(max_connections=POOL_MAX_CONNECTIONS, max_keepalive_connections=POOL_MAX_KEEPALIVE, keepalive_expiry=KEEPALIVE_EXPIRY),
+        timeout=httpx.Timeout(REQUEST_TIMEOUT, connect=CONNECT_TIMEOUT),
+        event_hooks={ 'request': [_on_request], 'response': [_on_response] },
+    )
+    opts = ClientOptions(httpx_client=http, auto_refresh_token=False, persist_session=False)
+    return create_client(APP_URL, SERVICE_KEY, options=opts)
+
 def supa() -> Client:
+    global _client, _client_pid
     if not APP_URL or not SERVICE_KEY:
         raise RuntimeError('Server not configured: set SUPABASE_URL and SUPABASE_SERVICE_KEY in environment/.env')
-    return create_client(APP_URL, SERVICE_KEY)
+    pid = os.getpid()
+    client = _client
+    if client is not None and _client_pid == pid:
+        return client
+    with _client_lock:
+        # Rebuilt after a fork: pooled sockets must not be shared with the parent
+        if _client is None or _client_pid != pid:
+            _client = _build_client()
+            _client_pid = pid
+        return _client
+
+# Thumbnails and display copies are made off the request thread (see evidence_images.py)
+images = ImagePipeline(supa, BUCKET)
+# Storage removals after deletes run here so moderation requests return as soon as the rows are gone
+_storage_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix='storage-remove')
+STORAGE_REMOVE_BATCH = 1000  # Supabase storage limit per remove call
+BULK_MAX_IDS = 500
+# Points ranking kept in memory per worker (see leaderboard.py)
+board = Leaderboard()
+board_sync = LeaderboardSync(board, supa)
+LEADERBOARD_MAX_TOP = 100
+# point_ledger is the source of truth for points; this job rolls long ledger tails into point_snapshots
+LEDGER_COMPACT_SECONDS = float(os.getenv('LEDGER_COMPACT_SECONDS', '300'))
+LEDGER_COMPACT_MIN_TAIL = int(os.getenv('LEDGER_COMPACT_MIN_TAIL', '20'))
+_background_pid: int | None = None
+_background_lock = threading.Lock()
+
+def _compact_ledger_loop():
+    while True:
+        time.sleep(LEDGER_COMPACT_SECONDS)
+        try:
+            res = supa().rpc('compact_point_ledger', { 'p_min_tail': LEDGER_COMPACT_MIN_TAIL }).execute()
+            if res.data:
+                app.logger.info('[ledger] compacted %s balances into snapshots', res.data)
+        except Exception as e:
+            app.logger.warning('[ledger] compaction failed: %s', e)
+
+@app.before_request
+def _start_background_jobs():
+    """Start the leaderboard sync and ledger compaction threads once per worker process (after any fork)"""
+    global _background_pid
+    pid = os.getpid()
+    if _background_pid == pid:
+        return
+    with _background_lock:
+        if _background_pid == pid:
+            return
+        _background_pid = pid
+        # Rebuilds the board as soon as the worker serves its first request, health checks included
+        board_sync.ensure_started()
+        if LEDGER_COMPACT_SECONDS > 0 and APP_URL and SERVICE_KEY:
+            threading.Thread(target=_compact_ledger_loop, name='ledger-compaction', daemon=True).start()
+
+def _evidence_files(rows) -> list:
+    """Storage paths (original and derivatives) for deleted evidence rows"""
+    paths = []
+    for r in rows or []:
+        rel = storage_path_from_public_url(str(r.get('image_url') or ''))
+        if rel:
+            paths.extend([rel, *derivative_paths(rel)])
+    return paths
+
+def _remove_files_later(paths: list):
+    """Remove storage objects in the background, one remove() call per batch"""
+    def run():
+        bucket = supa().storage.from_(BUCKET)
+        for i in range(0, len(paths), STORAGE_REMOVE_BATCH):
+            try:
+                bucket.remove(paths[i:i + STORAGE_REMOVE_BATCH])
+            except Exception as e:
+                app.logger.warning('[storage] remove of %d files failed: %s', len(paths[i:i + STORAGE_REMOVE_BATCH]), e)
+    if paths:
+        _storage_pool.submit(run)
+
+def _id_list(payload) -> list:
+    """Validated 'ids' list from a bulk request body"""
+    ids = payload.get('ids') if isinstance(payload, dict) else None
+    if not isinstance(ids, list) or not ids or not all(isinstance(i, (str, int)) and not isinstance(i, bool) for i in ids):
+        raise ValueError('ids must be a non-empty list')
+    if len(ids) > BULK_MAX_IDS:
+        raise ValueError(f'at most {BULK_MAX_IDS} ids per request')
+    return list(dict.fromkeys(str(i) for i in ids))
 
 def require_admin(req):
     key = req.headers.get('X-Admin-Key')
@@ -49,13 +199,31 @@ def upload_data_url(client: Client, data_url: str, path: str) -> str:
         else:
             # Call without options when utils are unavailable
             client.storage.from_(BUCKET).upload(path, blob)
-    except Exception:
-        # Last resort: try without options at all
+    except TypeError:
+        # Older storage3 rejecting the options object; upload errors themselves are not retried
         client.storage.from_(BUCKET).upload(path, blob)
     # Convert to public URL
     pub = client.storage.from_(BUCKET).get_public_url(path)
     return pub
 
+_SAFE_SEGMENT = re.compile(r'[^A-Za-z0-9_.-]')
+
+def evidence_path(profile_id: str, quest_id: str, ext: str = 'jpg') -> str:
+    """Storage path for a new evidence image: <profile>/<unix time>_<random>_<quest>.<ext>
+
+    The random part keeps two uploads issued in the same second from colliding.
+    """
+    return (f"{_SAFE_SEGMENT.sub('_', profile_id)}/{int(time.time())}_{uuid.uuid4().hex[:12]}_"
+            f"{_SAFE_SEGMENT.sub('_', quest_id)}.{ext}")
+
+def _evidence_path_time(path: str, profile_id: str, quest_id: str) -> int | None:
+    """Issue time embedded in a path from evidence_path for this profile and quest, else None"""
+    prefix = f"{_SAFE_SEGMENT.sub('_', profile_id)}/"
+    m = re.fullmatch(r'(\d+)_[0-9a-f]{12}_(.+)\.(\w+)', path[len(prefix):]) if path.startswith(prefix) else None
+    if not m or m.group(2) != _SAFE_SEGMENT.sub('_', quest_id) or m.group(3) not in IMAGE_TYPES.values():
+        return None
+    return int(m.group(1))
+
 def storage_path_from_public_url(url: str) -> str | None:
     # public url looks like: https://<proj>.supabase.co/storage/v1/object/public/<bucket>/<path>
     try:
@@ -66,6 +234,54 @@ def storage_path_from_public_url(url: str) -> str | None:
         pass
     return None
 
+# ---- Admin list pagination ----
+# Keyset pagination on (created_at, id): the cursor is the last row's pair, so each page is an index
+# range scan no matter how deep the admin scrolls.
+PAGE_SIZE_DEFAULT = int(os.getenv('ADMIN_PAGE_SIZE', '50'))
+PAGE_SIZE_MAX = 200
+EVIDENCE_COLUMNS = ('id', 'created_at', 'profile_id', 'quest_id', 'image_url', 'thumb_url', 'display_url', 'notes', 'status', 'decided_at')
+POST_COLUMNS = ('id', 'created_at', 'author', 'content', 'user_id')
+FEEDBACK_COLUMNS = ('id', 'created_at', 'rating', 'comment', 'user_id')
+
+def _encode_cursor(row: dict) -> str:
+    raw = json.dumps([row['created_at'], row['id']]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+def _decode_cursor(cursor: str):
+    try:
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        return str(created_at), str(row_id)
+    except Exception:
+        raise ValueError('invalid cursor')
+
+def _page_args(args, allowed: tuple, default: tuple):
+    """(limit, cursor, select) from ?limit=&cursor=&fields=a,b; the select always includes the key columns"""
+    try:
+        limit = int(args.get('limit') or PAGE_SIZE_DEFAULT)
+    except ValueError:
+        raise ValueError('limit must be an integer')
+    limit = max(1, min(limit, PAGE_SIZE_MAX))
+    cursor = _decode_cursor(args['cursor']) if args.get('cursor') else None
+    fields = [f.strip() for f in args['fields'].split(',') if f.strip()] if args.get('fields') else list(default)
+    unknown = [f for f in fields if f not in allowed]
+    if unknown:
+        raise ValueError(f"unknown fields: {', '.join(unknown)}")
+    for key in ('created_at', 'id'):
+        if key not in fields:
+            fields.append(key)
+    return limit, cursor, ','.join(fields)
+
+def _keyset_page(q, limit: int, cursor):
+    """Run a select builder newest-first from the cursor; returns (items, next_cursor)"""
+    if cursor:
+        created_at, row_id = cursor
+        # The redundant lte bound is what the index range scan uses; the or() breaks created_at ties by id
+        q = q.lte('created_at', created_at).or_(f'created_at.lt."{created_at}",and(created_at.eq."{created_at}",id.lt."{row_id}")')
+    rows = q.order('created_at', desc=True).order('id', desc=True).limit(limit + 1).execute().data or []
+    more = len(rows) > limit
+    rows = rows[:limit]
+    return rows, (_encode_cursor(rows[-1]) if more else None)
+
 # ---- Profile helpers ----
 def _parse_quests(value):
     try:
@@ -78,52 +294,45 @@ def _parse_quests(value):
     except Exception:
         return []
 
-def _ensure_profile(client: Client, profile_id: str):
-    """Ensure a profile row exists; return the row as dict."""
-    row = { 'id': profile_id, 'points': 0, 'quests_completed': [] }
-    try:
-        res = client.table('profiles').select('*').eq('id', profile_id).maybe_single().execute()
-        data = getattr(res, 'data', None)
-        if data:
-            return data
-        # create
-        client.table('profiles').insert(row).execute()
-        return row
-    except Exception:
-        # best effort upsert
-        try:
-            client.table('profiles').upsert(row).execute()
-        except Exception:
-            pass
-        return row
-
 @app.get('/api/profile/state')
 def profile_state():
+    """Profile, last 50 ledger entries and last 50 claims from the profile_state database function.
+    The ETag tracks the profile's updated_at and latest ledger id, so an unchanged state is a 304.
+    """
     try:
         profile_id = request.args.get('profileId')
         if not profile_id:
             return jsonify({ 'error': 'profileId required' }), 400
+        # The browser revalidates with the ETag we sent; the function skips the row reads when it still matches
+        known = next(iter(request.if_none_match), None)
         client = supa()
-        prof = _ensure_profile(client, profile_id)
-        points = int(prof.get('points') or 0)
-        completed = _parse_quests(prof.get('quests_completed'))
-        # last 50 ledger entries
-        try:
-            led = client.table('point_ledger').select('*').eq('user_id', profile_id).order('created_at', desc=True).limit(50).execute().data or []
-        except Exception:
-            led = []
-        # last 50 claims
-        try:
-            claims = client.table('quest_claims').select('*').eq('user_id', profile_id).order('claimed_at', desc=True).limit(50).execute().data or []
-        except Exception:
-            claims = []
-        return jsonify({ 'ok': True, 'profile': { 'id': profile_id, 'points': points, 'completedQuests': completed }, 'ledger': led, 'claims': claims })
+        res = client.rpc('profile_state', { 'p_profile_id': profile_id, 'p_if_version': known }).execute()
+        state = getattr(res, 'data', None) or {}
+        version = str(state.get('version') or '')
+        if version and version in request.if_none_match:
+            resp = app.response_class(status=304)
+        else:
+            prof = state.get('profile') or {}
+            resp = jsonify({
+                'ok': True,
+                'profile': { 'id': profile_id, 'points': int(prof.get('points') or 0), 'completedQuests': _parse_quests(prof.get('completedQuests')) },
+                'ledger': state.get('ledger') or [],
+                'claims': state.get('claims') or []
+            })
+        if version:
+            resp.set_etag(version)
+        resp.headers['Cache-Control'] = 'no-cache'
+        return resp
     except Exception as e:
         return jsonify({ 'error': str(e) }), 500
 
 @app.get('/api/review/health')
 def health():
-    return jsonify({ 'ok': True, 'time': datetime.utcnow().isoformat() + 'Z' })
+    body = { 'ok': True, 'time': datetime.utcnow().isoformat() + 'Z', 'images': images.stats() }
+    # Per-query timings are only for admins
+    if require_admin(request):
+        body['supabase'] = query_stats()
+    return jsonify(body)
 
 @app.post('/api/review/evidence/submit')
 def submit_evidence():
@@ -141,8 +350,9 @@ def submit_evidence():
         existing = client.table('quest_evidence').select('id,status').eq('profile_id', profile_id).eq('quest_id', quest_id).in_('status', ['pending','approved']).limit(1).execute()
         if existing.data:
             return jsonify({ 'error': 'An active submission already exists for this quest.' }), 409
+        path = None
         if image_data and not image_url:
-            path = f"{profile_id}/{int(datetime.utcnow().timestamp())}_{quest_id}.jpg"
+            path = evidence_path(profile_id, quest_id)
             image_url = upload_data_url(client, image_data, path)
         row = {
             'profile_id': profile_id,
@@ -152,6 +362,74 @@ def submit_evidence():
             'status': 'pending'
         }
         data = client.table('quest_evidence').insert(row).execute()
+        if path:
+            images.submit(data.data[0]['id'], path)
+        return jsonify({ 'ok': True, 'id': data.data[0]['id'], 'status': 'pending', 'imageUrl': image_url })
+    except Exception as e:
+        return jsonify({ 'error': str(e) }), 500
+
+@app.post('/api/review/evidence/upload-url')
+def evidence_upload_url():
+    """Signed URL the client PUTs the image to directly; follow with /api/review/evidence/finalize.
+    Body: { profileId, questId, contentType? }
+    """
+    try:
+        payload = request.get_json(force=True)
+        profile_id = payload.get('profileId')
+        quest_id = payload.get('questId')
+        content_type = payload.get('contentType') or 'image/jpeg'
+        if not profile_id or not quest_id:
+            return jsonify({ 'error': 'profileId and questId required' }), 400
+        if content_type not in IMAGE_TYPES:
+            return jsonify({ 'error': f"contentType must be one of {', '.join(IMAGE_TYPES)}" }), 400
+        client = supa()
+        existing = client.table('quest_evidence').select('id').eq('profile_id', profile_id).eq('quest_id', quest_id).in_('status', ['pending','approved']).limit(1).execute()
+        if existing.data:
+            return jsonify({ 'error': 'An active submission already exists for this quest.' }), 409
+        path = evidence_path(profile_id, quest_id, IMAGE_TYPES[content_type])
+        signed = client.storage.from_(BUCKET).create_signed_upload_url(path)
+        return jsonify({ 'ok': True, 'uploadUrl': signed['signed_url'], 'token': signed['token'], 'path': path, 'expiresIn': UPLOAD_TTL })
+    except Exception as e:
+        return jsonify({ 'error': str(e) }), 500
+
+@app.post('/api/review/evidence/finalize')
+def evidence_finalize():
+    """Record evidence for an image uploaded through /api/review/evidence/upload-url.
+    Body: { profileId, questId, path, notes? }
+    """
+    try:
+        payload = request.get_json(force=True)
+        profile_id = payload.get('profileId')
+        quest_id = payload.get('questId')
+        path = str(payload.get('path') or '')
+        notes = payload.get('notes')
+        if not profile_id or not quest_id or not path:
+            return jsonify({ 'error': 'profileId, questId and path required' }), 400
+        issued = _evidence_path_time(path, profile_id, quest_id)
+        if issued is None:
+            return jsonify({ 'error': 'path was not issued for this profile and quest' }), 400
+        if time.time() - issued > UPLOAD_TTL:
+            return jsonify({ 'error': 'Upload expired; request a new upload URL' }), 410
+        client = supa()
+        bucket = client.storage.from_(BUCKET)
+        if not bucket.exists(path):
+            return jsonify({ 'error': 'Image has not been uploaded' }), 400
+        image_url = bucket.get_public_url(path)
+        row = {
+            'profile_id': profile_id,
+            'quest_id': quest_id,
+            'image_url': image_url,
+            'notes': notes,
+            'status': 'pending'
+        }
+        try:
+            data = client.table('quest_evidence').insert(row).execute()
+        except Exception as e:
+            # uniq_active_evidence: a pending/approved submission already exists
+            if 'duplicate key' in str(e) or '23505' in str(e):
+                return jsonify({ 'error': 'An active submission already exists for this quest.' }), 409
+            raise
+        images.submit(data.data[0]['id'], path)
         return jsonify({ 'ok': True, 'id': data.data[0]['id'], 'status': 'pending', 'imageUrl': image_url })
     except Exception as e:
         return jsonify({ 'error': str(e) }), 500
@@ -163,14 +441,11 @@ def evidence_status():
         if not profile_id:
             return jsonify({ 'error': 'profileId required' }), 400
         client = supa()
-        # Get latest status per quest for this profile
-        # Supabase does not support DISTINCT ON easily; fetch recent and reduce client-side
-        res = client.table('quest_evidence').select('*').eq('profile_id', profile_id).order('created_at', desc=True).limit(200).execute()
+        # Latest status per quest for this profile (DISTINCT ON view, see SUPABASE_SCHEMA.sql)
+        res = client.table('latest_quest_evidence').select('quest_id,id,status,image_url,notes').eq('profile_id', profile_id).execute()
         latest = {}
         for r in res.data or []:
-            qid = r.get('quest_id')
-            if qid not in latest:
-                latest[qid] = { 'status': r.get('status'), 'id': r.get('id'), 'imageUrl': r.get('image_url'), 'notes': r.get('notes') }
+            latest[r.get('quest_id')] = { 'status': r.get('status'), 'id': r.get('id'), 'imageUrl': r.get('image_url'), 'notes': r.get('notes') }
         return jsonify({ 'ok': True, 'byQuest': latest })
     except Exception as e:
         return jsonify({ 'error': str(e) }), 500
@@ -182,12 +457,16 @@ def admin_list():
         return jsonify({ 'error': 'unauthorized' }), 401
     try:
         status = request.args.get('status') or 'pending'
+        try:
+            limit, cursor, columns = _page_args(request.args, EVIDENCE_COLUMNS, EVIDENCE_COLUMNS)
+        except ValueError as e:
+            return jsonify({ 'error': str(e) }), 400
         client = supa()
-        q = client.table('quest_evidence').select('*').order('created_at', desc=True).limit(200)
+        q = client.table('quest_evidence').select(columns)
         if status and status != 'all':
             q = q.eq('status', status)
-        res = q.execute()
-        return jsonify({ 'ok': True, 'items': res.data })
+        items, next_cursor = _keyset_page(q, limit, cursor)
+        return jsonify({ 'ok': True, 'items': items, 'nextCursor': next_cursor })
     except Exception as e:
         return jsonify({ 'error': str(e) }), 500
 
@@ -222,32 +501,58 @@ def admin_delete():
         if not evid_id:
             return jsonify({ 'error': 'id required' }), 400
         client = supa()
-        # fetch record first to know image path
-        rec = client.table('quest_evidence').select('*').eq('id', evid_id).maybe_single().execute()
-        image_url = None
-        try:
-            data_obj = rec.data if isinstance(rec, object) else None
-            if isinstance(data_obj, dict):
-                image_url = data_obj.get('image_url')
-        except Exception:
-            pass
-        # delete row
-        client.table('quest_evidence').delete().eq('id', evid_id).execute()
-        # attempt to remove file if exists
-        if image_url:
-            rel = storage_path_from_public_url(str(image_url))
-            if rel:
-                try:
-                    client.storage.from_(BUCKET).remove([rel])
-                except Exception:
-                    pass
+        # The delete returns the removed row, which carries the image path
+        res = client.table('quest_evidence').delete().eq('id', evid_id).execute()
+        _remove_files_later(_evidence_files(res.data))
         return jsonify({ 'ok': True })
     except Exception as e:
         return jsonify({ 'error': str(e) }), 500
 
+@app.post('/api/review/admin/evidence/decision/bulk')
+def admin_decide_bulk():
+    """Body: { ids: [...], decision: 'approved' | 'rejected' | 'pending' }"""
+    if not require_admin(request):
+        return jsonify({ 'error': 'unauthorized' }), 401
+    try:
+        payload = request.get_json(force=True)
+        try:
+            ids = _id_list(payload)
+        except ValueError as e:
+            return jsonify({ 'error': str(e) }), 400
+        decision = payload.get('decision')
+        if decision not in ('approved','rejected','pending'):
+            return jsonify({ 'error': 'decision required' }), 400
+        client = supa()
+        res = client.table('quest_evidence').update({
+            'status': decision,
+            'decided_at': datetime.utcnow().isoformat() + 'Z'
+        }).in_('id', ids).execute()
+        return jsonify({ 'ok': True, 'updated': len(res.data or []) })
+    except Exception as e:
+        return jsonify({ 'error': str(e) }), 500
+
+@app.post('/api/review/admin/evidence/delete/bulk')
+def admin_delete_bulk():
+    """Body: { ids: [...] }. Rows go in one delete; their images are removed in the background."""
+    if not require_admin(request):
+        return jsonify({ 'error': 'unauthorized' }), 401
+    try:
+        try:
+            ids = _id_list(request.get_json(force=True))
+        except ValueError as e:
+            return jsonify({ 'error': str(e) }), 400
+        client = supa()
+        res = client.table('quest_evidence').delete().in_('id', ids).execute()
+        _remove_files_later(_evidence_files(res.data))
+        return jsonify({ 'ok': True, 'deleted': len(res.data or []) })
+    except Exception as e:
+        return jsonify({ 'error': str(e) }), 500
+
 @app.post('/api/review/admin/revoke')
 def admin_revoke():
-    """Revoke a quest approval: set evidence to rejected or delete, deduct points, and remove quest from profile."""
+    """Revoke a quest approval: set evidence to rejected or delete, deduct points, and remove quest from profile.
+    Runs in one transaction in the revoke_quest database function (see SUPABASE_SCHEMA.sql).
+    """
     if not require_admin(request):
         return jsonify({ 'error': 'unauthorized' }), 401
     try:
@@ -259,44 +564,15 @@ def admin_revoke():
         if not profile_id or not quest_id:
             return jsonify({ 'error': 'profileId and questId required' }), 400
         client = supa()
-        # Adjust profile: deduct points and remove quest from completed list
-        prof = client.table('profiles').select('id,points,quests_completed').eq('id', profile_id).maybe_single().execute()
-        cur_points = 0
-        cur_quests = []
-        try:
-            d = getattr(prof, 'data', None) or {}
-            cur_points = int(d.get('points') or 0)
-            qraw = d.get('quests_completed')
-            if isinstance(qraw, list):
-                cur_quests = [str(x) for x in qraw]
-            else:
-                try:
-                    import json
-                    parsed = json.loads(str(qraw))
-                    if isinstance(parsed, list):
-                        cur_quests = [str(x) for x in parsed]
-                except Exception:
-                    pass
-        except Exception:
-            pass
-        new_points = max(0, cur_points - max(0, points))
-        new_quests = [q for q in cur_quests if q != quest_id]
-        client.table('profiles').upsert({
-            'id': profile_id,
-            'points': new_points,
-            'quests_completed': new_quests,
-            'updated_at': datetime.utcnow().isoformat() + 'Z'
+        res = client.rpc('revoke_quest', {
+            'p_profile_id': profile_id,
+            'p_quest_id': quest_id,
+            'p_points': points,
+            'p_delete_evidence': delete_evidence
         }).execute()
-        # Update or delete evidence rows
-        if delete_evidence:
-            client.table('quest_evidence').delete().eq('profile_id', profile_id).eq('quest_id', quest_id).execute()
-        else:
-            client.table('quest_evidence').update({ 'status': 'rejected' }).eq('profile_id', profile_id).eq('quest_id', quest_id).execute()
-        # Mark active claim as revoked if exists
-        try:
-            client.table('quest_claims').update({ 'status': 'revoked' }).eq('user_id', profile_id).eq('quest_id', quest_id).eq('status','claimed').execute()
-        except Exception:
-            pass
+        out = getattr(res, 'data', None) or {}
+        new_points = int(out.get('newPoints') or 0)
+        board.set(profile_id, new_points)
         return jsonify({ 'ok': True, 'newPoints': new_points })
     except Exception as e:
         return jsonify({ 'error': str(e) }), 500
@@ -307,9 +583,13 @@ def admin_posts_list():
     if not require_admin(request):
         return jsonify({ 'error': 'unauthorized' }), 401
     try:
+        try:
+            limit, cursor, columns = _page_args(request.args, POST_COLUMNS, POST_COLUMNS[:4])
+        except ValueError as e:
+            return jsonify({ 'error': str(e) }), 400
         client = supa()
-        res = client.table('posts').select('id,created_at,author,content').order('created_at', desc=True).limit(200).execute()
-        return jsonify({ 'ok': True, 'items': res.data })
+        items, next_cursor = _keyset_page(client.table('posts').select(columns), limit, cursor)
+        return jsonify({ 'ok': True, 'items': items, 'nextCursor': next_cursor })
     except Exception as e:
         return jsonify({ 'error': str(e) }), 500
 
@@ -328,14 +608,34 @@ def admin_posts_delete():
     except Exception as e:
         return jsonify({ 'error': str(e) }), 500
 
+@app.post('/api/admin/posts/delete/bulk')
+def admin_posts_delete_bulk():
+    """Body: { ids: [...] }"""
+    if not require_admin(request):
+        return jsonify({ 'error': 'unauthorized' }), 401
+    try:
+        try:
+            ids = _id_list(request.get_json(force=True))
+        except ValueError as e:
+            return jsonify({ 'error': str(e) }), 400
+        client = supa()
+        res = client.table('posts').delete().in_('id', ids).execute()
+        return jsonify({ 'ok': True, 'deleted': len(res.data or []) })
+    except Exception as e:
+        return jsonify({ 'error': str(e) }), 500
+
 @app.get('/api/admin/feedback')
 def admin_feedback_list():
     if not require_admin(request):
         return jsonify({ 'error': 'unauthorized' }), 401
     try:
+        try:
+            limit, cursor, columns = _page_args(request.args, FEEDBACK_COLUMNS, FEEDBACK_COLUMNS[:4])
+        except ValueError as e:
+            return jsonify({ 'error': str(e) }), 400
         client = supa()
-        res = client.table('feedback').select('id,created_at,rating,comment').order('created_at', desc=True).limit(200).execute()
-        return jsonify({ 'ok': True, 'items': res.data })
+        items, next_cursor = _keyset_page(client.table('feedback').select(columns), limit, cursor)
+        return jsonify({ 'ok': True, 'items': items, 'nextCursor': next_cursor })
     except Exception as e:
         return jsonify({ 'error': str(e) }), 500
 
@@ -354,53 +654,61 @@ def admin_feedback_delete():
     except Exception as e:
         return jsonify({ 'error': str(e) }), 500
 
+@app.post('/api/admin/feedback/delete/bulk')
+def admin_feedback_delete_bulk():
+    """Body: { ids: [...] }"""
+    if not require_admin(request):
+        return jsonify({ 'error': 'unauthorized' }), 401
+    try:
+        try:
+            ids = _id_list(request.get_json(force=True))
+        except ValueError as e:
+            return jsonify({ 'error': str(e) }), 400
+        client = supa()
+        res = client.table('feedback').delete().in_('id', ids).execute()
+        return jsonify({ 'ok': True, 'deleted': len(res.data or []) })
+    except Exception as e:
+        return jsonify({ 'error': str(e) }), 500
+
 @app.post('/api/quests/claim')
 def quests_claim():
     """Claim quest reward after approval. Prevents double-claiming and updates points and completed list.
     Body: { profileId, questId, reward, evidenceId? }
+    The whole claim runs in one transaction in the claim_quest database function (see SUPABASE_SCHEMA.sql).
     """
     try:
         payload = request.get_json(force=True)
         profile_id = payload.get('profileId')
         quest_id = payload.get('questId')
         reward = int(payload.get('reward') or 0)
-        evidence_id = payload.get('evidenceId')
         if not profile_id or not quest_id:
             return jsonify({ 'error': 'profileId and questId required' }), 400
         client = supa()
-        _ensure_profile(client, profile_id)
-        # Verify evidence approved
-        q = client.table('quest_evidence').select('id,status').eq('profile_id', profile_id).eq('quest_id', quest_id).eq('status','approved').order('created_at', desc=True).limit(1).execute()
-        if not q.data:
-            return jsonify({ 'error': 'No approved evidence found' }), 400
-        evid = q.data[0]['id']
-        if evidence_id and str(evidence_id) != str(evid):
-            # not a hard error; proceed if there is an approved one
-            pass
-        # Prevent double claim
-        already = client.table('quest_claims').select('id').eq('user_id', profile_id).eq('quest_id', quest_id).eq('status','claimed').limit(1).execute()
-        if already.data:
-            return jsonify({ 'error': 'Quest already claimed' }), 409
-        # Update profile
-        prof_res = client.table('profiles').select('points,quests_completed').eq('id', profile_id).maybe_single().execute()
-        prof = getattr(prof_res, 'data', None) or {}
-        points = int(prof.get('points') or 0) + max(0, reward)
-        completed = _parse_quests(prof.get('quests_completed'))
-        if quest_id not in completed:
-            completed.append(quest_id)
-        client.table('profiles').upsert({ 'id': profile_id, 'points': points, 'quests_completed': completed, 'updated_at': datetime.utcnow().isoformat() + 'Z' }).execute()
-        # Insert claim and ledger (best-effort)
-        try:
-            client.table('quest_claims').insert({ 'user_id': profile_id, 'quest_id': quest_id, 'reward': reward, 'status': 'claimed', 'evidence_id': evid }).execute()
-        except Exception:
-            pass
-        try:
-            client.table('point_ledger').insert({ 'user_id': profile_id, 'delta': reward, 'reason': quest_id, 'source': 'quest', 'evidence_id': evid }).execute()
-        except Exception:
-            pass
-        return jsonify({ 'ok': True, 'points': points, 'completedQuests': completed })
+        res = client.rpc('claim_quest', { 'p_profile_id': profile_id, 'p_quest_id': quest_id, 'p_reward': reward }).execute()
+        out = getattr(res, 'data', None) or {}
+        if out.get('error'):
+            return jsonify({ 'error': out['error'] }), int(out.get('status') or 400)
+        points = int(out.get('points') or 0)
+        board.set(profile_id, points)
+        return jsonify({ 'ok': True, 'points': points, 'completedQuests': _parse_quests(out.get('completedQuests')) })
     except Exception as e:
         return jsonify({ 'error': str(e) }), 500
 
+@app.get('/api/leaderboard')
+def leaderboard_top():
+    """Top profiles by points: ?top=N (default 10, max 100)"""
+    try:
+        top = max(1, min(int(request.args.get('top') or 10), LEADERBOARD_MAX_TOP))
+    except ValueError:
+        return jsonify({ 'error': 'top must be an integer' }), 400
+    return jsonify({ 'ok': True, 'ready': board_sync.ready, 'total': len(board), 'items': board.top(top) })
+
+@app.get('/api/leaderboard/rank')
+def leaderboard_rank():
+    profile_id = request.args.get('profileId')
+    if not profile_id:
+        return jsonify({ 'error': 'profileId required' }), 400
+    return jsonify({ 'ok': True, 'ready': board_sync.ready, 'profileId': profile_id, **board.rank(profile_id) })
+
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=int(os.getenv('PORT', '8000')))
@@ -0,0 +1,119 @@
+"""
+Background derivatives for evidence images.
+
+After an evidence image lands in storage, a small worker pool downloads it once
+and writes two WebP files next to it: a thumbnail for the admin review list and
+a size-capped copy for full-screen viewing. JPEGs are decoded in Pillow's draft
+mode, which lets libjpeg scale by 1/2, 1/4 or 1/8 while decoding instead of
+materialising the full phone-camera bitmap. The public URLs of both files are
+written to the evidence row (thumb_url, display_url). Request threads only
+enqueue; when the queue is full the job is dropped and the original is served.
+"""
+
+import io
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Tuple
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # pipeline is disabled without Pillow
+    Image = None  # type: ignore
+    ImageOps = None  # type: ignore
+
+THUMB_SIDE = int(os.getenv('EVIDENCE_THUMB_SIDE', '320'))
+DISPLAY_SIDE = int(os.getenv('EVIDENCE_DISPLAY_SIDE', '1600'))
+THUMB_QUALITY = int(os.getenv('EVIDENCE_THUMB_QUALITY', '70'))
+DISPLAY_QUALITY = int(os.getenv('EVIDENCE_DISPLAY_QUALITY', '80'))
+WORKERS = int(os.getenv('EVIDENCE_IMAGE_WORKERS', '2'))
+QUEUE_MAX = int(os.getenv('EVIDENCE_IMAGE_QUEUE', '64'))
+
+log = logging.getLogger(__name__)
+
+
+def derivative_paths(path: str) -> Tuple[str, str]:
+    """(thumbnail, display) storage paths for an original at `path`"""
+    stem = path.rsplit('.', 1)[0]
+    return f"{stem}_thumb.webp", f"{stem}_display.webp"
+
+
+def _webp(img, side: int, quality: int) -> bytes:
+    img = img.copy()
+    img.thumbnail((side, side), Image.LANCZOS)
+    out = io.BytesIO()
+    img.save(out, 'WEBP', quality=quality, method=4)
+    return out.getvalue()
+
+
+def render(data: bytes) -> Tuple[bytes, bytes]:
+    """WebP (thumbnail, display) bytes for an encoded image"""
+    img = Image.open(io.BytesIO(data))
+    # No-op for formats other than JPEG; must run before the pixels are loaded
+    img.draft('RGB', (DISPLAY_SIDE, DISPLAY_SIDE))
+    img = ImageOps.exif_transpose(img)
+    if img.mode not in ('RGB', 'RGBA'):
+        img = img.convert('RGBA' if 'transparency' in img.info else 'RGB')
+    display = _webp(img, DISPLAY_SIDE, DISPLAY_QUALITY)
+    thumb = _webp(img, THUMB_SIDE, THUMB_QUALITY)
+    return thumb, display
+
+
+class ImagePipeline:
+    """Bounded background pool turning uploaded originals into thumbnail and display WebPs"""
+
+    def __init__(self, get_client: Callable, bucket: str, workers: int = WORKERS, queue_max: int = QUEUE_MAX):
+        self.get_client = get_client
+        self.bucket = bucket
+        self.enabled = Image is not None
+        self._pool = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix='evidence-images')
+        self._slots = threading.BoundedSemaphore(max(1, queue_max))
+        self._lock = threading.Lock()
+        self._stats = {'queued': 0, 'done': 0, 'failed': 0, 'dropped': 0}
+        if not self.enabled:
+            log.warning('Pillow not installed; evidence thumbnails are disabled')
+
+    def _count(self, key: str):
+        with self._lock:
+            self._stats[key] += 1
+
+    def submit(self, evidence_id: str, path: str) -> bool:
+        """Queue derivatives for one evidence row; never blocks, False if dropped"""
+        if not self.enabled:
+            return False
+        if not self._slots.acquire(blocking=False):
+            self._count('dropped')
+            return False
+        self._count('queued')
+        try:
+            self._pool.submit(self._run, evidence_id, path)
+        except RuntimeError:  # interpreter shutting down
+            self._slots.release()
+            return False
+        return True
+
+    def _run(self, evidence_id: str, path: str):
+        try:
+            self.process(evidence_id, path)
+            self._count('done')
+        except Exception:
+            self._count('failed')
+            log.exception('evidence image %s (%s) failed', evidence_id, path)
+        finally:
+            self._slots.release()
+
+    def process(self, evidence_id: str, path: str) -> Dict[str, str]:
+        client = self.get_client()
+        bucket = client.storage.from_(self.bucket)
+        thumb, display = render(bucket.download(path))
+        urls = {}
+        for column, target, body in zip(('thumb_url', 'display_url'), derivative_paths(path), (thumb, display)):
+            bucket.upload(target, body, {'content-type': 'image/webp', 'cache-control': '31536000', 'upsert': 'true'})
+            urls[column] = bucket.get_public_url(target)
+        client.table('quest_evidence').update(urls).eq('id', evidence_id).execute()
+        return urls
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self._stats, enabled=self.enabled)
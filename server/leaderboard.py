@@ -0,0 +1,208 @@
+"""
+In-process points leaderboard.
+
+Every worker keeps the ranking in memory and updates it incrementally:
+- A Fenwick tree counts profiles per point value, so a rank is one O(log n)
+  prefix sum.
+- Profiles are bucketed by point value. Buckets keep insertion order, so ties
+  rank whoever reached the score first ahead.
+- A sorted list of the distinct point values lets top-N walk only the buckets
+  it needs.
+
+Claims and revokes handled by this worker update the board immediately.
+LeaderboardSync builds the board from the `profile_points` view (ledger
+balances) at startup, then every few seconds pulls the rows whose updated_at
+moved. That is how changes made by other workers, or directly in the
+database, arrive.
+"""
+
+import bisect
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+REFRESH_SECONDS = float(os.getenv('LEADERBOARD_REFRESH', '15'))
+# Re-read this much before the watermark so rows from transactions that committed late are not missed
+SYNC_OVERLAP = timedelta(seconds=float(os.getenv('LEADERBOARD_SYNC_OVERLAP', '5')))
+PAGE = 1000
+
+log = logging.getLogger(__name__)
+
+
+class Leaderboard:
+    """Order-statistic index of profile points; all methods are thread-safe"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._points: Dict[str, int] = {}
+        self._buckets: Dict[int, Dict[str, None]] = {}
+        self._values: List[int] = []
+        self._cap = 1024
+        self._tree = [0] * (self._cap + 1)
+
+    # Fenwick tree over point values 0.._cap-1
+    def _tree_add(self, value: int, delta: int):
+        i = value + 1
+        while i <= self._cap:
+            self._tree[i] += delta
+            i += i & -i
+
+    def _count_at_most(self, value: int) -> int:
+        i, total = min(value + 1, self._cap), 0
+        while i > 0:
+            total += self._tree[i]
+            i -= i & -i
+        return total
+
+    def _grow(self, value: int):
+        while self._cap <= value:
+            self._cap *= 2
+        self._tree = [0] * (self._cap + 1)
+        for v, ids in self._buckets.items():
+            self._tree_add(v, len(ids))
+
+    def _discard(self, profile_id: str):
+        old = self._points.pop(profile_id, None)
+        if old is None:
+            return
+        bucket = self._buckets[old]
+        del bucket[profile_id]
+        if not bucket:
+            del self._buckets[old]
+            self._values.pop(bisect.bisect_left(self._values, old))
+        self._tree_add(old, -1)
+
+    def _insert(self, profile_id: str, points: int):
+        if points >= self._cap:
+            self._grow(points)
+        bucket = self._buckets.get(points)
+        if bucket is None:
+            bucket = self._buckets[points] = {}
+            bisect.insort(self._values, points)
+        bucket[profile_id] = None
+        self._points[profile_id] = points
+        self._tree_add(points, 1)
+
+    def set(self, profile_id: str, points: int):
+        points = max(0, int(points))
+        with self._lock:
+            if self._points.get(profile_id) == points:
+                return
+            self._discard(profile_id)
+            self._insert(profile_id, points)
+
+    def load(self, rows: Iterable[Tuple[str, int]]):
+        """Replace the board; rows should come in the order ties are to be ranked"""
+        with self._lock:
+            self._points, self._buckets, self._values = {}, {}, []
+            self._cap = 1024
+            self._tree = [0] * (self._cap + 1)
+            for profile_id, points in rows:
+                self._discard(profile_id)
+                self._insert(profile_id, max(0, int(points)))
+
+    def __len__(self) -> int:
+        return len(self._points)
+
+    def top(self, n: int) -> List[Dict[str, Any]]:
+        """Highest n profiles as [{rank, profileId, points}], ties sharing a rank"""
+        out: List[Dict[str, Any]] = []
+        with self._lock:
+            above = 0
+            for value in reversed(self._values):
+                bucket = self._buckets[value]
+                for profile_id in bucket:
+                    if len(out) >= n:
+                        return out
+                    out.append({'rank': above + 1, 'profileId': profile_id, 'points': value})
+                above += len(bucket)
+        return out
+
+    def rank(self, profile_id: str) -> Dict[str, Any]:
+        """{rank, points, total}; a profile not on the board counts as 0 points"""
+        with self._lock:
+            points = self._points.get(profile_id, 0)
+            total = len(self._points)
+            return {'rank': total - self._count_at_most(points) + 1, 'points': points, 'total': total}
+
+
+class LeaderboardSync:
+    """Loads the board from profile_points and keeps pulling changed rows, once per worker process"""
+
+    def __init__(self, board: Leaderboard, get_client: Callable, interval: float = REFRESH_SECONDS):
+        self.board = board
+        self.get_client = get_client
+        self.interval = interval
+        self.ready = False
+        self._watermark: Optional[datetime] = None
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def ensure_started(self):
+        """Start the sync thread in this process (again after a fork)"""
+        pid = os.getpid()
+        if self._pid == pid:
+            return
+        with self._lock:
+            if self._pid != pid:
+                self._pid = pid
+                self.ready = False
+                threading.Thread(target=self._loop, name='leaderboard-sync', daemon=True).start()
+
+    def _loop(self):
+        while True:
+            try:
+                if self.ready:
+                    self.refresh()
+                else:
+                    self.rebuild()
+            except Exception:
+                log.exception('leaderboard sync failed')
+            time.sleep(self.interval)
+
+    def _note(self, row: Dict[str, Any]):
+        ts = row.get('updated_at')
+        if ts:
+            t = datetime.fromisoformat(str(ts).replace('Z', '+00:00'))
+            if self._watermark is None or t > self._watermark:
+                self._watermark = t
+
+    def rebuild(self):
+        rows, last = [], None
+        client = self.get_client()
+        while True:
+            q = client.table('profile_points').select('id,points,updated_at').order('id').limit(PAGE)
+            if last is not None:
+                q = q.gt('id', last)
+            page = q.execute().data or []
+            rows.extend(page)
+            if len(page) < PAGE:
+                break
+            last = page[-1]['id']
+        # Ties go to whoever reached the score first
+        rows.sort(key=lambda r: (-(r.get('points') or 0), str(r.get('updated_at') or '')))
+        self.board.load((str(r['id']), r.get('points') or 0) for r in rows)
+        for r in rows:
+            self._note(r)
+        self.ready = True
+        log.info('leaderboard loaded %d profiles', len(rows))
+
+    def refresh(self):
+        if self._watermark is None:
+            return self.rebuild()
+        since, last_id = (self._watermark - SYNC_OVERLAP).isoformat(), ''
+        client = self.get_client()
+        while True:
+            page = (client.table('profile_points').select('id,points,updated_at')
+                    .gte('updated_at', since)
+                    .or_(f'updated_at.gt."{since}",id.gt."{last_id}"')
+                    .order('updated_at').order('id').limit(PAGE).execute().data or [])
+            for r in page:
+                self.board.set(str(r['id']), r.get('points') or 0)
+                self._note(r)
+            if len(page) < PAGE:
+                return
+            since, last_id = page[-1]['updated_at'], page[-1]['id']
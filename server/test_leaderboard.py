@@ -0,0 +1,67 @@
+import itertools
+import random
+
+from leaderboard import Leaderboard
+
+
+class SortedBoard:
+    """Reference ranking: sort everything on every query"""
+
+    def __init__(self):
+        self.points = {}
+        self.reached = {}
+        self.clock = itertools.count()
+
+    def set(self, profile_id, points):
+        points = max(0, int(points))
+        if self.points.get(profile_id) != points:
+            self.points[profile_id] = points
+            self.reached[profile_id] = next(self.clock)
+
+    def ordered(self):
+        return sorted(self.points, key=lambda p: (-self.points[p], self.reached[p]))
+
+    def rank(self, profile_id):
+        points = self.points.get(profile_id, 0)
+        return 1 + sum(1 for v in self.points.values() if v > points)
+
+
+def check(board, ref, probes):
+    expected = ref.ordered()
+    top = board.top(len(expected) + 5)
+    assert [e['profileId'] for e in top] == expected
+    assert [e['points'] for e in top] == [ref.points[p] for p in expected]
+    assert [e['rank'] for e in top] == [ref.rank(p) for p in expected]
+    assert board.top(3) == top[:3]
+    for profile_id in probes:
+        got = board.rank(profile_id)
+        assert got == {'rank': ref.rank(profile_id), 'points': ref.points.get(profile_id, 0),
+                       'total': len(ref.points)}
+
+
+def test_rank_and_top_match_a_sorted_list():
+    rng = random.Random(0)
+    board, ref = Leaderboard(), SortedBoard()
+    ids = [f'p{i}' for i in range(60)]
+    for step in range(2000):
+        profile_id = rng.choice(ids)
+        # Mostly small scores with many ties, occasionally past the tree's initial capacity
+        points = rng.choice([rng.randint(-5, 40), rng.randint(0, 5000)]) if step % 7 == 0 else rng.randint(0, 40)
+        board.set(profile_id, points)
+        ref.set(profile_id, points)
+        if step % 50 == 0:
+            check(board, ref, rng.sample(ids, 10) + ['nobody'])
+    check(board, ref, ids + ['nobody'])
+    assert len(board) == len(ref.points)
+
+
+def test_load_replaces_the_board_and_keeps_tie_order():
+    board = Leaderboard()
+    board.set('old', 9000)
+    rows = [('a', 10), ('b', 30), ('c', 10), ('d', 0), ('b', 20)]
+    board.load(rows)
+    ref = SortedBoard()
+    for profile_id, points in rows:
+        ref.set(profile_id, points)
+    check(board, ref, ['a', 'b', 'c', 'd', 'old'])
+    assert board.rank('old') == {'rank': 4, 'points': 0, 'total': 4}
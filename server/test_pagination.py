@@ -0,0 +1,78 @@
+import re
+import uuid
+
+import httpx
+import pytest
+from postgrest import SyncPostgrestClient
+
+from app import _decode_cursor, _encode_cursor, _keyset_page, _page_args, EVIDENCE_COLUMNS
+
+OR_FILTER = re.compile(r'\(created_at\.lt\."([^"]*)",and\(created_at\.eq\."([^"]*)",id\.lt\."([^"]*)"\)\)')
+
+
+def table_client(rows):
+    """PostgREST client whose HTTP layer answers keyset queries from `rows`"""
+    def handle(request: httpx.Request) -> httpx.Response:
+        params = request.url.params
+        result = list(rows)
+        for value in params.get_list('created_at'):
+            op, bound = value.split('.', 1)
+            assert op == 'lte'
+            result = [r for r in result if r['created_at'] <= bound]
+        if 'or' in params:
+            lt, eq, row_id = OR_FILTER.fullmatch(params['or']).groups()
+            result = [r for r in result if r['created_at'] < lt or (r['created_at'] == eq and r['id'] < row_id)]
+        assert params['order'] == 'created_at.desc,id.desc'
+        result.sort(key=lambda r: (r['created_at'], r['id']), reverse=True)
+        return httpx.Response(200, json=result[:int(params['limit'])])
+
+    http = httpx.Client(base_url='http://rest.test', transport=httpx.MockTransport(handle))
+    return SyncPostgrestClient('http://rest.test', http_client=http)
+
+
+def make_rows(n):
+    # Few distinct timestamps, so most page boundaries fall inside a run of ties
+    return [{'id': str(uuid.UUID(int=i * 7919 % 1000 + 1)),
+             'created_at': f'2026-10-{1 + i % 4:02d}T08:00:00.123456+00:00'} for i in range(n)]
+
+
+def test_cursor_round_trip():
+    row = {'id': str(uuid.uuid4()), 'created_at': '2026-10-19T08:30:00.5+00:00'}
+    cursor = _encode_cursor(row)
+    assert '=' not in cursor
+    assert _decode_cursor(cursor) == (row['created_at'], row['id'])
+    with pytest.raises(ValueError):
+        _decode_cursor('not-a-cursor')
+
+
+def test_keyset_pages_cover_every_row_once_in_order():
+    rows = make_rows(53)
+    client = table_client(rows)
+    seen, cursor, pages = [], None, 0
+    while True:
+        items, next_cursor = _keyset_page(client.table('quest_evidence').select('id,created_at'), 10, cursor)
+        seen.extend(items)
+        pages += 1
+        if next_cursor is None:
+            break
+        cursor = _decode_cursor(next_cursor)
+    assert pages == 6
+    expected = sorted(rows, key=lambda r: (r['created_at'], r['id']), reverse=True)
+    assert [r['id'] for r in seen] == [r['id'] for r in expected]
+
+
+def test_exact_last_page_has_no_next_cursor():
+    client = table_client(make_rows(20))
+    items, next_cursor = _keyset_page(client.table('posts').select('id,created_at'), 20, None)
+    assert len(items) == 20 and next_cursor is None
+
+
+def test_page_args_always_select_key_columns():
+    cursor = _encode_cursor({'id': 'a', 'created_at': 't'})
+    limit, decoded, select = _page_args({'limit': '999', 'cursor': cursor, 'fields': 'status,notes'},
+                                        EVIDENCE_COLUMNS, EVIDENCE_COLUMNS)
+    assert limit == 200
+    assert decoded == ('t', 'a')
+    assert select.split(',') == ['status', 'notes', 'created_at', 'id']
+    with pytest.raises(ValueError):
+        _page_args({'fields': 'password'}, EVIDENCE_COLUMNS, EVIDENCE_COLUMNS)